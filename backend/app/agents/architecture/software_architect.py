@@ -1,18 +1,14 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
 from app.core.model_config import ModelConfig
 from typing import Dict, Any
 import json
-import os
 
-class SoftwareArchitectAgent:
+class SoftwareArchitectAgent(BaseAgent):
     def __init__(self):
-        self.name = "software_architect"
-        self.description = "Designs system architecture."
-        self.instruction = """
+        super().__init__(
+            name="software_architect",
+            description="Designs system architecture.",
+            instruction="""
             You are the Software Architect for SparkToShip AI.
             Your goal is to design a scalable, modern software architecture based on requirements.
             
@@ -376,46 +372,13 @@ class SoftwareArchitectAgent:
             8. Each API principle must have "principle" and "description" fields
             9. Output ONLY valid JSON, no markdown code blocks
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def design_architecture(self, requirements: Dict[str, Any], session_id: str, model_config: ModelConfig) -> Dict[str, Any]:
         prompt = f"Design the software architecture for these requirements: {json.dumps(requirements)}"
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
+        from app.utils.adk_helper import parse_json_response
         
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
-        
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
+        response = await self._run_prompt(prompt, session_id, model_config, cacheable=True)
         
         # Use robust JSON parsing
         return parse_json_response(response)
@@ -1,69 +1,40 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
 from app.core.model_config import ModelConfig
 from typing import Dict, Any
-import json
-import os
 
-class BackendDevAgent:
+class BackendDevAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
+
     def __init__(self):
-        self.name = "backend_dev"
-        self.description = "Writes backend code."
-        self.instruction = """
+        super().__init__(
+            name="backend_dev",
+            description="Writes backend code.",
+            instruction="""
             You are the Backend Developer for SparkToShip AI.
             Your goal is to write clean, efficient, and scalable backend code (Python/FastAPI) and comprehensive documentation.
             
             Output strictly in JSON format with keys: "files" (list of {path, content}).
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def write_code(self, task: Dict[str, Any], context: Dict[str, Any], session_id: str, model_config: ModelConfig) -> Dict[str, Any]:
-        prompt = f"""
-        Write code for the following task:
-        {json.dumps(task, indent=2)}
-        
-        Context (Architecture/Stack):
-        {json.dumps(context, indent=2)}
-        """
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
+        from app.utils.adk_helper import parse_json_response
+        from app.utils.prompt_builder import focus_user_stories, strip_diagrams
         
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
+        # The task is always sent in full; context is minified, stripped of
+        # diagrams and narrowed to the task's story before being truncated
+        prompt = (
+            self._prompt_builder(model_config)
+            .add_json("Write code for the following task:", task, name="task", priority=90, required=True)
+            .add_json(
+                "Context (Architecture/Stack):", context, name="context", priority=10,
+                reducers=[strip_diagrams, focus_user_stories(task.get("story_id"))]
             )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
+            .build()
+        )
         
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
+        response = await self._run_prompt(prompt, session_id, model_config)
         # Use robust JSON parsing
         return parse_json_response(response)
 
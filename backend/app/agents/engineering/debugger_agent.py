@@ -1,18 +1,16 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
 from app.core.model_config import ModelConfig
 from typing import Dict, Any, List
-import json
-import os
 
-class DebuggerAgent:
+class DebuggerAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
+
     def __init__(self):
-        self.name = "debugger_agent"
-        self.description = "Debugs and fixes code issues."
-        self.instruction = """
+        super().__init__(
+            name="debugger_agent",
+            description="Debugs and fixes code issues.",
+            instruction="""
             You are the Debugger Agent for SparkToShip AI.
             Your goal is to analyze error messages, warnings, and code issues, then provide fixes.
             
@@ -27,8 +25,7 @@ class DebuggerAgent:
             - "fixes": list of {path, content, explanation}
             - "severity": "critical"|"warning"|"info"
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def debug_code(
         self, 
@@ -47,124 +44,127 @@ class DebuggerAgent:
             context: Additional context (architecture, dependencies, etc.)
             session_id: Session identifier
             model_config: Model configuration with API key
-        """
-        prompt = f"""
-        Debug the following issue:
-        
-        ERROR MESSAGE:
-        {error_message}
-        
-        CODE FILES:
-        {json.dumps(code_files, indent=2)}
-        
-        CONTEXT:
-        {json.dumps(context, indent=2)}
-        
-        Analyze the error, identify the root cause, and provide fixed code.
-        """
-        
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
-        
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
             
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
-        
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
-        
-        return parse_json_response(response)
+        Returns:
+            The model's {"analysis", "fixes", "severity"}. Fixes are whole
+            files that get written back, so files are never trimmed to fit
+            the prompt; files left out are listed under "omitted_files" and
+            fixes for them are moved to "rejected_fixes".
+        """
+        from app.utils.adk_helper import parse_json_response
+        from app.utils.prompt_builder import strip_diagrams
+        
+        builder = (
+            self._prompt_builder(model_config)
+            .add_text(f"Debug the following issue:\n\nERROR MESSAGE:\n{error_message}", name="error", truncatable=True)
+            .add_code_files("CODE FILES:", code_files, editable=True)
+            .add_json("CONTEXT:", context, name="context", priority=10, reducers=[strip_diagrams])
+            .add_text("Analyze the error, identify the root cause, and provide fixed code.", name="instructions")
+        )
+        prompt = builder.build()
+        
+        response = await self._run_prompt(prompt, session_id, model_config)
+        result = parse_json_response(response)
+        
+        omitted = set(builder.omitted_files)
+        if omitted and isinstance(result, dict) and isinstance(result.get("fixes"), list):
+            # The model never saw these files: a "fix" would overwrite them blindly
+            result["omitted_files"] = sorted(omitted)
+            result["rejected_fixes"] = [
+                {"path": fix.get("path"), "reason": "File was left out of the prompt"}
+                for fix in result["fixes"]
+                if isinstance(fix, dict) and fix.get("path") in omitted
+            ]
+            result["fixes"] = [
+                fix for fix in result["fixes"]
+                if not (isinstance(fix, dict) and fix.get("path") in omitted)
+            ]
+        return result
 
     async def lint_code(
         self,
         code_files: Dict[str, str],
         session_id: str,
-        model_config: ModelConfig
+        model_config: ModelConfig,
+        deep: bool = False
     ) -> Dict[str, Any]:
         """
         Perform static analysis and linting
         
+        Files are syntax-checked locally first (Python compile, JSON/YAML
+        parse, JS/TS bracket and import checks). Only files the local pass
+        can't clear are sent to the model, along with what it found.
+        
         Args:
             code_files: Dictionary of file paths to their content
             session_id: Session identifier
             model_config: Model configuration with API key
-        """
-        prompt = f"""
-        Perform static analysis and linting on the following code:
-        
-        {json.dumps(code_files, indent=2)}
-        
-        Check for:
-        - Syntax errors
-        - Type errors
-        - Code style issues
-        - Potential bugs
-        - Security vulnerabilities
-        - Performance issues
-        
-        Return a list of issues with severity levels.
-        """
-        
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
-        
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
+            deep: Send every file to the model, not just the uncleared ones
             
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
+        Returns:
+            {"issues": [...], "local_analysis": {...}} with local and model
+            issues merged, or the model's error dict (plus local issues)
+        """
+        from app.services.static_analysis import static_analyzer
+        from app.utils.adk_helper import parse_json_response
+        
+        local = await static_analyzer.analyze(code_files)
+        local_issues = [
+            {"file": path, **issue, "source": "local"}
+            for path, result in local.items()
+            for issue in result["issues"]
+        ]
+        cleared = sorted(path for path, result in local.items() if result["cleared"])
+        to_model = {path: content for path, content in code_files.items() if deep or not local[path]["cleared"]}
+        local_analysis = {
+            "cleared": cleared,
+            "sent_to_model": sorted(to_model),
+            "local_issues": len(local_issues)
+        }
+        
+        if not to_model:
+            return {"issues": local_issues, "local_analysis": local_analysis}
+        
+        builder = (
+            self._prompt_builder(model_config)
+            .add_code_files("Perform static analysis and linting on the following code:", to_model)
+        )
+        if local_issues:
+            builder.add_json(
+                "A local syntax check already found these issues (confirm and explain them):",
+                [issue for issue in local_issues if issue["file"] in to_model],
+                name="local_issues",
+                priority=40
             )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
-        
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
-        
-        return parse_json_response(response)
+        prompt = builder.add_text(
+            "Check for:\n"
+            "- Syntax errors\n"
+            "- Type errors\n"
+            "- Code style issues\n"
+            "- Potential bugs\n"
+            "- Security vulnerabilities\n"
+            "- Performance issues\n"
+            "\n"
+            "Return a list of issues with severity levels, as JSON:\n"
+            '{"issues": [{"file": "path", "line": 1, "severity": "error|warning|info", '
+            '"category": "syntax|type|style|bug|security|performance", "message": "...", "suggestion": "..."}]}',
+            name="instructions"
+        ).build()
+        
+        response = await self._run_prompt(prompt, session_id, model_config)
+        result = parse_json_response(response)
+        if not isinstance(result, dict) or "error" in result:
+            return {**(result if isinstance(result, dict) else {"error": "Unexpected lint output"}), "issues": local_issues}
+        
+        model_issues = result.get("issues")
+        if not isinstance(model_issues, list):
+            # Keep whatever shape the model answered in rather than dropping it
+            return {**result, "issues": local_issues, "local_analysis": local_analysis}
+        return {
+            **result,
+            "issues": local_issues + [
+                {**issue, "source": "model"} if isinstance(issue, dict) else issue
+                for issue in model_issues
+            ],
+            "local_analysis": local_analysis
+        }
@@ -1,18 +1,17 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
 from app.core.model_config import ModelConfig
 from typing import Dict, Any, List
 import json
-import os
 
-class E2ETestAgent:
+class E2ETestAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
+
     def __init__(self):
-        self.name = "e2e_test_agent"
-        self.description = "Creates and runs end-to-end integration tests."
-        self.instruction = """
+        super().__init__(
+            name="e2e_test_agent",
+            description="Creates and runs end-to-end integration tests.",
+            instruction="""
             You are the E2E Testing Agent for SparkToShip AI.
             Your goal is to create comprehensive end-to-end integration tests based on:
             - User stories
@@ -80,8 +79,7 @@ class E2ETestAgent:
                 }
             }
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def generate_test_plan(
         self, 
@@ -124,41 +122,9 @@ class E2ETestAgent:
         - Maintainable (well-documented)
         """
         
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
-        
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
+        from app.utils.adk_helper import parse_json_response
         
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
+        response = await self._run_prompt(prompt, session_id, model_config)
         
         return parse_json_response(response)
 
@@ -1,18 +1,57 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
+from app.core.config import settings
 from app.core.model_config import ModelConfig
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 import json
-import os
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Tasks every sprint plan ends with; in map-reduce planning they are added
+# once by the merge step instead of by each story's plan
+MANDATORY_TASKS = [
+    {
+        "title": "Project Documentation",
+        "description": "Create README.md, IMPLEMENTATION_GUIDE.md, and HOW_TO_RUN.md.",
+        "assignee": "Backend",
+        "effort": "Low"
+    },
+    {
+        "title": "UI Visualizations",
+        "description": "Create UI_SCREENSHOTS.html (a static HTML file simulating screenshots of key views).",
+        "assignee": "Frontend",
+        "effort": "Low"
+    }
+]
+# A cluster task is a copy of a mandatory task when its title names nothing
+# but these (e.g. "Create README.md and HOW_TO_RUN.md"); tasks that merely
+# mention the files, like "Implement auth API and document it in README.md",
+# are kept
+_MANDATORY_FILES = re.compile(r"README\.md|IMPLEMENTATION_GUIDE\.md|HOW_TO_RUN\.md|UI_SCREENSHOTS\.html", re.IGNORECASE)
+_MANDATORY_FILLER = re.compile(
+    r"\b(project documentation|documentation|docs|ui visualizations?|create|write|add|generate|and|the)\b|[\s,&/+()\-:]",
+    re.IGNORECASE
+)
+
+
+def _is_mandatory_task(task: Dict[str, Any]) -> bool:
+    title = " ".join(str(task.get("title", "")).split())
+    if title.lower() in {"project documentation", "ui visualization", "ui visualizations"}:
+        return True
+    without_files = _MANDATORY_FILES.sub("", title)
+    return without_files != title and not _MANDATORY_FILLER.sub("", without_files)
+
+class EngineeringManagerAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
 
-class EngineeringManagerAgent:
     def __init__(self):
-        self.name = "engineering_manager"
-        self.description = "Creates sprint plans and assigns tasks."
-        self.instruction = """
+        super().__init__(
+            name="engineering_manager",
+            description="Creates sprint plans and assigns tasks.",
+            instruction="""
             You are the Engineering Manager for SparkToShip AI.
             Your goal is to create a sprint plan based on user stories and architecture.
             You should:
@@ -22,10 +61,31 @@ class EngineeringManagerAgent:
             
             Output strictly in JSON format.
             """
-        self._runner = None
-        self._current_api_key = None
+        )
+
+    async def create_sprint_plan(
+        self,
+        user_stories: list,
+        architecture: Dict[str, Any],
+        session_id: str,
+        model_config: ModelConfig,
+        planning_mode: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Create a sprint plan ({"sprint_plan": [task, ...]}) for the user stories.
+
+        Args:
+            planning_mode: "single" plans everything in one model call,
+                "map_reduce" plans story clusters concurrently and merges them
+                locally, "auto" (default: settings.SPRINT_PLANNING_MODE) uses
+                map-reduce from SPRINT_PLANNING_MAP_REDUCE_MIN_STORIES stories
+        """
+        mode = planning_mode or settings.SPRINT_PLANNING_MODE
+        if mode == "auto":
+            mode = "map_reduce" if len(user_stories) >= settings.SPRINT_PLANNING_MAP_REDUCE_MIN_STORIES else "single"
+        if mode == "map_reduce" and user_stories:
+            return await self._create_sprint_plan_map_reduce(user_stories, architecture, session_id, model_config)
 
-    async def create_sprint_plan(self, user_stories: list, architecture: Dict[str, Any], session_id: str, model_config: ModelConfig) -> Dict[str, Any]:
         prompt = f"""
         Create a Sprint Plan.
         User Stories: {json.dumps(user_stories)}
@@ -50,41 +110,142 @@ class EngineeringManagerAgent:
         }}
         """
         
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
+        from app.utils.adk_helper import parse_json_response
         
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
+        response = await self._run_prompt(prompt, session_id, model_config)
+        # Use robust JSON parsing
+        return parse_json_response(response)
+
+    async def _plan_story_cluster(
+        self,
+        stories: List[Dict[str, Any]],
+        architecture: Dict[str, Any],
+        session_id: str,
+        model_config: ModelConfig
+    ) -> Dict[str, Any]:
+        prompt = f"""
+        Create the Sprint Plan tasks for the following user stories only.
+        User Stories: {json.dumps(stories)}
+        Architecture: {json.dumps(architecture)}
         
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
+        Other stories are planned separately, so only cover these stories.
+        Do NOT add project documentation (README.md, IMPLEMENTATION_GUIDE.md,
+        HOW_TO_RUN.md) or UI_SCREENSHOTS.html tasks; they are added to the
+        sprint separately.
+        
+        Output strictly in JSON format with the following structure:
+        {{
+            "sprint_plan": [
+                {{
+                    "task_id": "TASK-001",
+                    "title": "Task Title",
+                    "description": "Task Description",
+                    "assignee": "Frontend|Backend|DevOps",
+                    "story_id": "<id of the story the task belongs to>",
+                    "effort": "High|Medium|Low"
+                }}
+            ]
+        }}
+        """
         
-        message = Content(parts=[Part(text=prompt)])
+        from app.utils.adk_helper import parse_json_response, stream_to
         
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
-        # Use robust JSON parsing
+        # Concurrent story plans would interleave on a client's token stream,
+        # so only the merged plan is returned to a streaming client
+        with stream_to(None):
+            response = await self._run_prompt(prompt, session_id, model_config)
         return parse_json_response(response)
 
+    async def _create_sprint_plan_map_reduce(
+        self,
+        user_stories: list,
+        architecture: Dict[str, Any],
+        session_id: str,
+        model_config: ModelConfig
+    ) -> Dict[str, Any]:
+        """Plan story clusters concurrently, then merge them into one sprint plan."""
+        size = max(1, settings.SPRINT_PLANNING_STORIES_PER_CALL)
+        clusters = [user_stories[i:i + size] for i in range(0, len(user_stories), size)]
+        logger.info(f"[{self.name}] Planning {len(user_stories)} stories in {len(clusters)} concurrent calls")
+        
+        async def plan(cluster: list) -> Dict[str, Any]:
+            result = await self._plan_story_cluster(cluster, architecture, session_id, model_config)
+            if not _valid_plan(result):
+                # One retry for a malformed or failed plan before giving up
+                result = await self._plan_story_cluster(cluster, architecture, session_id, model_config)
+            return result
+        
+        results = await asyncio.gather(*(plan(cluster) for cluster in clusters))
+        
+        failed = [(cluster, result) for cluster, result in zip(clusters, results) if not _valid_plan(result)]
+        if failed:
+            story_ids = [_story_id(story, user_stories) for cluster, _ in failed for story in cluster]
+            result = failed[0][1]
+            return {
+                "error": f"Sprint planning failed for stories: {', '.join(story_ids)}",
+                "raw_output": result.get("raw_output", "") if isinstance(result, dict) else str(result)
+            }
+        
+        return merge_sprint_plans(
+            [(cluster, result["sprint_plan"]) for cluster, result in zip(clusters, results)],
+            user_stories
+        )
+
+
+def _valid_plan(result: Any) -> bool:
+    return isinstance(result, dict) and "error" not in result and isinstance(result.get("sprint_plan"), list)
+
+
+def _story_id(story: Any, user_stories: list) -> str:
+    if isinstance(story, dict) and (story.get("id") or story.get("story_id")):
+        return str(story.get("id") or story.get("story_id"))
+    return f"STORY-{user_stories.index(story) + 1:03d}"
+
+
+def merge_sprint_plans(partial_plans: List[tuple], user_stories: list) -> Dict[str, Any]:
+    """
+    Merge per-story-cluster plans into one sprint plan.
+
+    Tasks keep story order. Ids are reassigned as globally unique TASK-###,
+    tasks naming a story outside their cluster are pinned to the cluster's
+    story (matched by title, else its first), duplicates and per-cluster
+    documentation/UI tasks are dropped, and the mandatory tasks are appended
+    once.
+
+    Args:
+        partial_plans: (stories, tasks) for each cluster, in story order
+        user_stories: All user stories
+
+    Returns:
+        {"sprint_plan": [...]}, the same shape as a single-call plan
+    """
+    merged = []
+    seen = set()
+    for stories, tasks in partial_plans:
+        cluster_ids = [_story_id(story, user_stories) for story in stories]
+        for task in tasks:
+            if not isinstance(task, dict):
+                continue
+            if _is_mandatory_task(task):
+                continue
+            
+            task = dict(task)
+            if task.get("story_id") not in cluster_ids:
+                # Models sometimes answer with the story title instead of its id
+                by_title = {
+                    str(story.get("title", "")).strip().lower(): story_id
+                    for story, story_id in zip(stories, cluster_ids) if isinstance(story, dict)
+                }
+                task["story_id"] = by_title.get(str(task.get("story_id", "")).strip().lower(), cluster_ids[0])
+            title = " ".join(str(task.get("title", "")).lower().split())
+            if title:
+                if (task.get("story_id"), title) in seen:
+                    continue
+                seen.add((task.get("story_id"), title))
+            merged.append(task)
+    
+    merged.extend(dict(task, story_id=None) for task in MANDATORY_TASKS)
+    for number, task in enumerate(merged, start=1):
+        task["task_id"] = f"TASK-{number:03d}"
+    
+    return {"sprint_plan": merged}
@@ -1,63 +1,257 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
+from app.core.config import settings
 from app.core.model_config import ModelConfig
-from typing import Dict, Any
+from app.utils.prompt_builder import estimate_tokens, pretty_json
+from typing import Dict, Any, List, Tuple
+import asyncio
+import hashlib
 import json
-import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+REVIEW_FORMAT = """
+        Output strictly in JSON format with the following structure:
+        {
+            "findings": [
+                {
+                    "file": "path/of/the/file",
+                    "line": 42,
+                    "severity": "critical|high|medium|low",
+                    "category": "bug|security|style|performance",
+                    "issue": "What is wrong",
+                    "suggestion": "How to fix it"
+                }
+            ]
+        }
+        Return an empty findings list for files without issues.
+"""
+
+
+class QAAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
 
-class QAAgent:
     def __init__(self):
-        self.name = "qa_agent"
-        self.description = "Reviews code and suggests fixes."
-        self.instruction = """
+        super().__init__(
+            name="qa_agent",
+            description="Reviews code and suggests fixes.",
+            instruction="""
             You are the QA Agent for SparkToShip AI.
             Your goal is to review code for bugs, security issues, and style violations.
             
             Output strictly in JSON format.
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def review_code(self, code_files: Dict[str, Any], session_id: str, model_config: ModelConfig) -> Dict[str, Any]:
-        prompt = f"Review the following code files: {json.dumps(code_files)}"
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
-        
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
+        """
+        Review code files in token-budgeted shards that run concurrently.
+
+        Files are packed into shards of about QA_REVIEW_SHARD_TOKENS; each
+        shard is one model call and the findings are merged into one report.
+        Per-file findings are cached by content hash, so re-reviewing a
+        project only sends the files that changed. A failed shard is listed
+        under "failed_shards" instead of discarding the rest of the review.
+
+        Returns:
+            {"findings": [...], "summary": {...}, "failed_shards": [...]},
+            or an error dict if every shard failed
+        """
+        if not code_files:
+            return merge_reviews({}, [], [], files_reviewed=0)
+
+        # Cache lookups and writes touch one file per reviewed file: keep them off the event loop
+        cached, pending = await asyncio.to_thread(self._cached_findings, code_files, model_config)
+        shards = shard_files({path: code_files[path] for path in pending}, settings.QA_REVIEW_SHARD_TOKENS, model_config.model_name)
+        if shards:
+            logger.info(
+                f"[{self.name}] Reviewing {len(pending)} files in {len(shards)} shards "
+                f"({len(cached)} files cached)"
             )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
-        
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
-        # Use robust JSON parsing
+
+        results = await asyncio.gather(
+            *(self._review_shard(shard, session_id, model_config) for shard in shards),
+            return_exceptions=True
+        )
+
+        findings: Dict[str, List[Dict[str, Any]]] = dict(cached)
+        general: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                logger.error(f"[{self.name}] Review shard {list(shard)} failed: {result}")
+                failed.append({"files": sorted(shard), "error": str(result), "exception": result})
+                continue
+            if not isinstance(result, dict) or "error" in result or not isinstance(result.get("findings"), list):
+                error = result.get("error") if isinstance(result, dict) else None
+                failed.append({"files": sorted(shard), "error": error or "Review output had no findings list"})
+                continue
+
+            shard_findings = {path: [] for path in shard}
+            for finding in result["findings"]:
+                if not isinstance(finding, dict):
+                    continue
+                path = finding.get("file")
+                if path not in shard_findings and len(shard) == 1:
+                    path = next(iter(shard))
+                if path in shard_findings:
+                    shard_findings[path].append({**finding, "file": path})
+                else:
+                    general.append(finding)
+            findings.update(shard_findings)
+            await asyncio.to_thread(self._cache_findings, shard, shard_findings, model_config)
+
+        if shards and len(failed) == len(shards) and not cached:
+            # Nothing was reviewed: surface the failure like a single-call review would
+            exception = failed[0].get("exception")
+            if exception is not None:
+                raise exception
+            return {"error": f"Code review failed: {failed[0]['error']}", "raw_output": ""}
+
+        return merge_reviews(
+            findings,
+            general,
+            [{"files": f["files"], "error": f["error"]} for f in failed],
+            files_reviewed=len(code_files) - sum(len(f["files"]) for f in failed),
+            cached_files=len(cached),
+            shards=len(shards)
+        )
+
+    async def _review_shard(self, shard: Dict[str, Any], session_id: str, model_config: ModelConfig) -> Dict[str, Any]:
+        from app.utils.adk_helper import parse_json_response, stream_to
+
+        prompt = (
+            self._prompt_builder(model_config)
+            .add_code_files("Review the following code files:", shard)
+            .add_text(REVIEW_FORMAT, name="format")
+            .build()
+        )
+
+        # Concurrent shards would interleave on a client's token stream, so
+        # only the merged review is returned to a streaming client
+        with stream_to(None):
+            response = await self._run_prompt(prompt, session_id, model_config)
         return parse_json_response(response)
 
+    def _file_cache_key(self, path: str, content: Any, model_config: ModelConfig) -> str:
+        from app.services.response_cache import response_cache
+
+        if not isinstance(content, str):
+            content = pretty_json(content)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return response_cache.make_key(
+            self.instruction + REVIEW_FORMAT,
+            f"qa-file-review\n{path}\n{digest}",
+            model_config.provider,
+            model_config.model_name,
+            model_config.temperature
+        )
+
+    def _cached_findings(
+        self,
+        code_files: Dict[str, Any],
+        model_config: ModelConfig
+    ) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+        """Split files into (path -> cached findings, paths still to review)."""
+        from app.services.response_cache import response_cache
+
+        if not model_config.use_cache:
+            return {}, list(code_files)
+        cached, pending = {}, []
+        for path, content in code_files.items():
+            hit = response_cache.get(self._file_cache_key(path, content, model_config))
+            if hit is None:
+                pending.append(path)
+            else:
+                cached[path] = json.loads(hit)
+        return cached, pending
+
+    def _cache_findings(self, shard: Dict[str, Any], findings: Dict[str, List[Dict[str, Any]]], model_config: ModelConfig):
+        from app.services.response_cache import response_cache
+
+        if not model_config.use_cache:
+            return
+        for path, file_findings in findings.items():
+            response_cache.set(
+                self._file_cache_key(path, shard[path], model_config),
+                json.dumps(file_findings, ensure_ascii=False),
+                {"agent": self.name, "model": model_config.model_name, "file": path}
+            )
+
+
+def shard_files(code_files: Dict[str, Any], shard_tokens: int, model_name: str = "") -> List[Dict[str, Any]]:
+    """
+    Pack files into shards of at most shard_tokens estimated tokens.
+
+    Files are taken in path order so neighbouring files (same package) tend
+    to share a shard; a file larger than the budget gets a shard of its own
+    and is trimmed by the prompt builder.
+    """
+    shards: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {}
+    current_tokens = 0
+    for path in sorted(code_files):
+        content = code_files[path]
+        tokens = estimate_tokens(content if isinstance(content, str) else pretty_json(content), model_name)
+        if current and current_tokens + tokens > shard_tokens:
+            shards.append(current)
+            current, current_tokens = {}, 0
+        current[path] = content
+        current_tokens += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def merge_reviews(
+    findings: Dict[str, List[Dict[str, Any]]],
+    general: List[Dict[str, Any]],
+    failed_shards: List[Dict[str, Any]],
+    files_reviewed: int,
+    cached_files: int = 0,
+    shards: int = 0
+) -> Dict[str, Any]:
+    """
+    Merge per-file findings into one report.
+
+    Duplicate findings (same file, line and issue) are kept once; findings
+    are ordered by severity, then file and line.
+    """
+    merged = []
+    seen = set()
+    for finding in [f for path in sorted(findings) for f in findings[path]] + general:
+        key = (
+            finding.get("file"),
+            finding.get("line"),
+            " ".join(str(finding.get("issue", "")).lower().split())
+        )
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(finding)
+
+    merged.sort(key=lambda f: (
+        SEVERITY_ORDER.get(str(f.get("severity", "")).lower(), len(SEVERITY_ORDER)),
+        str(f.get("file") or ""),
+        f.get("line") if isinstance(f.get("line"), int) else 0
+    ))
+
+    by_severity: Dict[str, int] = {}
+    for finding in merged:
+        severity = str(finding.get("severity", "unknown")).lower()
+        by_severity[severity] = by_severity.get(severity, 0) + 1
+
+    return {
+        "findings": merged,
+        "summary": {
+            "files_reviewed": files_reviewed,
+            "total_findings": len(merged),
+            "by_severity": by_severity,
+            "shards": shards,
+            "cached_files": cached_files
+        },
+        "failed_shards": failed_shards
+    }
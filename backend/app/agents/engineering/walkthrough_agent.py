@@ -1,18 +1,17 @@
-from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from google.genai.types import Content, Part
-from app.core.services import session_service
+from app.core.base_agent import BaseAgent
 from app.core.model_config import ModelConfig
 from typing import Dict, Any, List
 import json
-import os
 
-class WalkthroughAgent:
+class WalkthroughAgent(BaseAgent):
+    # Each call gets its full context in the prompt, so no history is kept
+    conversation_scope = "stateless"
+
     def __init__(self):
-        self.name = "walkthrough_agent"
-        self.description = "Generates comprehensive code walkthroughs in text, image, or video format."
-        self.instruction = """
+        super().__init__(
+            name="walkthrough_agent",
+            description="Generates comprehensive code walkthroughs in text, image, or video format.",
+            instruction="""
             You are the Code Walkthrough Agent for SparkToShip AI.
             Your goal is to create comprehensive, easy-to-understand walkthroughs of generated code.
             
@@ -134,8 +133,7 @@ class WalkthroughAgent:
                 "difficulty_level": "Beginner|Intermediate|Advanced"
             }
             """
-        self._runner = None
-        self._current_api_key = None
+        )
 
     async def generate_walkthrough(
         self,
@@ -222,40 +220,8 @@ class WalkthroughAgent:
         Format: {walkthrough_type.upper()}
         """
         
-        from app.utils.adk_helper import collect_response, parse_json_response
-        from app.utils.security import validate_api_key
-        
-        # Validate API key BEFORE using it
-        is_valid, error_msg = validate_api_key(model_config.api_key)
-        if not is_valid:
-            raise ValueError(error_msg)
-        
-        # Create or update runner with user's API key and model
-        if self._runner is None or self._current_api_key != model_config.api_key:
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            model = Gemini(
-                model=model_config.model_name,
-                temperature=model_config.temperature
-            )
-            
-            agent = Agent(
-                name=self.name,
-                model=model,
-                description=self.description,
-                instruction=self.instruction
-            )
-            
-            app = App(name="spark_to_ship", root_agent=agent)
-            self._runner = Runner(app=app, session_service=session_service)
-            self._current_api_key = model_config.api_key
-        
-        message = Content(parts=[Part(text=prompt)])
+        from app.utils.adk_helper import parse_json_response
         
-        response = await collect_response(self._runner.run_async(
-            user_id="user",
-            session_id=session_id,
-            new_message=message
-        ))
+        response = await self._run_prompt(prompt, session_id, model_config)
         
         return parse_json_response(response)
@@ -3,23 +3,40 @@ Base agent class that supports dynamic model configuration.
 All agents should inherit from this to use user-provided API keys.
 """
 from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from app.core.services import session_service
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai.types import Content, Part
+from app.core.services import USER_ID, build_app, discard_session, ensure_session, session_service
 from app.core.model_config import ModelConfig
 from app.core.model_factory import ModelFactory
-import os
-from typing import Optional
+from app.core.runner_pool import runner_pool
+from app.core.concurrency_limiter import concurrency_limiter
+from app.core.retry_scheduler import retry_scheduler
+from app.core.config import settings
+from app.utils.prompt_builder import DEFAULT_OUTPUT_RESERVE, PromptBuilder, estimate_tokens, input_token_limit
+from typing import Any, Dict, Optional
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 
 class BaseAgent:
     """Base class for all agents with dynamic model configuration support."""
     
+    # Max prompt tokens for this agent (None uses settings.PROMPT_TOKEN_BUDGET)
+    prompt_token_budget: Optional[int] = None
+    
+    # Which conversation history a call sees (None uses settings.AGENT_CONVERSATION_SCOPE):
+    #   "shared"    - the project's single ADK session, seen by every agent
+    #   "agent"     - a sub-session per (project, agent)
+    #   "stateless" - a fresh session per call, deleted afterwards
+    conversation_scope: Optional[str] = None
+
     def __init__(self, name: str, description: str, instruction: str):
         """
         Initialize base agent without creating model instance.
-        Model will be created dynamically when needed.
-        
+        Runners are built on demand and shared through the process-wide runner pool.
+
         Args:
             name: Agent name
             description: Agent description
@@ -28,68 +45,198 @@ class BaseAgent:
         self.name = name
         self.description = description
         self.instruction = instruction
-        self._model = None
-        self._agent = None
-        self._app = None
-        self._runner = None
-        self._current_api_key = None
-    
+
     def _get_or_create_runner(self, model_config: ModelConfig) -> Runner:
         """
-        Get or create runner with the given model configuration.
-        Recreates runner if API key has changed.
-        
+        Get the pooled runner for this agent and model configuration.
+        A new runner is only built the first time a (model, temperature, key)
+        combination is seen, or after it has been evicted from the pool.
+
         Args:
             model_config: Model configuration with API key
-            
+
         Returns:
             Runner instance
-            
+
         Raises:
             ValueError: If API key is invalid or missing
         """
         from app.utils.security import mask_api_key, validate_api_key
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
+
         # Validate API key
         is_valid, error_msg = validate_api_key(model_config.api_key)
         if not is_valid:
             logger.error(f"[{self.name}] {error_msg}")
             raise ValueError(error_msg)
-        
-        # Check if we need to recreate the runner (API key changed)
-        if self._runner is None or self._current_api_key != model_config.api_key:
+
+        def build_runner() -> Runner:
             masked_key = mask_api_key(model_config.api_key)
             logger.info(f"[{self.name}] Using API key: {masked_key} (user-provided)")
-            
-            # Set the API key in environment for Gemini
-            os.environ["GOOGLE_API_KEY"] = model_config.api_key
-            
-            # Create new model instance
-            self._model = ModelFactory.create_model(
+
+            model = ModelFactory.create_model(
                 provider=model_config.provider,
                 model_name=model_config.model_name,
                 api_key=model_config.api_key,
                 temperature=model_config.temperature,
                 max_tokens=model_config.max_tokens
             )
-            
-            # Create new agent
-            self._agent = Agent(
+
+            agent = Agent(
                 name=self.name,
-                model=self._model,
+                model=model,
                 description=self.description,
-                instruction=self.instruction
+                instruction=self.instruction,
+                generate_content_config=ModelFactory.create_generate_config(
+                    model_config.temperature,
+                    model_config.max_tokens
+                )
+            )
+
+            app = build_app(agent)
+            return Runner(app=app, session_service=session_service)
+
+        key = runner_pool.make_key(
+            self.name,
+            model_config.provider,
+            model_config.model_name,
+            model_config.temperature,
+            model_config.api_key,
+            model_config.max_tokens
+        )
+        return runner_pool.get_or_create(key, build_runner)
+
+    def _prompt_builder(self, model_config: ModelConfig) -> PromptBuilder:
+        """
+        Create a PromptBuilder sized for this agent and model.
+
+        The budget is the agent's own limit, capped by the model's context
+        window minus room for the response and the agent instruction.
+        """
+        model_limit = (
+            input_token_limit(model_config.model_name)
+            - (model_config.max_tokens or DEFAULT_OUTPUT_RESERVE)
+            - estimate_tokens(self.instruction, model_config.model_name)
+        )
+        budget = min(self.prompt_token_budget or settings.PROMPT_TOKEN_BUDGET, model_limit)
+        return PromptBuilder(budget, model_config.model_name, name=self.name)
+
+    def _conversation_id(self, session_id: str) -> str:
+        """ADK session id for a call on behalf of the given project session."""
+        scope = self.conversation_scope or settings.AGENT_CONVERSATION_SCOPE
+        if scope == "shared":
+            return session_id
+        if scope == "stateless":
+            return f"{session_id}:{self.name}:{uuid.uuid4().hex}"
+        return f"{session_id}:{self.name}"
+
+    async def _run_prompt(
+        self,
+        prompt: str,
+        session_id: str,
+        model_config: ModelConfig,
+        cacheable: bool = False
+    ) -> str:
+        """
+        Send a prompt to this agent and return the full text response.
+
+        When a stream sink is active (see adk_helper.stream_to), the model is
+        called in SSE streaming mode and text chunks are forwarded to the sink
+        as they arrive; the return value is the same either way.
+
+        Args:
+            prompt: User prompt text
+            session_id: Project session identifier (scoped per conversation_scope)
+            model_config: Model configuration with API key
+            cacheable: Serve/store the response through the response cache
+                (only for deterministic steps; skipped if model_config.use_cache is False)
+
+        Returns:
+            Concatenated response text
+        """
+        from app.utils.adk_helper import (
+            collect_response, continuation_prompt, get_stream_sink, is_truncated,
+            parse_json_response, stitch_continuation
+        )
+
+        runner = self._get_or_create_runner(model_config)
+
+        cache_key = None
+        if cacheable and model_config.use_cache:
+            from app.services.response_cache import response_cache
+
+            cache_key = response_cache.make_key(
+                self.instruction,
+                prompt,
+                model_config.provider,
+                model_config.model_name,
+                model_config.temperature
             )
-            
-            # Create new app and runner
-            self._app = App(name="spark_to_ship", root_agent=self._agent)
-            self._runner = Runner(app=self._app, session_service=session_service)
-            
-            # Remember current API key
-            self._current_api_key = model_config.api_key
-            logger.info(f"[{self.name}] Runner created successfully with model: {model_config.model_name}")
-        
-        return self._runner
+            cached = await response_cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"[{self.name}] Response cache hit")
+                sink = get_stream_sink()
+                if sink is not None:
+                    sink.put_nowait(cached)
+                return cached
+
+        # Everything an agent needs is in the prompt, so each call only carries
+        # its own scope's history plus which project it belongs to
+        conversation_id = self._conversation_id(session_id)
+        stateless = (self.conversation_scope or settings.AGENT_CONVERSATION_SCOPE) == "stateless"
+        await ensure_session(
+            conversation_id,
+            state={"project_session_id": session_id, "agent": self.name},
+            remember=not stateless
+        )
+        message = Content(parts=[Part(text=prompt)])
+
+        run_config = None
+        if get_stream_sink() is not None:
+            run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+        async def call_model(message: Content, meta: Dict[str, Any]) -> str:
+            # Each attempt holds a slot in the model's adaptive concurrency window
+            async with concurrency_limiter.slot(model_config.provider, model_config.model_name):
+                return await collect_response(runner.run_async(
+                    user_id=USER_ID,
+                    session_id=conversation_id,
+                    new_message=message,
+                    run_config=run_config
+                ), meta)
+
+        # Rate-limited calls are parked and retried server-side on the quota
+        # bucket's shared timer instead of failing back to the client
+        bucket = retry_scheduler.make_key(model_config.provider, model_config.model_name, model_config.api_key)
+        try:
+            meta: Dict[str, Any] = {}
+            response = await retry_scheduler.call(bucket, lambda: call_model(message, meta))
+
+            # A response cut off at the output limit is finished by follow-up
+            # turns in the same conversation instead of being regenerated
+            continuations = 0
+            while continuations < settings.MAX_CONTINUATIONS and is_truncated(response, meta.get("finish_reason")):
+                continuations += 1
+                logger.warning(
+                    f"[{self.name}] Response truncated after {len(response)} chars "
+                    f"(finish reason: {meta.get('finish_reason')}); continuing ({continuations}/{settings.MAX_CONTINUATIONS})"
+                )
+                follow_up = Content(parts=[Part(text=continuation_prompt(response))])
+                meta = {}
+                piece = await retry_scheduler.call(bucket, lambda: call_model(follow_up, meta))
+                parsed_piece = parse_json_response(piece)
+                if isinstance(parsed_piece, dict) and "error" in parsed_piece and "raw_output" not in parsed_piece:
+                    # collect_response failed: keep what we have
+                    logger.error(f"[{self.name}] Continuation failed: {parsed_piece['error']}")
+                    break
+                response = stitch_continuation(response, piece)
+        finally:
+            if stateless:
+                await discard_session(conversation_id)
+
+        if cache_key is not None:
+            # Never cache failures: they should be retried, not replayed
+            parsed = parse_json_response(response)
+            if not (isinstance(parsed, dict) and "error" in parsed):
+                await response_cache.aset(cache_key, response, {"agent": self.name, "model": model_config.model_name})
+
+        return response
@@ -0,0 +1,209 @@
+"""
+Adaptive concurrency limits for model calls.
+
+Each (provider, model) gets an AIMD window on in-flight calls: while calls
+complete at a healthy latency and the window is in use, it grows by about one
+call per window's worth of completions; a rate limit (429 RESOURCE_EXHAUSTED)
+or a latency spike shrinks it multiplicatively. Calls beyond the window queue
+in FIFO order, so concurrent sprint tasks saturate the quota without
+repeatedly tripping it.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.error_handler import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+LimiterKey = Tuple[str, str]
+
+# Weight of each new sample in the latency baseline (EWMA)
+LATENCY_ALPHA = 0.1
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window for one (provider, model)."""
+
+    def __init__(
+        self,
+        key: LimiterKey,
+        initial: float = 4,
+        min_window: float = 1,
+        max_window: float = 32,
+        backoff: float = 0.5,
+        latency_tolerance: float = 3.0
+    ):
+        self.key = key
+        self.window = float(min(max(initial, min_window), max_window))
+        self.min_window = float(min_window)
+        self.max_window = float(max_window)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency_baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self.calls = 0
+        self.increases = 0
+        self.decreases = 0
+        self.queued_total = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _limit(self) -> int:
+        return max(1, int(self.window))
+
+    async def acquire(self) -> float:
+        """Wait for a slot in the window; returns the seconds spent queued."""
+        if self.in_flight < self._limit() and not self._waiters:
+            self.in_flight += 1
+            return 0.0
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_total += 1
+        started = time.monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            raise
+        waited = time.monotonic() - started
+        self.wait_seconds_total += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self._limit():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _decrease(self, reason: str, latency: float = 0.0):
+        # One decrease per round trip: the calls already in flight when the
+        # provider pushed back carry the same signal and shouldn't compound it
+        now = time.monotonic()
+        if now - self._last_decrease < max(latency, self._latency_baseline or 0.0, 1.0):
+            return
+        self._last_decrease = now
+        previous = self.window
+        self.window = max(self.min_window, self.window * self.backoff)
+        self.decreases += 1
+        logger.warning(
+            f"[ConcurrencyLimiter] {self.key[0]}/{self.key[1]} window {previous:.1f} -> {self.window:.1f} ({reason})"
+        )
+
+    def on_success(self, latency: float):
+        self.calls += 1
+        baseline = self._latency_baseline
+        if baseline is not None and latency > baseline * self.latency_tolerance:
+            self._decrease(f"latency {latency:.1f}s vs baseline {baseline:.1f}s", latency)
+        elif self.in_flight >= self._limit() and self.window < self.max_window:
+            # Only grow when the window is actually the bottleneck
+            self.window = min(self.max_window, self.window + 1.0 / self.window)
+            self.increases += 1
+            self._wake()
+
+        if baseline is None:
+            self._latency_baseline = latency
+        else:
+            self._latency_baseline = baseline + LATENCY_ALPHA * (latency - baseline)
+
+    def on_overload(self):
+        self.calls += 1
+        self._decrease("rate limited")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window": round(self.window, 2),
+            "limit": self._limit(),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "latency_baseline_seconds": round(self._latency_baseline, 2) if self._latency_baseline is not None else None,
+            "calls": self.calls,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "queued_total": self.queued_total,
+            "avg_wait_seconds": round(self.wait_seconds_total / self.queued_total, 3) if self.queued_total else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+
+class ConcurrencyLimiter:
+    """Registry of adaptive limiters keyed by (provider, model)."""
+
+    def __init__(self, defaults: Dict[str, float], overrides: Optional[Dict[str, Dict[str, float]]] = None):
+        self.defaults = defaults
+        self.overrides = overrides or {}
+        self._limiters: Dict[LimiterKey, AdaptiveLimiter] = {}
+
+    def _params(self, provider: str, model_name: str) -> Dict[str, float]:
+        """Defaults, overridden by "<model>" then "<provider>/<model>" entries."""
+        params = dict(self.defaults)
+        params.update(self.overrides.get(model_name, {}))
+        params.update(self.overrides.get(f"{provider}/{model_name}", {}))
+        return params
+
+    def get(self, provider: str, model_name: str) -> AdaptiveLimiter:
+        key = (provider, model_name)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(key, **self._params(provider, model_name))
+            self._limiters[key] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, provider: str, model_name: str):
+        """
+        Hold one in-flight slot for a model call.
+
+        The call's latency feeds the window on success; a rate limit error
+        shrinks it. Other errors only release the slot.
+        """
+        limiter = self.get(provider, model_name)
+        await limiter.acquire()
+        started = time.monotonic()
+        try:
+            yield limiter
+        except Exception as e:
+            if is_rate_limit_error(str(e)):
+                limiter.on_overload()
+            raise
+        else:
+            limiter.on_success(time.monotonic() - started)
+        finally:
+            limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            f"{provider}/{model_name}": limiter.stats()
+            for (provider, model_name), limiter in self._limiters.items()
+        }
+
+
+# Global Concurrency Limiter Instance
+concurrency_limiter = ConcurrencyLimiter(
+    defaults={
+        "initial": settings.MODEL_CONCURRENCY_INITIAL,
+        "min_window": settings.MODEL_CONCURRENCY_MIN,
+        "max_window": settings.MODEL_CONCURRENCY_MAX,
+        "backoff": settings.MODEL_CONCURRENCY_BACKOFF,
+        "latency_tolerance": settings.MODEL_CONCURRENCY_LATENCY_TOLERANCE,
+    },
+    overrides=settings.MODEL_CONCURRENCY_OVERRIDES
+)
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 class Settings(BaseSettings):
@@ -9,6 +9,49 @@ class Settings(BaseSettings):
     # This prevents accidentally using the developer's API key
     MODEL_NAME: str = "gemini-2.0-flash-exp"
     PROJECT_NAME: str = "SparkToShip AI"
+    SPRINT_MAX_WORKERS: int = 4  # Concurrent tasks in a server-side sprint run
+    RUNNER_POOL_SIZE: int = 64  # Max pooled ADK runners before LRU eviction
+    RESPONSE_CACHE_DIR: str = "data/cache/responses"
+    RESPONSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    RESPONSE_CACHE_MAX_MB: int = 256
+    EXPORT_CACHE_ENABLED: bool = True  # Keep built project ZIPs keyed by content hash
+    EXPORT_CACHE_DIR: str = "data/cache/exports"
+    EXPORT_CACHE_MAX_MB: int = 512
+    SESSION_DB_PATH: str = "data/sessions.db"  # ADK session store; empty keeps sessions in memory
+    MAX_ACTIVE_SESSIONS: int = 256  # Project sessions kept in memory (LRU)
+    SESSION_IDLE_TTL_SECONDS: int = 3600  # Idle sessions are dropped and reloaded on demand
+    SESSION_EVENT_BUFFER_SIZE: int = 1000  # Events (logs, task statuses, ...) kept per session
+    AGENT_CONVERSATION_SCOPE: str = "agent"  # shared | agent | stateless (agents may override)
+    AGENT_HISTORY_COMPACTION_INTERVAL: int = 0  # Summarize agent history every N invocations (0 = off)
+    AGENT_HISTORY_COMPACTION_OVERLAP: int = 1  # Invocations kept verbatim across a compaction
+    RATE_LIMIT_MAX_RETRIES: int = 3  # Server-side retries of a rate-limited model call
+    RATE_LIMIT_MAX_WAIT_SECONDS: int = 120  # Longer provider waits are reported to the client instead
+    MODEL_CONCURRENCY_INITIAL: int = 4  # Starting in-flight model calls per (provider, model)
+    MODEL_CONCURRENCY_MIN: int = 1
+    MODEL_CONCURRENCY_MAX: int = 32
+    MODEL_CONCURRENCY_BACKOFF: float = 0.5  # Window multiplier on a rate limit or latency spike
+    MODEL_CONCURRENCY_LATENCY_TOLERANCE: float = 3.0  # Spike = latency above this multiple of the baseline
+    # Per-model tuning, keyed by "<model>" or "<provider>/<model>", e.g.
+    # {"google/gemini-2.5-pro": {"initial": 2, "max_window": 8}}
+    MODEL_CONCURRENCY_OVERRIDES: Dict[str, Dict[str, float]] = {}
+    SPRINT_PLANNING_MODE: str = "auto"  # single | map_reduce | auto (map-reduce for larger story sets)
+    SPRINT_PLANNING_MAP_REDUCE_MIN_STORIES: int = 4  # auto mode plans in one call below this
+    SPRINT_PLANNING_STORIES_PER_CALL: int = 2  # Stories per concurrent planning call
+    SPRINT_JOURNAL_COMMIT_INTERVAL: float = 0.05  # Seconds of journal appends grouped into one fsync
+    JOB_DEFAULT_DEADLINE_SECONDS: int = 600  # Background agent jobs are aborted after this long
+    JOB_MAX_DEADLINE_SECONDS: int = 3600  # Upper bound for a client-requested deadline
+    MAX_JOBS_IN_MEMORY: int = 1000  # Finished jobs beyond this are served from project storage
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600  # How long results are replayed for an Idempotency-Key
+    IDEMPOTENCY_MAX_RESULTS: int = 1000
+    PROMPT_TOKEN_BUDGET: int = 200_000  # Default max estimated prompt tokens per agent call
+    STATIC_ANALYSIS_WORKERS: int = 2  # Processes for the local lint pass (0 = run it in a thread)
+    STATIC_ANALYSIS_CACHE_ENTRIES: int = 5000  # Local check results kept by file content hash
+    SAVE_REPAIR_MAX_ATTEMPTS: int = 2  # Debugger rounds for generated files that don't parse (0 = report only)
+    QA_REVIEW_SHARD_TOKENS: int = 12_000  # Estimated code tokens per concurrent review call
+    ARTIFACT_CACHE_MAX_MB: int = 64  # Parsed step outputs / code files resolved from references
+    SNAPSHOT_CACHE_ENTRIES: int = 64  # Encoded project snapshots kept for repeated restores
+    PROJECT_DOCUMENT_CACHE_ENTRIES: int = 1000  # Metadata/status/manifest/job documents kept in memory (unsaved ones are never dropped)
+    MAX_CONTINUATIONS: int = 2  # Follow-up calls to finish a response cut off at the output limit (0 = off)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,115 @@
+"""
+Per-session event bus.
+
+Each project session keeps its recent events (log lines, task status
+changes, saved artifacts, errors) in a bounded ring buffer. Clients read the
+events after a given id (GET /session/{id}/events?since=) or subscribe over
+SSE, resuming with Last-Event-ID, instead of re-fetching the whole session.
+
+Event ids are integers that only increase, also across restarts (they start
+from the current time in milliseconds), so a client's last id stays
+meaningful after the server comes back.
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+EVENT_TYPES = {"log", "task_status", "artifact_saved", "error"}
+
+
+class SessionEvent(BaseModel):
+    id: int
+    type: str  # log | task_status | artifact_saved | error
+    ts: datetime
+    data: Dict[str, Any] = {}
+
+
+class SessionEventBus:
+    """Bounded ring buffer of session events with live subscribers."""
+
+    def __init__(self, max_events: int = 1000, subscriber_queue_size: int = 1000):
+        self._events: Deque[SessionEvent] = deque(maxlen=max_events)
+        self._next_id = int(time.time() * 1000)
+        self._subscriber_queue_size = subscriber_queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def last_event_id(self) -> int:
+        return self._next_id - 1
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> SessionEvent:
+        """Record an event and push it to live subscribers (call from the event loop thread)."""
+        event = SessionEvent(id=self._next_id, type=event_type, ts=datetime.now(), data=data or {})
+        self._next_id += 1
+        self._events.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A subscriber this far behind is cut off and resumes from the
+                # ring buffer when it reconnects with its Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+        return event
+
+    def since(self, last_id: Optional[int] = None, types: Optional[Set[str]] = None) -> Tuple[List[SessionEvent], bool]:
+        """
+        Get buffered events newer than last_id.
+
+        Returns:
+            (events, truncated) - truncated is True when events after last_id
+            have already been dropped from the buffer, so the client should
+            re-fetch full state
+        """
+        last_id = last_id or 0
+        if last_id > self.last_event_id:
+            # An id this bus never issued (e.g. from before the session was
+            # evicted and reloaded): everything buffered is new to the client
+            return [e for e in self._events if types is None or e.type in types], True
+        truncated = 0 < last_id < (self._events[0].id - 1 if self._events else 0)
+        events = [e for e in self._events if e.id > last_id and (types is None or e.type in types)]
+        return events, truncated
+
+    def events(self, event_type: str) -> List[SessionEvent]:
+        return [e for e in self._events if e.type == event_type]
+
+    async def subscribe(
+        self,
+        last_id: Optional[int] = None,
+        types: Optional[Set[str]] = None
+    ) -> AsyncIterator[Optional[SessionEvent]]:
+        """
+        Yield buffered events after last_id, then live events as they happen.
+
+        Yields None if the subscriber fell too far behind and was dropped;
+        the caller should end the stream so the client reconnects.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._subscriber_queue_size)
+        self._subscribers.add(queue)
+        try:
+            backlog, _ = self.since(last_id, types)
+            sent = min(last_id or 0, self.last_event_id)
+            for event in backlog:
+                sent = event.id
+                yield event
+            while True:
+                event = await queue.get()
+                if event is None:
+                    yield None
+                    return
+                if event.id <= sent or (types is not None and event.type not in types):
+                    continue
+                sent = event.id
+                yield event
+        finally:
+            self._subscribers.discard(queue)
@@ -0,0 +1,198 @@
+"""
+Background jobs for long agent runs.
+
+Submitting a job starts the agent call in the background and returns a job
+id right away, so the HTTP connection isn't held for the whole generation.
+Clients poll or subscribe to the job's status; records (including results)
+are persisted through ProjectStorage. Cancelling a job, or hitting its
+deadline, cancels the task awaiting the agent, which aborts the model call.
+"""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.services.project_storage import ProjectStorage, project_storage
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = {"succeeded", "failed", "cancelled", "timed_out"}
+
+
+class Job(BaseModel):
+    job_id: str
+    session_id: str
+    agent: str
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled | timed_out
+    deadline_seconds: float
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobManager:
+    """Runs agent calls as background jobs with deadlines and cancellation."""
+
+    def __init__(self, storage: ProjectStorage, max_jobs: int = 1000):
+        self.storage = storage
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def submit(
+        self,
+        session_id: str,
+        agent: str,
+        func: Callable[[], Awaitable[Any]],
+        deadline_seconds: float
+    ) -> Job:
+        """
+        Start func as a background job.
+
+        Args:
+            session_id: Session the job belongs to
+            agent: Agent (endpoint) name, for display
+            func: Coroutine factory running the agent call
+            deadline_seconds: Wall-clock limit after which the job is aborted
+
+        Returns:
+            The queued Job
+        """
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            session_id=session_id,
+            agent=agent,
+            deadline_seconds=deadline_seconds,
+            created_at=datetime.now()
+        )
+        self.jobs[job.job_id] = job
+        self._evict()
+        self._save(job)
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: Job, func: Callable[[], Awaitable[Any]]):
+        self._update(job, status="running", started_at=datetime.now())
+        try:
+            result = await asyncio.wait_for(func(), timeout=job.deadline_seconds)
+        except asyncio.TimeoutError:
+            self._update(job, status="timed_out", status_code=504, error=f"Job exceeded its {job.deadline_seconds:g}s deadline")
+        except asyncio.CancelledError:
+            self._update(job, status="cancelled", error="Job was cancelled")
+        except Exception as e:
+            # HTTPException from the endpoint handler carries the response it would have sent
+            status_code = getattr(e, "status_code", 500)
+            detail = getattr(e, "detail", None) or str(e)
+            if status_code == 500:
+                logger.error(f"Job {job.job_id} ({job.agent}) failed: {e}", exc_info=True)
+            self._update(job, status="failed", status_code=status_code, error=str(detail))
+        else:
+            if isinstance(result, dict) and result.get("error"):
+                self._update(job, status="failed", result=result, error=str(result["error"]))
+            else:
+                self._update(job, status="succeeded", result=result)
+        finally:
+            self._tasks.pop(job.job_id, None)
+
+    def _update(self, job: Job, **changes):
+        for field, value in changes.items():
+            setattr(job, field, value)
+        if job.finished and job.finished_at is None:
+            job.finished_at = datetime.now()
+        self._save(job)
+        for queue in self._subscribers.get(job.job_id, []):
+            queue.put_nowait(job.model_copy())
+
+    def _save(self, job: Job):
+        try:
+            self.storage.save_job(job.session_id, job.model_dump(mode="json"))
+        except Exception as e:
+            logger.error(f"Failed to save job {job.job_id}: {e}")
+
+    def _evict(self):
+        # Finished jobs stay readable from storage after leaving memory
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((jid for jid, j in self.jobs.items() if j.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest]
+
+    def get(self, job_id: str, session_id: Optional[str] = None) -> Optional[Job]:
+        """Get a job from memory, or from the session's saved jobs."""
+        job = self.jobs.get(job_id)
+        if job is not None or session_id is None:
+            return job
+        record = self.storage.load_job(session_id, job_id)
+        if record is None:
+            return None
+        job = Job(**record)
+        if not job.finished:
+            # Saved as queued/running by a process that is no longer around
+            job.status = "failed"
+            job.error = "Job was interrupted by a server restart"
+        return job
+
+    def list_jobs(self, session_id: str) -> List[Job]:
+        """List a session's jobs, newest first."""
+        jobs = {record["job_id"]: self.get(record["job_id"], session_id) for record in self.storage.list_jobs(session_id)}
+        jobs.update({jid: j for jid, j in self.jobs.items() if j.session_id == session_id})
+        return sorted(jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a running job; finished jobs are returned unchanged."""
+        job = self.jobs.get(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+            if job.status == "queued":
+                # Cancelled before it started, so _run never gets to record it
+                self._update(job, status="cancelled", error="Job was cancelled")
+        return job
+
+    async def wait(self, job_id: str) -> Optional[Job]:
+        """Wait for a job to finish."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        return self.jobs.get(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Job]:
+        """Yield the job now and after every status change, until it finishes."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            snapshot = job.model_copy()
+            yield snapshot
+            while not snapshot.finished:
+                snapshot = await queue.get()
+                yield snapshot
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": len(self.jobs), "running": len(self._tasks), "by_status": counts}
+
+
+# Global Job Manager Instance
+job_manager = JobManager(project_storage, max_jobs=settings.MAX_JOBS_IN_MEMORY)
@@ -8,6 +8,7 @@ class ModelConfig(BaseModel):
     temperature: float = 0.7
     max_tokens: Optional[int] = None
     timeout: int = 120  # seconds
+    use_cache: bool = True  # Allow cached responses for deterministic agent steps
 
 class AppSettings(BaseModel):
     ai_model_config: ModelConfig  # Renamed from model_config to avoid Pydantic reserved name
@@ -1,9 +1,9 @@
 """
 Model factory to support multiple AI providers
 """
-from typing import Any
+from typing import Any, Optional
 from google.adk.models import Gemini
-import os
+from google.genai import types
 
 class ModelFactory:
     """Factory to create model instances based on provider"""
@@ -21,18 +21,19 @@ class ModelFactory:
         
         Returns:
             Model instance compatible with ADK
+        
+        The API key is handed to the model's client directly instead of being
+        written to os.environ, so concurrent requests with different keys
+        never see each other's credentials.
         """
         if provider == "google":
-            # Set API key in environment for Gemini
-            os.environ["GOOGLE_API_KEY"] = api_key
             return Gemini(
                 model=model_name,
-                **{k: v for k, v in kwargs.items() if k in ['temperature', 'max_output_tokens']}
+                client_kwargs={"api_key": api_key}
             )
         
         elif provider == "anthropic":
             # ADK supports Anthropic models via google.genai
-            os.environ["ANTHROPIC_API_KEY"] = api_key
             # Note: ADK's Anthropic support may require additional setup
             # For now, we'll use Gemini as fallback
             raise NotImplementedError(
@@ -40,7 +41,6 @@ class ModelFactory:
             )
         
         elif provider == "openai":
-            os.environ["OPENAI_API_KEY"] = api_key
             raise NotImplementedError(
                 "OpenAI support coming soon. ADK primarily supports Gemini models."
             )
@@ -48,6 +48,19 @@ class ModelFactory:
         else:
             raise ValueError(f"Unsupported provider: {provider}")
     
+    @staticmethod
+    def create_generate_config(temperature: float, max_tokens: Optional[int] = None) -> types.GenerateContentConfig:
+        """
+        Build the generation settings for an agent.
+        
+        Sampling parameters belong on the agent's generate_content_config;
+        the model object only describes which model to call and how.
+        """
+        return types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens
+        )
+    
     @staticmethod
     def get_available_models(provider: str) -> list[dict]:
         """Get list of available models for a provider"""
@@ -1,8 +1,16 @@
 from typing import Dict, List, Optional, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, computed_field
+from collections import OrderedDict
+import logging
+import time
 import uuid
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.event_bus import SessionEvent, SessionEventBus
+
+logger = logging.getLogger(__name__)
+
 class ProjectSession(BaseModel):
     session_id: str
     project_name: str = "Untitled Project"
@@ -10,35 +18,85 @@ class ProjectSession(BaseModel):
     created_at: datetime = datetime.now()
     artifacts: Dict[str, str] = {} # Map of artifact name to path
     current_phase: str = "strategy"
-    logs: List[str] = []
+    # Recent events (logs, task statuses, saved artifacts, errors); bounded
+    _events: SessionEventBus = PrivateAttr(
+        default_factory=lambda: SessionEventBus(max_events=settings.SESSION_EVENT_BUFFER_SIZE)
+    )
+
+    @computed_field
+    @property
+    def logs(self) -> List[str]:
+        """Log lines still in the event buffer (for clients that fetch the whole session)"""
+        return [f"[{e.ts.isoformat()}] {e.data.get('message', '')}" for e in self._events.events("log")]
+
+    @property
+    def events(self) -> SessionEventBus:
+        return self._events
+
+    def publish(self, event_type: str, **data) -> SessionEvent:
+        return self._events.publish(event_type, data)
 
     def add_log(self, message: str):
-        self.logs.append(f"[{datetime.now().isoformat()}] {message}")
+        self.publish("log", message=message)
+
+    def add_error(self, message: str, **details):
+        """Log an error and publish it as a typed error event."""
+        self.add_log(message)
+        self.publish("error", message=message, **details)
 
 class Orchestrator:
-    def __init__(self):
-        self.sessions: Dict[str, ProjectSession] = {}
+    def __init__(
+        self,
+        max_sessions: int = settings.MAX_ACTIVE_SESSIONS,
+        idle_ttl_seconds: int = settings.SESSION_IDLE_TTL_SECONDS
+    ):
+        # Active sessions in least-recently-used order. Evicted sessions are
+        # reloaded from project storage by restore_session on next access.
+        self.sessions: "OrderedDict[str, ProjectSession]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
         self.agents: Dict[str, Any] = {}
 
+    def _remember(self, session: ProjectSession):
+        """Mark a session as most recently used and evict idle/excess sessions."""
+        self.sessions[session.session_id] = session
+        self.sessions.move_to_end(session.session_id)
+        self._last_access[session.session_id] = time.monotonic()
+        self._evict(keep=session.session_id)
+
+    def _evict(self, keep: Optional[str] = None):
+        from app.core.sprint_executor import sprint_executor
+        
+        now = time.monotonic()
+        for session_id in list(self.sessions):  # least recently used first
+            over_capacity = len(self.sessions) > self.max_sessions
+            idle = now - self._last_access.get(session_id, now) > self.idle_ttl_seconds
+            if not (over_capacity or idle):
+                break
+            if session_id == keep or sprint_executor.is_running(session_id):
+                continue
+            if self.sessions[session_id].events.subscriber_count:
+                # Someone is streaming its events; dropping it would orphan them
+                continue
+            del self.sessions[session_id]
+            self._last_access.pop(session_id, None)
+            logger.info(f"Evicted session {session_id} from memory")
+
     def create_session(self) -> ProjectSession:
         session_id = str(uuid.uuid4())
         
-        # Create ADK Session
-        from app.core.services import session_service
-        session_service.create_session_sync(
-            app_name="spark_to_ship",
-            user_id="user",
-            session_id=session_id
-        )
-        
+        # The ADK session is created on first agent run (see services.ensure_session)
         session = ProjectSession(session_id=session_id)
-        self.sessions[session_id] = session
+        self._remember(session)
         return session
 
     def get_session(self, session_id: str) -> Optional[ProjectSession]:
         # If session exists in memory, return it
-        if session_id in self.sessions:
-            return self.sessions[session_id]
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._remember(session)
+            return session
         
         # Try to restore from filesystem
         restored = self.restore_session(session_id)
@@ -50,34 +108,24 @@ class Orchestrator:
     def restore_session(self, session_id: str) -> Optional[ProjectSession]:
         """Restore a session from filesystem if it exists"""
         from app.services.project_storage import project_storage
-        from app.core.services import session_service
         
-        # Check if project exists on filesystem
-        summary = project_storage.get_project_summary(session_id)
-        if not summary:
+        # Check if project exists on filesystem (no directory walk needed)
+        if not project_storage.project_exists(session_id):
+            return None
+        metadata = project_storage.load_metadata(session_id)
+        if not metadata:
             return None
-        
-        # Restore ADK session first
-        try:
-            session_service.create_session_sync(
-                app_name="spark_to_ship",
-                user_id="user",
-                session_id=session_id
-            )
-        except Exception as e:
-            # Session might already exist, that's okay
-            pass
         
         # Create session object
         session = ProjectSession(
             session_id=session_id,
-            project_name=summary.get('project_name', 'Restored Project'),
+            project_name=metadata.get('project_name', 'Restored Project'),
             status='restored',
-            created_at=datetime.fromisoformat(summary.get('created_at', datetime.now().isoformat()))
+            created_at=datetime.fromisoformat(metadata.get('created_at', datetime.now().isoformat()))
         )
         
         # Add to active sessions
-        self.sessions[session_id] = session
+        self._remember(session)
         session.add_log(f"Session restored from filesystem")
         
         return session
@@ -86,6 +134,12 @@ class Orchestrator:
         """Get session from memory or restore from filesystem"""
         return self.get_session(session_id)
 
+    def publish(self, session_id: str, event_type: str, **data):
+        """Publish an event to a session if it is loaded (events of unloaded sessions have no audience)."""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.publish(event_type, **data)
+
     def register_agent(self, agent_name: str, agent_instance: Any):
         self.agents[agent_name] = agent_instance
 
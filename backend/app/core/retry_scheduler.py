@@ -0,0 +1,128 @@
+"""
+Server-side retry scheduler for rate-limited model calls.
+
+When a call is throttled (429 RESOURCE_EXHAUSTED), its quota bucket
+(provider, model, API key) is closed until the provider's retry_after has
+passed. Every caller that hits a closed bucket - including callers that have
+not been throttled themselves yet - parks on the same gate, and a single
+timer per bucket reopens it. Concurrent sprint tasks therefore wait once,
+together, and resume as soon as the window reopens instead of each sleeping
+on its own countdown.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.config import settings
+from app.core.runner_pool import hash_api_key
+from app.utils.error_handler import get_retry_after, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+BucketKey = Tuple[str, str, str]
+
+
+class RetryScheduler:
+    """Parks throttled model calls per quota bucket and releases them on one shared timer."""
+
+    def __init__(self, max_attempts: int = 3, max_wait_seconds: int = 120):
+        self.max_attempts = max_attempts
+        self.max_wait_seconds = max_wait_seconds
+        self._gates: Dict[BucketKey, asyncio.Event] = {}
+        self._reopen_at: Dict[BucketKey, float] = {}
+        self._timers: Dict[BucketKey, asyncio.TimerHandle] = {}
+        self.throttled = 0
+        self.retried = 0
+        self.parked = 0
+        self.wait_seconds_total = 0.0
+
+    @staticmethod
+    def make_key(provider: str, model_name: str, api_key: str) -> BucketKey:
+        return (provider, model_name, hash_api_key(api_key))
+
+    async def wait_until_open(self, key: BucketKey) -> float:
+        """Wait while the bucket is closed; returns the seconds spent waiting."""
+        gate = self._gates.get(key)
+        if gate is None or gate.is_set():
+            return 0.0
+
+        self.parked += 1
+        started = time.monotonic()
+        await gate.wait()
+        waited = time.monotonic() - started
+        self.wait_seconds_total += waited
+        return waited
+
+    def throttle(self, key: BucketKey, retry_after: float):
+        """Close a bucket for retry_after seconds (extending, never shortening, an open window)."""
+        loop = asyncio.get_running_loop()
+        reopen_at = loop.time() + retry_after
+        gate = self._gates.get(key)
+        # Callers throttled by the same provider window arrive a few ms apart;
+        # keep the existing timer unless the new window is meaningfully later
+        if gate is not None and not gate.is_set() and reopen_at <= self._reopen_at.get(key, 0) + 1.0:
+            return
+
+        if gate is None or gate.is_set():
+            gate = asyncio.Event()
+            self._gates[key] = gate
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        self.throttled += 1
+        self._reopen_at[key] = reopen_at
+        self._timers[key] = loop.call_at(reopen_at, self._reopen, key)
+        logger.warning(f"[RetryScheduler] {key[0]}/{key[1]} throttled for {retry_after:.0f}s")
+
+    def _reopen(self, key: BucketKey):
+        self._timers.pop(key, None)
+        self._reopen_at.pop(key, None)
+        gate = self._gates.pop(key, None)
+        if gate is not None:
+            gate.set()
+        logger.info(f"[RetryScheduler] {key[0]}/{key[1]} reopened")
+
+    async def call(self, key: BucketKey, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func, parking it while its bucket is throttled and retrying it
+        after rate limit errors.
+
+        Rate limits are re-raised (for handle_adk_errors to report) once
+        max_attempts retries are used up or the provider asks for a wait
+        longer than max_wait_seconds.
+        """
+        for attempt in range(self.max_attempts + 1):
+            await self.wait_until_open(key)
+            try:
+                return await func()
+            except Exception as e:
+                error_str = str(e)
+                if not is_rate_limit_error(error_str):
+                    raise
+                retry_after = get_retry_after(error_str)
+                if attempt == self.max_attempts or retry_after > self.max_wait_seconds:
+                    raise
+                self.throttle(key, retry_after)
+                self.retried += 1
+                logger.info(
+                    f"[RetryScheduler] Rate limited on {key[1]}; retry {attempt + 1}/{self.max_attempts} "
+                    f"when the window reopens"
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "throttled_buckets": sum(1 for gate in self._gates.values() if not gate.is_set()),
+            "throttled": self.throttled,
+            "retried": self.retried,
+            "parked": self.parked,
+            "wait_seconds_total": round(self.wait_seconds_total, 2),
+        }
+
+
+# Global Retry Scheduler Instance
+retry_scheduler = RetryScheduler(
+    max_attempts=settings.RATE_LIMIT_MAX_RETRIES,
+    max_wait_seconds=settings.RATE_LIMIT_MAX_WAIT_SECONDS
+)
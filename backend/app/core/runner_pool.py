@@ -0,0 +1,113 @@
+"""
+Process-wide pool of ADK runners shared by all agents.
+
+Runners are keyed by (agent name, provider, model, temperature, API key hash)
+and evicted least-recently-used, so switching settings back and forth or
+serving several users doesn't rebuild the model client on every call.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.adk import Runner
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RunnerKey = Tuple[str, str, str, float, Optional[int], str]
+
+
+def hash_api_key(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key (never log raw keys)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class RunnerPool:
+    """LRU cache of ADK runners with hit/miss/build-time counters."""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._runners: "OrderedDict[RunnerKey, Runner]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_time_total = 0.0
+        self.build_time_max = 0.0
+
+    @staticmethod
+    def make_key(
+        agent_name: str,
+        provider: str,
+        model_name: str,
+        temperature: float,
+        api_key: str,
+        max_tokens: Optional[int] = None,
+    ) -> RunnerKey:
+        # max_tokens is baked into the runner's generate_content_config
+        return (agent_name, provider, model_name, float(temperature), max_tokens, hash_api_key(api_key))
+
+    def get_or_create(self, key: RunnerKey, factory: Callable[[], Runner]) -> Runner:
+        """
+        Return the pooled runner for a key, building it with factory on a miss.
+
+        Args:
+            key: Key from make_key()
+            factory: Zero-argument callable that builds a new Runner
+
+        Returns:
+            Runner instance
+        """
+        with self._lock:
+            runner = self._runners.get(key)
+            if runner is not None:
+                self._runners.move_to_end(key)
+                self.hits += 1
+                return runner
+
+            self.misses += 1
+            started = time.perf_counter()
+            runner = factory()
+            elapsed = time.perf_counter() - started
+            self.build_time_total += elapsed
+            self.build_time_max = max(self.build_time_max, elapsed)
+
+            self._runners[key] = runner
+            while len(self._runners) > self.max_size:
+                evicted_key, _ = self._runners.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"[RunnerPool] Evicted runner for {evicted_key[0]} / {evicted_key[2]}")
+
+            logger.info(f"[RunnerPool] Built runner for {key[0]} / {key[2]} in {elapsed * 1000:.1f}ms")
+            return runner
+
+    def invalidate(self, agent_name: Optional[str] = None):
+        """Drop pooled runners, optionally only those of one agent."""
+        with self._lock:
+            if agent_name is None:
+                self._runners.clear()
+                return
+            for key in [k for k in self._runners if k[0] == agent_name]:
+                del self._runners[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._runners),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "build_time_total_ms": round(self.build_time_total * 1000, 2),
+                "build_time_avg_ms": round(self.build_time_total * 1000 / self.misses, 2) if self.misses else 0.0,
+                "build_time_max_ms": round(self.build_time_max * 1000, 2),
+            }
+
+
+# Global Runner Pool Instance
+runner_pool = RunnerPool(max_size=settings.RUNNER_POOL_SIZE)
@@ -1,3 +1,106 @@
-from google.adk.sessions import InMemorySessionService
+"""
+Shared ADK session service.
 
-session_service = InMemorySessionService()
+Sessions are stored in SQLite (ADK's SqliteSessionService) so conversation
+state survives restarts and isn't held in process memory; the in-memory
+service is used when SESSION_DB_PATH is empty or aiosqlite isn't installed.
+"""
+import logging
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from google.adk.apps import App
+from google.adk.apps.app import EventsCompactionConfig
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "spark_to_ship"
+USER_ID = "user"
+
+
+def _create_session_service() -> BaseSessionService:
+    if not settings.SESSION_DB_PATH:
+        return InMemorySessionService()
+    try:
+        from google.adk.sessions.sqlite_session_service import SqliteSessionService
+    except ImportError as e:
+        logger.warning(f"SQLite session storage unavailable ({e}); sessions will be kept in memory")
+        return InMemorySessionService()
+
+    Path(settings.SESSION_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    # ADK opens a connection per operation; WAL (persisted in the file) lets
+    # concurrent agent calls read while another writes instead of failing
+    # with "database is locked"
+    with closing(sqlite3.connect(settings.SESSION_DB_PATH)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSessionService(db_path=settings.SESSION_DB_PATH)
+
+
+session_service = _create_session_service()
+
+# Session ids known to exist in session_service, so ensure_session doesn't
+# hit the database before every prompt. Bounded; a miss only costs one insert.
+_known_sessions: "OrderedDict[str, None]" = OrderedDict()
+_KNOWN_SESSIONS_MAX = 10000
+
+
+async def ensure_session(session_id: str, state: Optional[Dict[str, Any]] = None, remember: bool = True):
+    """
+    Create the ADK session for session_id if it doesn't exist yet.
+
+    Args:
+        session_id: ADK session identifier
+        state: Initial session state (only applied when the session is created)
+        remember: Cache that the session exists; pass False for one-off sessions
+    """
+    if session_id in _known_sessions:
+        _known_sessions.move_to_end(session_id)
+        return
+
+    try:
+        await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id,
+            state=state
+        )
+    except AlreadyExistsError:
+        pass
+
+    if not remember:
+        return
+    _known_sessions[session_id] = None
+    while len(_known_sessions) > _KNOWN_SESSIONS_MAX:
+        _known_sessions.popitem(last=False)
+
+
+async def discard_session(session_id: str):
+    """Delete a one-off ADK session and its events."""
+    _known_sessions.pop(session_id, None)
+    try:
+        await session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    except Exception as e:
+        logger.warning(f"Failed to delete session {session_id}: {e}")
+
+
+def build_app(root_agent) -> App:
+    """
+    Wrap an agent in the ADK App, with history compaction when configured.
+
+    With AGENT_HISTORY_COMPACTION_INTERVAL > 0, ADK summarizes older turns of
+    a conversation every that many invocations, so long-lived agent
+    conversations don't re-send their whole history on each call.
+    """
+    compaction = None
+    if settings.AGENT_HISTORY_COMPACTION_INTERVAL > 0:
+        compaction = EventsCompactionConfig(
+            compaction_interval=settings.AGENT_HISTORY_COMPACTION_INTERVAL,
+            overlap_size=settings.AGENT_HISTORY_COMPACTION_OVERLAP
+        )
+    return App(name=APP_NAME, root_agent=root_agent, events_compaction_config=compaction)
@@ -0,0 +1,152 @@
+"""
+Single-flight coalescing of duplicate agent requests.
+
+Double clicks and re-run effects in the UI often send the same agent request
+for a session twice. Requests are keyed by a fingerprint of (session, agent,
+normalized input); a duplicate that arrives while the first is still running
+attaches to its result instead of starting a second model generation.
+
+Requests may also carry an Idempotency-Key: successful results are kept for
+IDEMPOTENCY_TTL_SECONDS, so a retried HTTP request gets the stored result.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when an Idempotency-Key is reused for a different request"""
+    pass
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls and replays results by idempotency key."""
+
+    def __init__(self, idempotency_ttl_seconds: int = 86400, max_results: int = 1000):
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+        self.max_results = max_results
+        self._flights: Dict[str, _Flight] = {}
+        # idempotency key -> (fingerprint, expires_at, result)
+        self._results: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self.started = 0
+        self.coalesced = 0
+        self.replayed = 0
+
+    @staticmethod
+    def fingerprint(session_id: str, agent: str, payload: Any) -> str:
+        """Hash of (session, agent, input) with whitespace and key order normalized."""
+        canonical = json.dumps(
+            [session_id, agent, _normalize(payload)],
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _stored(self, idempotency_key: str, fingerprint: str) -> Tuple[bool, Any]:
+        entry = self._results.get(idempotency_key)
+        if entry is None:
+            return False, None
+        stored_fingerprint, expires_at, result = entry
+        if expires_at < time.time():
+            del self._results[idempotency_key]
+            return False, None
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyKeyConflict("Idempotency-Key was already used for a different request")
+        return True, result
+
+    def _store(self, idempotency_key: str, fingerprint: str, result: Any):
+        # Agent failures come back as {"error": ...} bodies; a retry should re-run them
+        if isinstance(result, dict) and "error" in result:
+            return
+        self._results[idempotency_key] = (fingerprint, time.time() + self.idempotency_ttl_seconds, result)
+        self._results.move_to_end(idempotency_key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    async def run(
+        self,
+        fingerprint: str,
+        func: Callable[[], Awaitable[Any]],
+        idempotency_key: Optional[str] = None
+    ) -> Any:
+        """
+        Run func once per fingerprint at a time and share its outcome.
+
+        The shared call keeps running while any caller still waits for it and
+        is cancelled once all of them have gone away.
+
+        Raises:
+            IdempotencyKeyConflict: If idempotency_key was used for a different request
+        """
+        if idempotency_key:
+            found, result = self._stored(idempotency_key, fingerprint)
+            if found:
+                self.replayed += 1
+                logger.info(f"[SingleFlight] Replaying stored result for idempotency key {idempotency_key}")
+                return result
+
+        flight = self._flights.get(fingerprint)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(func()))
+            self._flights[fingerprint] = flight
+            flight.task.add_done_callback(lambda _: self._flights.pop(fingerprint, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"[SingleFlight] Attached duplicate request to in-flight call {fingerprint[:12]}")
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+        if idempotency_key:
+            self._store(idempotency_key, fingerprint, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "stored_results": len(self._results),
+        }
+
+
+# Global Single-Flight Instance
+single_flight = SingleFlight(
+    idempotency_ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_results=settings.IDEMPOTENCY_MAX_RESULTS
+)
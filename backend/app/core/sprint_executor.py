@@ -0,0 +1,361 @@
+"""
+Server-side sprint executor.
+
+Builds a dependency DAG from a sprint plan and runs independent tasks
+concurrently on a bounded pool of asyncio workers. Dependency rules follow
+docs/DEPENDENCY_HANDLING.md:
+
+- Tasks in the same story depend on the tasks that come before them
+- Frontend tasks also depend on every backend task in their story
+
+A failed task only skips its own descendants; other stories keep going.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Signature of the coroutine that executes a single task.
+# It returns the agent result, or an error dict (see handle_adk_errors).
+TaskRunner = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _is_frontend(task: Dict[str, Any]) -> bool:
+    return "frontend" in (task.get("assignee") or "").lower()
+
+
+def _is_backend(task: Dict[str, Any]) -> bool:
+    return "backend" in (task.get("assignee") or "").lower()
+
+
+def build_task_graph(tasks: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Build the task dependency graph for a sprint plan.
+
+    Within a story, non-frontend tasks form a chain in plan order. Frontend
+    tasks wait for the earlier tasks of their story and for all of the
+    story's backend tasks. Tasks without a story_id have no dependencies.
+
+    Args:
+        tasks: Sprint plan tasks (as produced by EngineeringManagerAgent)
+
+    Returns:
+        Map of task_id to the list of task_ids it depends on
+
+    Raises:
+        ValueError: If task ids are duplicated or the graph has a cycle
+    """
+    graph: Dict[str, List[str]] = {}
+    by_story: Dict[str, List[Dict[str, Any]]] = {}
+
+    for task in tasks:
+        task_id = task.get("task_id")
+        if not task_id:
+            raise ValueError(f"Task is missing task_id: {task.get('title', task)}")
+        if task_id in graph:
+            raise ValueError(f"Duplicate task_id in sprint plan: {task_id}")
+        graph[task_id] = []
+
+        story_id = task.get("story_id")
+        if story_id:
+            by_story.setdefault(story_id, []).append(task)
+
+    for story_tasks in by_story.values():
+        backend_ids = [t["task_id"] for t in story_tasks if _is_backend(t)]
+        for index, task in enumerate(story_tasks):
+            earlier = story_tasks[:index]
+            if _is_frontend(task):
+                deps = [t["task_id"] for t in earlier]
+                deps += [tid for tid in backend_ids if tid not in deps]
+            else:
+                # Earlier frontend tasks already wait on this story's backend
+                # work, so depending on them would create a cycle
+                deps = [t["task_id"] for t in earlier if not _is_frontend(t)]
+            graph[task["task_id"]] = deps
+
+    # Kahn's algorithm as a sanity check that the rules above stay acyclic
+    in_degree = {tid: len(deps) for tid, deps in graph.items()}
+    dependents = _dependents(graph)
+    ready = [tid for tid, degree in in_degree.items() if degree == 0]
+    visited = 0
+    while ready:
+        tid = ready.pop()
+        visited += 1
+        for child in dependents[tid]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                ready.append(child)
+    if visited != len(graph):
+        raise ValueError("Sprint plan dependency graph contains a cycle")
+
+    return graph
+
+
+def _dependents(graph: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Invert a dependency graph into task_id -> tasks that depend on it."""
+    dependents: Dict[str, List[str]] = {tid: [] for tid in graph}
+    for tid, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(tid)
+    return dependents
+
+
+class SprintRun(BaseModel):
+    session_id: str
+    status: str = "running"  # running | completed | paused | interrupted
+    max_workers: int
+    total_tasks: int
+    task_statuses: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for status in self.task_statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+class SprintExecutor:
+    """Runs sprint plans on the server, one background run per session."""
+
+    def __init__(self):
+        self.runs: Dict[str, SprintRun] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, session_id: str) -> bool:
+        task = self._tasks.get(session_id)
+        return task is not None and not task.done()
+
+    def get_run(self, session_id: str) -> Optional[SprintRun]:
+        return self.runs.get(session_id)
+
+    def start(
+        self,
+        session_id: str,
+        tasks: List[Dict[str, Any]],
+        run_task: TaskRunner,
+        max_workers: int,
+        completed: Optional[set] = None,
+        on_status: Optional[Callable[[str, str], None]] = None,
+        log: Optional[Callable[[str], None]] = None,
+        on_finish: Optional[Callable[[SprintRun], None]] = None,
+    ) -> SprintRun:
+        """
+        Start a sprint run in the background.
+
+        Args:
+            session_id: Session identifier
+            tasks: Sprint plan tasks
+            run_task: Coroutine that executes one task
+            max_workers: Maximum number of tasks executing concurrently
+            completed: Task ids already complete (skipped when resuming)
+            on_status: Callback invoked with (task_id, status) on every change
+            log: Callback for human-readable progress messages
+            on_finish: Callback invoked with the run once it completes or pauses
+
+        Returns:
+            The SprintRun tracking this execution
+
+        Raises:
+            ValueError: If a run is already active or the plan is invalid
+        """
+        if self.is_running(session_id):
+            raise ValueError(f"A sprint is already running for session {session_id}")
+
+        graph = build_task_graph(tasks)
+        completed = completed or set()
+
+        run = SprintRun(
+            session_id=session_id,
+            max_workers=max_workers,
+            total_tasks=len(tasks),
+            task_statuses={
+                tid: ("complete" if tid in completed else "pending") for tid in graph
+            },
+            started_at=datetime.now(),
+        )
+        self.runs[session_id] = run
+
+        self._tasks[session_id] = asyncio.create_task(
+            self._execute(run, tasks, graph, run_task, on_status, log or (lambda _: None), on_finish)
+        )
+        return run
+
+    def restore_interrupted(
+        self,
+        session_id: str,
+        tasks: List[Dict[str, Any]],
+        task_statuses: Dict[str, str],
+        errors: Dict[str, str],
+        max_workers: int,
+        started_at: datetime,
+    ) -> SprintRun:
+        """
+        Register a run that a previous process didn't finish (from its journal).
+
+        Tasks that were in flight are reset to pending; start the sprint again
+        with resume to continue from the completed tasks.
+        """
+        run = SprintRun(
+            session_id=session_id,
+            status="interrupted",
+            max_workers=max_workers,
+            total_tasks=len(tasks),
+            task_statuses={
+                t["task_id"]: ("pending" if task_statuses.get(t["task_id"], "loading") == "loading" else task_statuses[t["task_id"]])
+                for t in tasks if t.get("task_id")
+            },
+            errors=errors,
+            started_at=started_at,
+        )
+        self.runs[session_id] = run
+        return run
+
+    async def wait(self, session_id: str) -> Optional[SprintRun]:
+        """Wait for the active run of a session to finish."""
+        task = self._tasks.get(session_id)
+        if task is not None:
+            await task
+        return self.runs.get(session_id)
+
+    async def _execute(
+        self,
+        run: SprintRun,
+        tasks: List[Dict[str, Any]],
+        graph: Dict[str, List[str]],
+        run_task: TaskRunner,
+        on_status: Optional[Callable[[str, str], None]],
+        log: Callable[[str], None],
+        on_finish: Optional[Callable[[SprintRun], None]] = None,
+    ):
+        tasks_by_id = {t["task_id"]: t for t in tasks}
+        dependents = _dependents(graph)
+        # Completed tasks from a previous run already satisfy their dependents
+        remaining = {
+            tid: sum(1 for dep in deps if run.task_statuses[dep] != "complete")
+            for tid, deps in graph.items()
+        }
+        queue: asyncio.Queue = asyncio.Queue()
+        unresolved = sum(1 for s in run.task_statuses.values() if s != "complete")
+        in_flight = 0
+        halted = False
+        finished = False
+
+        def set_status(task_id: str, status: str):
+            run.task_statuses[task_id] = status
+            if on_status:
+                try:
+                    on_status(task_id, status)
+                except Exception as e:
+                    logger.error(f"Failed to record status for {task_id}: {e}")
+
+        def maybe_finish():
+            nonlocal finished
+            if finished:
+                return
+            if unresolved == 0 or (halted and in_flight == 0):
+                finished = True
+                for _ in range(run.max_workers):
+                    queue.put_nowait(None)
+
+        def resolve(task_id: str):
+            nonlocal unresolved
+            unresolved -= 1
+            maybe_finish()
+
+        def skip_descendants(task_id: str):
+            stack = list(dependents[task_id])
+            while stack:
+                child = stack.pop()
+                if run.task_statuses[child] != "pending":
+                    continue
+                # on_status consumers (journal, events) read the error
+                run.errors[child] = f"Required task(s) failed: {task_id}"
+                set_status(child, "skipped")
+                log(f"⏭️  Skipping {child}: Required task(s) failed: {task_id}")
+                resolve(child)
+                stack.extend(dependents[child])
+
+        async def execute(task: Dict[str, Any]) -> Dict[str, Any]:
+            # Rate limits are retried per quota bucket by the retry scheduler
+            # inside each model call; a rate-limit error that still reaches
+            # here means it gave up and is reported unrecoverable, which
+            # pauses the sprint for a later resume
+            try:
+                return await run_task(task)
+            except Exception as e:
+                logger.error(f"Sprint task {task['task_id']} raised: {e}", exc_info=True)
+                return {"error": str(e), "error_type": "unknown", "recoverable": True}
+
+        async def worker():
+            nonlocal halted, in_flight
+            while True:
+                task_id = await queue.get()
+                if task_id is None:
+                    return
+
+                if halted:
+                    # Leave the task pending so a later resume picks it up
+                    continue
+
+                task = tasks_by_id[task_id]
+                set_status(task_id, "loading")
+                log(f"Assigning {task_id} to [{task.get('assignee')}]...")
+
+                in_flight += 1
+                try:
+                    result = await execute(task)
+                finally:
+                    in_flight -= 1
+
+                if not result.get("error"):
+                    set_status(task_id, "complete")
+                    log(f"✓ {task_id} completed.")
+                    resolve(task_id)
+                    for child in dependents[task_id]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0 and run.task_statuses[child] == "pending":
+                            queue.put_nowait(child)
+                    continue
+
+                run.errors[task_id] = result.get("error")
+                set_status(task_id, "error")
+                log(f"❌ {task_id} failed: {result.get('error')}")
+
+                if result.get("error_type") == "token_exhausted" or result.get("recoverable") is False:
+                    # Same as the browser loop: these need user intervention,
+                    # so stop dispatching new work and let in-flight tasks finish
+                    halted = True
+                    log("🛑 Sprint paused: Unrecoverable error")
+
+                resolve(task_id)
+                skip_descendants(task_id)
+
+        for tid, count in remaining.items():
+            if count == 0 and run.task_statuses[tid] == "pending":
+                queue.put_nowait(tid)
+
+        log(f"🚀 Starting Engineering Sprint ({unresolved} tasks, {run.max_workers} workers)...")
+        maybe_finish()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(run.max_workers)))
+        finally:
+            run.finished_at = datetime.now()
+            run.status = "paused" if halted else "completed"
+            log(f"🏁 Sprint {run.status}: {run.summary()}")
+            if on_finish:
+                try:
+                    on_finish(run)
+                except Exception as e:
+                    logger.error(f"Sprint finish callback failed: {e}")
+
+
+# Global Sprint Executor Instance
+sprint_executor = SprintExecutor()
@@ -1,10 +1,12 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.core.orchestrator import orchestrator
 from app.core.config import settings
 from app.core.model_config import ModelConfig, AppSettings
 from app.core.model_factory import ModelFactory
+from app.core.runner_pool import hash_api_key
+from app.utils.adk_helper import get_stream_sink
 from app.agents.strategy.idea_generator import IdeaGeneratorAgent
 from app.agents.strategy.product_requirements import ProductRequirementsAgent
 from app.agents.strategy.requirement_analysis import RequirementAnalysisAgent
@@ -16,9 +18,15 @@ from app.agents.engineering.frontend_dev import FrontendDevAgent
 from app.agents.engineering.debugger_agent import DebuggerAgent
 from app.agents.engineering.qa_agent import QAAgent
 from app.services.project_storage import project_storage
-from typing import Dict, Any, List
+from app.services.artifact_cache import artifact_cache
+from app.core.single_flight import IdempotencyKeyConflict, single_flight
+from app.services.sprint_journal import sprint_journal
+from typing import Dict, Any, List, Literal, Optional
 import json
 import asyncio
+import functools
+import hashlib
+import inspect
 import logging
 
 # Configure logging
@@ -44,6 +52,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def recover_sprints():
+    """Replay sprint journals so progress made before a crash or restart isn't lost"""
+    from datetime import datetime
+    from app.core.sprint_executor import sprint_executor
+    
+    recovered = await asyncio.to_thread(lambda: list(sprint_journal.recover()))
+    for session_id, state in recovered:
+        run = state["run"]
+        if not run or run["status"] != "running":
+            continue
+        sprint_plan = project_storage.load_step(session_id, "sprint_plan")
+        tasks = sprint_plan.get("sprint_plan", []) if isinstance(sprint_plan, dict) else (sprint_plan or [])
+        sprint_executor.restore_interrupted(
+            session_id,
+            tasks,
+            task_statuses={tid: task["status"] for tid, task in state["tasks"].items()},
+            errors={tid: task["error"] for tid, task in state["tasks"].items() if task.get("error")},
+            max_workers=run.get("max_workers") or settings.SPRINT_MAX_WORKERS,
+            started_at=datetime.fromisoformat(run["ts"])
+        )
+        logger.info(f"Sprint for {session_id} was interrupted; resume it with POST /sprint/{session_id}/run")
+
 # Global settings (must be initialized before agents)
 # SECURITY: Users MUST provide their own API key via UI settings
 # No fallback to .env file to prevent using developer's key
@@ -55,6 +86,117 @@ app_settings = AppSettings(
     )
 )
 
+def get_model_config(
+    x_api_key: Optional[str] = Header(default=None),
+    x_model_provider: Optional[str] = Header(default=None),
+    x_model_name: Optional[str] = Header(default=None),
+    x_model_temperature: Optional[float] = Header(default=None),
+    x_model_timeout: Optional[int] = Header(default=None),
+    cache_control: Optional[str] = Header(default=None)
+) -> ModelConfig:
+    """
+    Resolve the model configuration for a single request.
+    
+    Clients can send their own credentials with X-API-Key (plus optional
+    X-Model-Provider / X-Model-Name / X-Model-Temperature / X-Model-Timeout),
+    so one server process can serve many users concurrently. Anything not
+    provided falls back to the settings saved via POST /settings.
+    
+    Send "Cache-Control: no-cache" to bypass the response cache and force a
+    fresh generation.
+    
+    Always returns a fresh copy: agents never share a mutable config object,
+    and a concurrent settings update cannot change a request mid-flight.
+    """
+    defaults = app_settings.ai_model_config
+    use_cache = "no-cache" not in (cache_control or "").lower()
+    if x_api_key is None:
+        return defaults.model_copy(update={"use_cache": use_cache})
+    
+    try:
+        return ModelConfig(
+            provider=x_model_provider or defaults.provider,
+            model_name=x_model_name or defaults.model_name,
+            api_key=x_api_key,
+            temperature=x_model_temperature if x_model_temperature is not None else defaults.temperature,
+            max_tokens=defaults.max_tokens,
+            timeout=x_model_timeout or defaults.timeout,
+            use_cache=use_cache
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid model headers: {e}")
+
+def coalesced(agent_name: str):
+    """
+    Coalesce duplicate calls of an agent endpoint.
+    
+    Calls with the same session and normalized input (body, query params and
+    model settings, including use_cache and the API key's hash) attach to the one already in flight instead of generating twice.
+    The endpoint also accepts an Idempotency-Key header: a retried request
+    with the same key gets the stored result (422 if the key was used for a
+    different request). Streamed calls are never coalesced.
+    """
+    def decorator(handler):
+        signature = inspect.signature(handler)
+        
+        @functools.wraps(handler)
+        async def wrapper(*args, idempotency_key: Optional[str] = None, **kwargs):
+            # A streamed call needs its own model run to receive tokens, so
+            # it never attaches to (or hosts) a shared flight
+            if get_stream_sink() is not None:
+                return await handler(*args, **kwargs)
+            
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            payload = {}
+            for name, value in bound.arguments.items():
+                if isinstance(value, ModelConfig):
+                    # Keys are never part of the fingerprint, only which key was used
+                    value = {**value.model_dump(exclude={"api_key"}), "api_key": hash_api_key(value.api_key)}
+                elif isinstance(value, BaseModel):
+                    value = value.model_dump()
+                payload[name] = value
+            
+            fingerprint = single_flight.fingerprint(bound.arguments.get("session_id", ""), agent_name, payload)
+            try:
+                return await single_flight.run(fingerprint, lambda: handler(*args, **kwargs), idempotency_key)
+            except IdempotencyKeyConflict as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        
+        # Expose the Idempotency-Key header to FastAPI alongside the handler's own parameters
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(
+                "idempotency_key",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Header(default=None),
+                annotation=Optional[str]
+            )
+        ])
+        return wrapper
+    return decorator
+
+SSE_KEEPALIVE_SECONDS = 15
+
+def parse_event_types(types: Optional[str]) -> Optional[set]:
+    """Parse a comma-separated event type filter (None = all types)."""
+    from app.core.event_bus import EVENT_TYPES
+    
+    if not types:
+        return None
+    selected = {t.strip() for t in types.split(",") if t.strip()}
+    unknown = selected - EVENT_TYPES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+    return selected
+
+# Saved steps and code files are announced on the session's event stream
+project_storage.save_listeners.append(
+    lambda session_id, rel_path, kind, entry: orchestrator.publish(
+        session_id, "artifact_saved", path=rel_path, kind=kind, sha256=entry.get("sha256"), size=entry.get("size")
+    )
+)
+
 # Register Agents
 from app.agents.engineering.e2e_test_agent import E2ETestAgent
 from app.agents.engineering.walkthrough_agent import WalkthroughAgent
@@ -109,33 +251,92 @@ class AnalyzePRDRequest(BaseModel):
 class CreateSprintPlanRequest(BaseModel):
     user_stories: List[Dict[str, Any]]
     architecture: Dict[str, Any]
+    # single | map_reduce (plan stories concurrently) | auto; None uses settings.SPRINT_PLANNING_MODE
+    planning_mode: Optional[Literal["single", "map_reduce", "auto"]] = None
+
+class CodeRef(BaseModel):
+    path: str  # Project-relative path, as listed by GET /projects/{session_id}
+    sha256: Optional[str] = None  # Pin to this content (409 if the file has changed)
 
 class WriteCodeRequest(BaseModel):
     task: Dict[str, Any]
-    context: Dict[str, Any]
+    context: Optional[Dict[str, Any]] = None  # Inline context; overrides referenced steps
+    context_refs: Optional[List[str]] = None  # Saved step names (default: architecture, user_stories, prd)
+
+class RunSprintRequest(BaseModel):
+    context: Optional[Dict[str, Any]] = None  # Defaults to the saved architecture/stories/PRD
+    resume: bool = True  # Skip tasks already marked complete
+    max_workers: Optional[int] = Field(default=None, ge=1, le=32)
 
 class ReviewCodeRequest(BaseModel):
-    code_files: Dict[str, Any]
+    code_files: Dict[str, Any] = {}
+    code_refs: List[CodeRef] = []  # Resolved server-side and merged with code_files
 
 class DebugCodeRequest(BaseModel):
     error_message: str
-    code_files: Dict[str, str]
-    context: Dict[str, Any]
+    code_files: Dict[str, str] = {}
+    code_refs: List[CodeRef] = []
+    context: Dict[str, Any] = {}
+    context_refs: List[str] = []
 
 class LintCodeRequest(BaseModel):
-    code_files: Dict[str, str]
+    code_files: Dict[str, str] = {}
+    code_refs: List[CodeRef] = []
+    deep: bool = False  # Also send files the local syntax check cleared to the model
+
+# Saved steps a dev task gets as context when the request doesn't say otherwise
+DEFAULT_CONTEXT_STEPS = ["architecture", "user_stories", "prd"]
+
+def resolve_context(
+    session_id: str,
+    context: Optional[Dict[str, Any]],
+    context_refs: Optional[List[str]],
+    default_refs: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build an agent context from referenced step outputs plus inline values.
+
+    Explicitly referenced steps must exist (404 otherwise); default steps
+    that haven't been saved yet resolve to None.
+    """
+    if context_refs is None and context is not None:
+        return context
+    required = context_refs is not None
+    refs = context_refs if context_refs is not None else (default_refs or [])
+    try:
+        resolved = artifact_cache.resolve_steps(session_id, refs, required=required)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Step {e} not found")
+    return {**resolved, **(context or {})}
+
+def resolve_code_files(session_id: str, code_files: Dict[str, Any], code_refs: List[CodeRef]) -> Dict[str, Any]:
+    """Resolve code references from project storage and merge in inline files."""
+    try:
+        resolved = artifact_cache.resolve_files(session_id, [ref.model_dump() for ref in code_refs])
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"File {e} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**resolved, **code_files}
 
 # ... (previous endpoints)
 
 
 @app.post("/agent/engineering_manager/run")
-async def run_engineering_manager(session_id: str, request: CreateSprintPlanRequest):
+@coalesced("engineering_manager")
+async def run_engineering_manager(session_id: str, request: CreateSprintPlanRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Creating Sprint Plan...")
-    result = await eng_manager_agent.create_sprint_plan(request.user_stories, request.architecture, session_id, app_settings.ai_model_config)
+    result = await eng_manager_agent.create_sprint_plan(
+        request.user_stories,
+        request.architecture,
+        session_id,
+        model_config,
+        planning_mode=request.planning_mode
+    )
     session.add_log("Sprint Plan created")
     
     # Save sprint plan to filesystem
@@ -225,19 +426,104 @@ def generate_story_map(sprint_plan_result: Dict[str, Any]) -> Dict[str, Any]:
     return story_map
 
 
-@app.post("/agent/backend_dev/run")
-async def run_backend_dev(session_id: str, request: WriteCodeRequest):
+def _syntax_errors(report: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Files with definite local syntax errors (guesses and import warnings don't count)."""
+    return {
+        path: [issue for issue in result["issues"] if issue["severity"] == "error"]
+        for path, result in report.items()
+        if any(issue["severity"] == "error" for issue in result["issues"])
+    }
+
+async def repair_generated_files(
+    session: Any,
+    session_id: str,
+    task: Dict[str, Any],
+    files: List[Dict[str, Any]],
+    model_config: ModelConfig
+) -> tuple:
+    """
+    Syntax-check generated files and send only the broken ones to the debugger.
+
+    Up to SAVE_REPAIR_MAX_ATTEMPTS rounds; a fix is only taken if the file
+    then parses cleanly, so a bad repair never replaces the generated code.
+
+    Returns:
+        (files with repairs applied, {"repaired": [...], "broken": {path: issues}, "attempts": n})
+    """
+    from app.services.static_analysis import static_analyzer
+
+    contents = {f["path"]: f["content"] for f in files}
+    broken = _syntax_errors(await static_analyzer.analyze(contents))
+    validation = {"repaired": [], "broken": broken, "attempts": 0}
+
+    while broken and validation["attempts"] < settings.SAVE_REPAIR_MAX_ATTEMPTS:
+        validation["attempts"] += 1
+        session.add_log(f"🩹 Repairing syntax errors in {', '.join(sorted(broken))} (attempt {validation['attempts']})")
+        error_message = "\n".join(
+            f"{path}:{issue['line']}:{issue['column'] or 0}: {issue['message']}"
+            for path, issues in broken.items()
+            for issue in issues
+        )
+        try:
+            result = await debugger_agent.debug_code(
+                error_message=f"Generated files do not parse. Return the complete corrected files.\n{error_message}",
+                code_files={path: contents[path] for path in broken},
+                context={"task": task},
+                session_id=session_id,
+                model_config=model_config
+            )
+        except Exception as e:
+            logger.error(f"Syntax repair for task {task.get('task_id')} failed: {e}")
+            break
+
+        fixes = {
+            fix["path"]: fix["content"]
+            for fix in (result.get("fixes") or [] if isinstance(result, dict) else [])
+            if isinstance(fix, dict) and fix.get("path") in broken and isinstance(fix.get("content"), str)
+        }
+        if not fixes:
+            break
+        checked = _syntax_errors(await static_analyzer.analyze(fixes))
+        for path, content in fixes.items():
+            # Checkers stop at the first error, so fewer reported errors
+            # doesn't mean better code: only a clean parse replaces the file
+            if path not in checked:
+                contents[path] = content
+                validation["repaired"].append(path)
+        broken = _syntax_errors(await static_analyzer.analyze({path: contents[path] for path in broken}))
+        validation["broken"] = broken
+
+    repaired_files = [{**f, "content": contents[f["path"]]} for f in files]
+    return repaired_files, validation
+
+async def execute_dev_task(
+    agent: Any,
+    label: str,
+    session: Any,
+    session_id: str,
+    task: Dict[str, Any],
+    context: Dict[str, Any],
+    model_config: ModelConfig
+) -> Dict[str, Any]:
+    """
+    Run a backend/frontend dev task, save its files and mark it complete.
+
+    Shared by the /agent/*_dev/run endpoints and the server-side sprint executor.
+
+    Returns:
+        The agent result on success, or an error info dict (with "error",
+        "error_type", "retry_after", ...) when the agent call failed
+    """
     from app.utils.error_handler import handle_adk_errors
     
-    session = orchestrator.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session.add_log(f"Writing Backend Code for task: {request.task.get('title')}...")
+    task_id = task.get('task_id')
+    if task_id:
+        sprint_journal.append(session_id, "task_started", task_id=task_id, agent=agent.name)
+    session.add_log(f"Writing {label} Code for task: {task.get('title')}...")
     
     # Wrap the agent call with error handler
     async def execute_task():
-        return await backend_dev_agent.write_code(request.task, request.context, session_id, app_settings.ai_model_config)
+        return await agent.write_code(task, context, session_id, model_config)
     
     result = await handle_adk_errors(execute_task)
     
@@ -249,31 +535,83 @@ async def run_backend_dev(session_id: str, request: WriteCodeRequest):
             "retry_after": result.get("retry_after"),
             "recoverable": result.get("recoverable"),
             "suggestion": result.get("suggestion"),
-            "task_id": request.task.get('task_id')
+            "task_id": task.get('task_id')
         }
-        session.add_log(f"❌ Error: {result.get('error')}")
+        session.add_error(
+            f"❌ Error: {result.get('error')}",
+            error_type=result.get("error_type"),
+            task_id=task_id,
+            retry_after=result.get("retry_after")
+        )
         if result.get("suggestion"):
             session.add_log(f"💡 Suggestion: {result.get('suggestion')}")
+        if task_id:
+            sprint_journal.append(session_id, "task_failed", task_id=task_id, error=error_info["error"], error_type=error_info["error_type"])
         
         # Return error info instead of raising HTTPException
         return error_info
     
     # Success path
     actual_result = result.get("data")
-    session.add_log("Backend Code written")
+    session.add_log(f"{label} Code written")
+    
+    # Agent output that failed to parse is an error, not a completed task
+    if isinstance(actual_result, dict) and "error" in actual_result and "files" not in actual_result:
+        if task_id:
+            sprint_journal.append(session_id, "task_failed", task_id=task_id, error=actual_result.get("error"), error_type=actual_result.get("error_type"))
+        return {**actual_result, "task_id": task_id}
+    
+    files = [
+        f for f in (actual_result.get("files", []) if isinstance(actual_result, dict) else [])
+        if isinstance(f, dict) and "path" in f and "content" in f
+    ]
+
+    # Files that don't parse are repaired by the debugger before anything is saved
+    validation = None
+    if files:
+        files, validation = await repair_generated_files(session, session_id, task, files, model_config)
+        actual_result = {**actual_result, "files": files, "validation": validation}
+        for path in validation["repaired"]:
+            session.add_log(f"🩹 Repaired syntax errors in {path}")
+
+    # Journal what was generated before writing it, so a crash mid-save can
+    # tell a fully written task from a partial one
+    if task_id:
+        sprint_journal.append(session_id, "task_generated", task_id=task_id, files=[
+            {"path": f["path"], "sha256": hashlib.sha256(f["content"].encode('utf-8')).hexdigest()}
+            for f in files
+        ], valid=not (validation and validation["broken"]))
     
     # Save code files
-    if "files" in actual_result:
-        for file in actual_result["files"]:
-            try:
-                file_path = project_storage.save_code_file(session_id, file["path"], file["content"])
-                session.add_log(f"💾 Saved {file['path']}")
-            except Exception as e:
-                logger.error(f"Failed to save file {file.get('path')}: {e}")
-    
+    for file in files:
+        try:
+            file_path = project_storage.save_code_file(session_id, file["path"], file["content"])
+            session.add_log(f"💾 Saved {file['path']}")
+            if task_id:
+                sprint_journal.append(session_id, "file_written", task_id=task_id, path=file["path"])
+        except Exception as e:
+            logger.error(f"Failed to save file {file.get('path')}: {e}")
+
+    if validation and validation["broken"]:
+        # Saved so they can be inspected or debugged, but the task isn't done
+        broken = sorted(validation["broken"])
+        error_info = {
+            "error": f"Generated code still has syntax errors in: {', '.join(broken)}",
+            "error_type": "syntax_error",
+            "recoverable": True,
+            "suggestion": "Retry the task, or run the debugger on the listed files",
+            "task_id": task_id,
+            "validation": validation
+        }
+        session.add_error(f"❌ {error_info['error']}", error_type="syntax_error", task_id=task_id)
+        if task_id:
+            sprint_journal.append(session_id, "task_failed", task_id=task_id, error=error_info["error"], error_type="syntax_error")
+        return error_info
+
     # Save task status as complete
-    task_id = request.task.get('task_id')
     if task_id:
+        sprint_journal.append(session_id, "task_completed", task_id=task_id)
+        session.publish("task_status", task_id=task_id, status="complete")
         try:
             project_storage.save_task_status(session_id, task_id, 'complete')
             session.add_log(f"✅ Task {task_id} marked as complete")
@@ -282,76 +620,127 @@ async def run_backend_dev(session_id: str, request: WriteCodeRequest):
     
     return actual_result
 
-@app.post("/agent/frontend_dev/run")
-async def run_frontend_dev(session_id: str, request: WriteCodeRequest):
-    from app.utils.error_handler import handle_adk_errors
+@app.post("/agent/backend_dev/run")
+@coalesced("backend_dev")
+async def run_backend_dev(session_id: str, request: WriteCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    session = orchestrator.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
     
+    context = resolve_context(session_id, request.context, request.context_refs, DEFAULT_CONTEXT_STEPS)
+    return await execute_dev_task(
+        backend_dev_agent, "Backend", session, session_id,
+        request.task, context, model_config
+    )
+
+@app.post("/agent/frontend_dev/run")
+@coalesced("frontend_dev")
+async def run_frontend_dev(session_id: str, request: WriteCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session.add_log(f"Writing Frontend Code for task: {request.task.get('title')}...")
+    context = resolve_context(session_id, request.context, request.context_refs, DEFAULT_CONTEXT_STEPS)
+    return await execute_dev_task(
+        frontend_dev_agent, "Frontend", session, session_id,
+        request.task, context, model_config
+    )
+
+@app.post("/sprint/{session_id}/run")
+async def run_sprint(session_id: str, request: RunSprintRequest, model_config: ModelConfig = Depends(get_model_config)):
+    """
+    Execute the saved sprint plan on the server.
     
-    # Wrap the agent call with error handler
-    async def execute_task():
-        return await frontend_dev_agent.write_code(request.task, request.context, session_id, app_settings.ai_model_config)
+    Independent tasks run concurrently on a bounded worker pool; tasks whose
+    dependencies fail are skipped while other stories keep going. The run
+    continues in the background, so poll GET /sprint/{session_id} for progress.
+    """
+    from app.core.sprint_executor import sprint_executor
     
-    result = await handle_adk_errors(execute_task)
+    session = orchestrator.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    # Check if there was an error
-    if not result.get("success"):
-        error_info = {
-            "error": result.get("error"),
-            "error_type": result.get("error_type"),
-            "retry_after": result.get("retry_after"),
-            "recoverable": result.get("recoverable"),
-            "suggestion": result.get("suggestion"),
-            "task_id": request.task.get('task_id')
-        }
-        session.add_log(f"❌ Error: {result.get('error')}")
-        if result.get("suggestion"):
-            session.add_log(f"💡 Suggestion: {result.get('suggestion')}")
-        
-        # Return error info instead of raising HTTPException
-        return error_info
+    # A duplicate start (double click, re-run effect) attaches to the running sprint
+    if sprint_executor.is_running(session_id):
+        return sprint_executor.get_run(session_id)
+    
+    sprint_plan = project_storage.load_step(session_id, "sprint_plan")
+    tasks = sprint_plan.get("sprint_plan", []) if isinstance(sprint_plan, dict) else (sprint_plan or [])
+    if not tasks:
+        raise HTTPException(status_code=404, detail="Sprint plan not found")
+    
+    context = resolve_context(session_id, request.context, None, DEFAULT_CONTEXT_STEPS)
+    
+    completed = set()
+    if request.resume:
+        statuses = project_storage.load_task_statuses(session_id)
+        completed = {task_id for task_id, status in statuses.items() if status == 'complete'}
+    
+    # model_config is this request's own copy, so a settings change made
+    # while the sprint runs in the background doesn't mix models mid-sprint
+    async def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+        if "frontend" in (task.get("assignee") or "").lower():
+            return await execute_dev_task(frontend_dev_agent, "Frontend", session, session_id, task, context, model_config)
+        return await execute_dev_task(backend_dev_agent, "Backend", session, session_id, task, context, model_config)
+    
+    def on_status(task_id: str, status: str):
+        # 'complete' is persisted and published by execute_dev_task itself
+        if status != "complete":
+            session.publish("task_status", task_id=task_id, status=status, error=sprint_executor.runs[session_id].errors.get(task_id))
+        if status in ("error", "skipped"):
+            project_storage.save_task_status(session_id, task_id, status)
+        if status == "skipped":
+            sprint_journal.append(session_id, "task_skipped", task_id=task_id, error=sprint_executor.runs[session_id].errors.get(task_id))
+    
+    def on_finish(run):
+        sprint_journal.append(session_id, "run_finished", status=run.status, summary=run.summary())
+    
+    max_workers = request.max_workers or settings.SPRINT_MAX_WORKERS
+    try:
+        run = sprint_executor.start(
+            session_id,
+            tasks,
+            run_task,
+            max_workers=max_workers,
+            completed=completed,
+            on_status=on_status,
+            log=session.add_log,
+            on_finish=on_finish
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Success path
-    actual_result = result.get("data")
-    session.add_log("Frontend Code written")
+    sprint_journal.append(session_id, "run_started", max_workers=max_workers, total_tasks=len(tasks), resume=request.resume)
+    return run
+
+@app.get("/sprint/{session_id}")
+async def get_sprint_status(session_id: str):
+    """Get progress of the server-side sprint run for a session"""
+    from app.core.sprint_executor import sprint_executor
     
-    # Save code files
-    if "files" in actual_result:
-        for file in actual_result["files"]:
-            try:
-                file_path = project_storage.save_code_file(session_id, file["path"], file["content"])
-                session.add_log(f"💾 Saved {file['path']}")
-            except Exception as e:
-                logger.error(f"Failed to save file {file.get('path')}: {e}")
+    run = sprint_executor.get_run(session_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="No sprint run found for this session")
     
-    # Save task status as complete
-    task_id = request.task.get('task_id')
-    if task_id:
-        try:
-            project_storage.save_task_status(session_id, task_id, 'complete')
-            session.add_log(f"✅ Task {task_id} marked as complete")
-        except Exception as e:
-            logger.error(f"Failed to save task status: {e}")
-                
-    return actual_result
+    return {**run.model_dump(), "summary": run.summary()}
 
 @app.post("/agent/qa_agent/run")
-async def run_qa_agent(session_id: str, request: ReviewCodeRequest):
+@coalesced("qa_agent")
+async def run_qa_agent(session_id: str, request: ReviewCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Reviewing Code...")
-    result = await qa_agent.review_code(request.code_files, session_id, app_settings.ai_model_config)
+    code_files = resolve_code_files(session_id, request.code_files, request.code_refs)
+    result = await qa_agent.review_code(code_files, session_id, model_config)
     session.add_log("Code Review complete")
     return result
 
 @app.post("/agent/e2e_test/generate")
-async def generate_e2e_tests(session_id: str):
+@coalesced("e2e_test")
+async def generate_e2e_tests(session_id: str, model_config: ModelConfig = Depends(get_model_config)):
     """
     Generate comprehensive E2E test plan after all development tasks are complete.
     """
@@ -381,7 +770,7 @@ async def generate_e2e_tests(session_id: str):
             backend_code=backend_code,
             frontend_code=frontend_code,
             session_id=session_id,
-            model_config=app_settings.ai_model_config
+            model_config=model_config
         )
         
         session.add_log(f"✓ Generated {result.get('coverage_summary', {}).get('total_test_cases', 0)} test cases")
@@ -397,11 +786,12 @@ async def generate_e2e_tests(session_id: str):
         
     except Exception as e:
         logger.error(f"Failed to generate E2E tests: {e}")
-        session.add_log(f"❌ Failed to generate E2E tests: {str(e)}")
+        session.add_error(f"❌ Failed to generate E2E tests: {str(e)}", agent="e2e_test")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/agent/walkthrough/generate")
-async def generate_walkthrough(session_id: str, type: str = "text"):
+@coalesced("walkthrough")
+async def generate_walkthrough(session_id: str, type: str = "text", model_config: ModelConfig = Depends(get_model_config)):
     """
     Generate code walkthrough in text, image, or video format.
     
@@ -444,7 +834,7 @@ async def generate_walkthrough(session_id: str, type: str = "text"):
             walkthrough_type=type,
             project_data=project_data,
             session_id=session_id,
-            model_config=app_settings.ai_model_config
+            model_config=model_config
         )
         
         session.add_log(f"✓ Generated {type} walkthrough with {len(result.get('sections', []))} sections")
@@ -460,18 +850,19 @@ async def generate_walkthrough(session_id: str, type: str = "text"):
         
     except Exception as e:
         logger.error(f"Failed to generate walkthrough: {e}")
-        session.add_log(f"❌ Failed to generate walkthrough: {str(e)}")
+        session.add_error(f"❌ Failed to generate walkthrough: {str(e)}", agent="walkthrough")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/agent/software_architect/run")
-async def run_software_architect(session_id: str, request: DesignArchitectureRequest):
+@coalesced("software_architect")
+async def run_software_architect(session_id: str, request: DesignArchitectureRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Designing architecture...")
-    result = await architect_agent.design_architecture(request.requirements, session_id, app_settings.ai_model_config)
+    result = await architect_agent.design_architecture(request.requirements, session_id, model_config)
     session.add_log("Architecture design complete")
     
     # Save to filesystem
@@ -484,13 +875,14 @@ async def run_software_architect(session_id: str, request: DesignArchitectureReq
     return result
 
 @app.post("/agent/ux_designer/run")
-async def run_ux_designer(session_id: str, request: DesignUIRequest):
+@coalesced("ux_designer")
+async def run_ux_designer(session_id: str, request: DesignUIRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Designing UI...")
-    result = await ux_agent.design_ui(request.requirements, session_id, app_settings.ai_model_config)
+    result = await ux_agent.design_ui(request.requirements, session_id, model_config)
     session.add_log("UI design complete")
     return result
 
@@ -516,8 +908,91 @@ async def get_session(session_id: str):
         raise HTTPException(status_code=404, detail="Session not found")
     return session
 
+@app.get("/session/{session_id}/events")
+async def get_session_events(
+    session_id: str,
+    since: Optional[int] = None,
+    types: Optional[str] = Query(default=None, description="Comma-separated event types (log, task_status, artifact_saved, error)")
+):
+    """
+    Get session events newer than `since` (the last event id the client saw).
+    
+    "truncated" is true when some events after `since` were already dropped
+    from the session's bounded buffer; re-fetch full state in that case.
+    """
+    session = orchestrator.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    events, truncated = session.events.since(since, parse_event_types(types))
+    return {"events": events, "last_event_id": session.events.last_event_id, "truncated": truncated}
+
+@app.get("/session/{session_id}/events/stream")
+async def stream_session_events(
+    session_id: str,
+    since: Optional[int] = None,
+    types: Optional[str] = None,
+    last_event_id: Optional[str] = Header(default=None)
+):
+    """
+    Subscribe to session events as Server-Sent Events.
+    
+    Buffered events after Last-Event-ID (sent automatically by EventSource on
+    reconnect) or `since` are replayed first, then live events follow:
+      id: <event id>   event: <log | task_status | artifact_saved | error>   data: <event>
+    An "truncated" event means some events were missed; re-fetch full state.
+    """
+    from fastapi.responses import StreamingResponse
+    from fastapi.encoders import jsonable_encoder
+    
+    session = orchestrator.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    event_types = parse_event_types(types)
+    
+    async def event_stream():
+        _, truncated = session.events.since(since)
+        if truncated:
+            yield _sse("truncated", {"last_event_id": session.events.last_event_id})
+        
+        subscription = session.events.subscribe(since, event_types)
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(subscription.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=SSE_KEEPALIVE_SECONDS)
+                if not done:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                try:
+                    event = pending.result()
+                except StopAsyncIteration:
+                    return
+                pending = None
+                if event is None:
+                    # Fell behind; the client reconnects and resumes from its last id
+                    return
+                yield f"id: {event.id}\n" + _sse(event.type, jsonable_encoder(event))
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            await subscription.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/agent/idea_generator/run")
-async def run_idea_generator(session_id: str, request: GenerateIdeasRequest):
+@coalesced("idea_generator")
+async def run_idea_generator(session_id: str, request: GenerateIdeasRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -528,8 +1003,8 @@ async def run_idea_generator(session_id: str, request: GenerateIdeasRequest):
     try:
         # Add timeout to prevent hanging
         result = await asyncio.wait_for(
-            idea_agent.generate_ideas(request.keywords, session_id, app_settings.ai_model_config),
-            timeout=app_settings.ai_model_config.timeout
+            idea_agent.generate_ideas(request.keywords, session_id, model_config),
+            timeout=model_config.timeout
         )
         
         session.add_log("Ideas generated successfully")
@@ -557,25 +1032,26 @@ async def run_idea_generator(session_id: str, request: GenerateIdeasRequest):
         return result
         
     except asyncio.TimeoutError:
-        error_msg = f"Idea generation timed out after {app_settings.ai_model_config.timeout}s"
+        error_msg = f"Idea generation timed out after {model_config.timeout}s"
         logger.error(f"[IdeaGenerator] {error_msg}")
-        session.add_log(f"ERROR: {error_msg}")
+        session.add_error(f"ERROR: {error_msg}", agent="idea_generator", error_type="timeout")
         raise HTTPException(status_code=504, detail=error_msg)
     
     except Exception as e:
         error_msg = f"Error generating ideas: {str(e)}"
         logger.error(f"[IdeaGenerator] {error_msg}", exc_info=True)
-        session.add_log(f"ERROR: {error_msg}")
+        session.add_error(f"ERROR: {error_msg}", agent="idea_generator")
         raise HTTPException(status_code=500, detail=error_msg)
 
 @app.post("/agent/product_requirements/run")
-async def run_product_requirements(session_id: str, request: GeneratePRDRequest):
+@coalesced("product_requirements")
+async def run_product_requirements(session_id: str, request: GeneratePRDRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Generating PRD...")
-    result = await prd_agent.generate_prd(request.idea_context, session_id, app_settings.ai_model_config)
+    result = await prd_agent.generate_prd(request.idea_context, session_id, model_config)
     session.add_log("PRD generated successfully")
     
     # Save to filesystem
@@ -646,22 +1122,45 @@ async def get_available_models(provider: str):
 @app.get("/health")
 async def health_check():
     """Health check endpoint with detailed status"""
+    from app.core.runner_pool import runner_pool
+    from app.services.response_cache import response_cache
+    from app.services.project_export import project_exporter
+    from app.services.project_snapshot import project_snapshotter
+    from app.services.static_analysis import static_analyzer
+    from app.utils.prompt_builder import prompt_stats
+    from app.core.retry_scheduler import retry_scheduler
+    from app.core.concurrency_limiter import concurrency_limiter
+    from app.core.job_manager import job_manager
+    
     return {
         "status": "healthy",
         "active_sessions": len(orchestrator.sessions),
         "model_provider": app_settings.ai_model_config.provider,
         "model_name": app_settings.ai_model_config.model_name,
-        "debug_mode": app_settings.debug_mode
+        "debug_mode": app_settings.debug_mode,
+        "runner_pool": runner_pool.stats(),
+        "response_cache": response_cache.stats(),
+        "export_cache": project_exporter.stats(),
+        "artifact_cache": artifact_cache.stats(),
+        "snapshot_cache": project_snapshotter.stats(),
+        "static_analysis": static_analyzer.stats(),
+        "prompt_budget": prompt_stats.stats(),
+        "retry_scheduler": retry_scheduler.stats(),
+        "model_concurrency": concurrency_limiter.stats(),
+        "single_flight": single_flight.stats(),
+        "jobs": job_manager.stats(),
+        "sprint_journal": sprint_journal.stats()
     }
 
 @app.post("/agent/requirement_analysis/run")
-async def run_requirement_analysis(session_id: str, request: AnalyzePRDRequest):
+@coalesced("requirement_analysis")
+async def run_requirement_analysis(session_id: str, request: AnalyzePRDRequest, model_config: ModelConfig = Depends(get_model_config)):
     session = orchestrator.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.add_log("Analyzing PRD...")
-    result = await analysis_agent.analyze_prd(request.prd_content, session_id, app_settings.ai_model_config)
+    result = await analysis_agent.analyze_prd(request.prd_content, session_id, model_config)
     session.add_log("PRD analysis complete")
     
     # Save to filesystem
@@ -675,28 +1174,60 @@ async def run_requirement_analysis(session_id: str, request: AnalyzePRDRequest):
 
 # Project Management Endpoints
 @app.get("/projects")
-async def list_projects():
-    """List all projects"""
-    return project_storage.list_projects()
+async def list_projects(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None
+):
+    """
+    List projects, most recently modified first.
+    Without limit/cursor the full list is returned; with them, one page
+    plus the next_cursor to pass back for the following page.
+    """
+    if limit is None and cursor is None:
+        return project_storage.list_projects(q=q)
+    try:
+        return project_storage.query_projects(limit=limit or 50, cursor=cursor, q=q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/projects/reindex")
+async def reindex_projects():
+    """Rebuild the project listing index from the project directories"""
+    count = await asyncio.to_thread(project_storage.rebuild_index)
+    return {"status": "success", "indexed": count}
 
 @app.get("/projects/{session_id}")
-async def get_project_summary(session_id: str):
-    """Get project summary and file list"""
-    return project_storage.get_project_summary(session_id)
+async def get_project_summary(session_id: str, validate: bool = False):
+    """
+    Get project summary and file list.
+    Pass validate=true to re-check the file manifest against the directory.
+    """
+    return project_storage.get_project_summary(session_id, validate=validate)
 
 @app.get("/projects/{session_id}/export")
 async def export_project(session_id: str):
-    """Export project as ZIP file"""
-    from fastapi.responses import FileResponse
+    """
+    Export project as ZIP file.
+    The archive is streamed as it is built; unchanged projects are served
+    from the export cache.
+    """
+    from fastapi.responses import FileResponse, StreamingResponse
+    from app.services.project_export import project_exporter
     
-    zip_path = project_storage.export_project(session_id)
-    if not zip_path:
+    filename = f"project-{session_id}.zip"
+    cached_path = await asyncio.to_thread(project_exporter.get_cached, session_id)
+    if cached_path:
+        return FileResponse(path=str(cached_path), media_type="application/zip", filename=filename)
+    
+    chunks = await asyncio.to_thread(project_exporter.stream, session_id)
+    if chunks is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return FileResponse(
-        path=str(zip_path),
+    return StreamingResponse(
+        chunks,
         media_type="application/zip",
-        filename=f"project-{session_id}.zip"
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 
@@ -709,10 +1240,58 @@ async def get_task_statuses(session_id: str):
 @app.post("/projects/{session_id}/task_statuses")
 async def save_task_statuses(session_id: str, task_statuses: dict):
     """Save task execution statuses"""
+    project_storage.save_task_statuses(session_id, task_statuses)
     for task_id, status in task_statuses.items():
-        project_storage.save_task_status(session_id, task_id, status)
+        orchestrator.publish(session_id, "task_status", task_id=task_id, status=status)
     return {"status": "success", "saved_count": len(task_statuses)}
 
+@app.get("/projects/{session_id}/snapshot")
+async def get_project_snapshot(
+    session_id: str,
+    fields: Optional[str] = None,
+    steps: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None)
+):
+    """
+    Get everything needed to restore a project in one response.
+    fields is a comma-separated subset of project, steps, task_statuses,
+    files and code (default: all but code); steps limits which step outputs
+    are included. Responses carry an ETag, so a client revalidating with
+    If-None-Match gets a 304 when nothing changed, and are gzipped when the
+    client accepts it.
+    """
+    from fastapi.responses import Response
+    from app.services.project_snapshot import DEFAULT_SNAPSHOT_FIELDS, SNAPSHOT_FIELDS, project_snapshotter
+
+    selected = {f.strip() for f in fields.split(",") if f.strip()} if fields else set(DEFAULT_SNAPSHOT_FIELDS)
+    unknown = selected - SNAPSHOT_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown snapshot fields: {', '.join(sorted(unknown))}")
+    step_names = {s.strip() for s in steps.split(",") if s.strip()} if steps is not None else None
+
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if if_none_match:
+        etag = await asyncio.to_thread(project_snapshotter.etag, session_id, selected, step_names)
+        if etag is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if f'"{etag}"' in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers={**headers, "ETag": f'"{etag}"'})
+
+    accepts_gzip = any(
+        part.split(";")[0].strip().lower() == "gzip" and "q=0" not in part.replace(" ", "")
+        for part in (accept_encoding or "").split(",")
+    )
+    snapshot = await asyncio.to_thread(project_snapshotter.get, session_id, selected, step_names, accepts_gzip)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    etag, body, gzipped = snapshot
+    headers["ETag"] = f'"{etag}"'
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/projects/{session_id}/{step_name}")
 async def get_project_step(session_id: str, step_name: str):
     """Get a specific step's output"""
@@ -725,8 +1304,7 @@ async def get_project_step(session_id: str, step_name: str):
 @app.get("/projects/{session_id}/code/{file_path:path}")
 async def get_code_file(session_id: str, file_path: str):
     """Get a specific code file's content"""
-    project_dir = project_storage.get_project_dir(session_id)
-    code_file = project_dir / "code" / file_path
+    code_file = project_storage.base_dir / session_id / "code" / file_path
     
     if not code_file.exists():
         raise HTTPException(status_code=404, detail=f"File '{file_path}' not found")
@@ -741,7 +1319,8 @@ async def get_code_file(session_id: str, file_path: str):
     }
 
 @app.post("/agent/debugger/debug")
-async def debug_code(session_id: str, request: DebugCodeRequest):
+@coalesced("debugger_debug")
+async def debug_code(session_id: str, request: DebugCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
     """Debug code based on error messages"""
     session = orchestrator.get_session(session_id)
     if not session:
@@ -749,15 +1328,20 @@ async def debug_code(session_id: str, request: DebugCodeRequest):
     
     session.add_log(f"Debugger analyzing error: {request.error_message[:100]}...")
     
+    code_files = resolve_code_files(session_id, request.code_files, request.code_refs)
+    context = resolve_context(session_id, request.context, request.context_refs or None)
+    
     result = await debugger_agent.debug_code(
         error_message=request.error_message,
-        code_files=request.code_files,
-        context=request.context,
+        code_files=code_files,
+        context=context,
         session_id=session_id,
-        model_config=app_settings.ai_model_config
+        model_config=model_config
     )
     
     session.add_log("Debugger analysis complete")
+    for rejected in result.get("rejected_fixes", []):
+        session.add_log(f"⚠️ Not applying fix to {rejected['path']}: {rejected['reason']}")
     
     # Save fixed files if provided
     if "fixes" in result:
@@ -775,7 +1359,8 @@ async def debug_code(session_id: str, request: DebugCodeRequest):
     return result
 
 @app.post("/agent/debugger/lint")
-async def lint_code(session_id: str, request: LintCodeRequest):
+@coalesced("debugger_lint")
+async def lint_code(session_id: str, request: LintCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
     """Perform static analysis and linting"""
     session = orchestrator.get_session(session_id)
     if not session:
@@ -783,13 +1368,272 @@ async def lint_code(session_id: str, request: LintCodeRequest):
     
     session.add_log("Running static analysis...")
     
+    code_files = resolve_code_files(session_id, request.code_files, request.code_refs)
+    
     result = await debugger_agent.lint_code(
-        code_files=request.code_files,
+        code_files=code_files,
         session_id=session_id,
-        model_config=app_settings.ai_model_config
+        model_config=model_config,
+        deep=request.deep
     )
     
+    local_analysis = result.get("local_analysis")
+    if local_analysis:
+        session.add_log(
+            f"🔎 Local checks cleared {len(local_analysis['cleared'])} of {len(code_files)} files; "
+            f"{len(local_analysis['sent_to_model'])} sent to the model"
+        )
     session.add_log("Static analysis complete")
     
     return result
 
+
+# Streaming Endpoints
+# Each /stream variant runs the same handler as its non-streaming endpoint
+# (so results are still saved through project_storage.save_step) while the
+# model output is forwarded as Server-Sent Events:
+#   event: token     data: {"text": "..."}              (as the model writes)
+#   event: progress  data: {"key": "...", "chars": n}   (a top-level JSON key finished)
+#   event: result    data: <same body the /run endpoint returns>
+#   event: error     data: {"error": "...", "status_code": n}
+#   event: done      data: {}
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def stream_agent_run(handler, *args, **kwargs):
+    """Run an agent endpoint handler and stream its model output as SSE."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import StreamingResponse
+    from app.utils.adk_helper import stream_to, StreamingJSONAssembler
+    
+    async def event_stream():
+        sink: asyncio.Queue = asyncio.Queue()
+        assembler = StreamingJSONAssembler()
+        
+        async def run():
+            with stream_to(sink):
+                return await handler(*args, **kwargs)
+        
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                getter = asyncio.ensure_future(sink.get())
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                
+                chunk = getter.result()
+                yield _sse("token", {"text": chunk})
+                for key in assembler.feed(chunk):
+                    yield _sse("progress", {"key": key, "chars": len(assembler.text)})
+            
+            # Flush chunks that arrived in the same tick the handler finished
+            while not sink.empty():
+                yield _sse("token", {"text": sink.get_nowait()})
+            
+            yield _sse("result", jsonable_encoder(task.result()))
+        except HTTPException as e:
+            yield _sse("error", {"error": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Streaming handler failed: {e}", exc_info=True)
+            yield _sse("error", {"error": str(e), "status_code": 500})
+        finally:
+            # Client went away mid-stream: stop paying for the model call
+            if not task.done():
+                task.cancel()
+        
+        yield _sse("done", {})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/agent/idea_generator/run/stream")
+async def stream_idea_generator(session_id: str, request: GenerateIdeasRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_idea_generator, session_id, request, model_config)
+
+@app.post("/agent/product_requirements/run/stream")
+async def stream_product_requirements(session_id: str, request: GeneratePRDRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_product_requirements, session_id, request, model_config)
+
+@app.post("/agent/requirement_analysis/run/stream")
+async def stream_requirement_analysis(session_id: str, request: AnalyzePRDRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_requirement_analysis, session_id, request, model_config)
+
+@app.post("/agent/software_architect/run/stream")
+async def stream_software_architect(session_id: str, request: DesignArchitectureRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_software_architect, session_id, request, model_config)
+
+@app.post("/agent/ux_designer/run/stream")
+async def stream_ux_designer(session_id: str, request: DesignUIRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_ux_designer, session_id, request, model_config)
+
+@app.post("/agent/engineering_manager/run/stream")
+async def stream_engineering_manager(session_id: str, request: CreateSprintPlanRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_engineering_manager, session_id, request, model_config)
+
+@app.post("/agent/backend_dev/run/stream")
+async def stream_backend_dev(session_id: str, request: WriteCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_backend_dev, session_id, request, model_config)
+
+@app.post("/agent/frontend_dev/run/stream")
+async def stream_frontend_dev(session_id: str, request: WriteCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_frontend_dev, session_id, request, model_config)
+
+@app.post("/agent/qa_agent/run/stream")
+async def stream_qa_agent(session_id: str, request: ReviewCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(run_qa_agent, session_id, request, model_config)
+
+@app.post("/agent/e2e_test/generate/stream")
+async def stream_e2e_tests(session_id: str, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(generate_e2e_tests, session_id, model_config)
+
+@app.post("/agent/walkthrough/generate/stream")
+async def stream_walkthrough(session_id: str, type: str = "text", model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(generate_walkthrough, session_id, type, model_config)
+
+@app.post("/agent/debugger/debug/stream")
+async def stream_debug_code(session_id: str, request: DebugCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(debug_code, session_id, request, model_config)
+
+@app.post("/agent/debugger/lint/stream")
+async def stream_lint_code(session_id: str, request: LintCodeRequest, model_config: ModelConfig = Depends(get_model_config)):
+    return stream_agent_run(lint_code, session_id, request, model_config)
+
+
+# Background Jobs
+# Each /job variant queues the same handler as its /run endpoint and returns
+# 202 with a job record right away. Poll GET /jobs/{job_id} or subscribe to
+# GET /jobs/{job_id}/events; POST /jobs/{job_id}/cancel aborts the model call.
+# Jobs are aborted after deadline_seconds (default JOB_DEFAULT_DEADLINE_SECONDS).
+
+def submit_agent_job(agent: str, deadline_seconds: Optional[float], handler, session_id: str, *args):
+    """Queue an agent endpoint handler as a background job."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.core.job_manager import job_manager
+    
+    session = orchestrator.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    deadline = min(deadline_seconds or settings.JOB_DEFAULT_DEADLINE_SECONDS, settings.JOB_MAX_DEADLINE_SECONDS)
+    job = job_manager.submit(session_id, agent, lambda: handler(session_id, *args), deadline)
+    session.add_log(f"📋 Queued {agent} job {job.job_id}")
+    return JSONResponse(status_code=202, content=jsonable_encoder(job))
+
+@app.post("/agent/idea_generator/run/job")
+async def job_idea_generator(session_id: str, request: GenerateIdeasRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("idea_generator", deadline_seconds, run_idea_generator, session_id, request, model_config)
+
+@app.post("/agent/product_requirements/run/job")
+async def job_product_requirements(session_id: str, request: GeneratePRDRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("product_requirements", deadline_seconds, run_product_requirements, session_id, request, model_config)
+
+@app.post("/agent/requirement_analysis/run/job")
+async def job_requirement_analysis(session_id: str, request: AnalyzePRDRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("requirement_analysis", deadline_seconds, run_requirement_analysis, session_id, request, model_config)
+
+@app.post("/agent/software_architect/run/job")
+async def job_software_architect(session_id: str, request: DesignArchitectureRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("software_architect", deadline_seconds, run_software_architect, session_id, request, model_config)
+
+@app.post("/agent/ux_designer/run/job")
+async def job_ux_designer(session_id: str, request: DesignUIRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("ux_designer", deadline_seconds, run_ux_designer, session_id, request, model_config)
+
+@app.post("/agent/engineering_manager/run/job")
+async def job_engineering_manager(session_id: str, request: CreateSprintPlanRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("engineering_manager", deadline_seconds, run_engineering_manager, session_id, request, model_config)
+
+@app.post("/agent/backend_dev/run/job")
+async def job_backend_dev(session_id: str, request: WriteCodeRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("backend_dev", deadline_seconds, run_backend_dev, session_id, request, model_config)
+
+@app.post("/agent/frontend_dev/run/job")
+async def job_frontend_dev(session_id: str, request: WriteCodeRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("frontend_dev", deadline_seconds, run_frontend_dev, session_id, request, model_config)
+
+@app.post("/agent/qa_agent/run/job")
+async def job_qa_agent(session_id: str, request: ReviewCodeRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("qa_agent", deadline_seconds, run_qa_agent, session_id, request, model_config)
+
+@app.post("/agent/e2e_test/generate/job")
+async def job_e2e_tests(session_id: str, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("e2e_test", deadline_seconds, generate_e2e_tests, session_id, model_config)
+
+@app.post("/agent/walkthrough/generate/job")
+async def job_walkthrough(session_id: str, type: str = "text", deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("walkthrough", deadline_seconds, generate_walkthrough, session_id, type, model_config)
+
+@app.post("/agent/debugger/debug/job")
+async def job_debug_code(session_id: str, request: DebugCodeRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("debugger_debug", deadline_seconds, debug_code, session_id, request, model_config)
+
+@app.post("/agent/debugger/lint/job")
+async def job_lint_code(session_id: str, request: LintCodeRequest, deadline_seconds: Optional[float] = Query(default=None, gt=0), model_config: ModelConfig = Depends(get_model_config)):
+    return submit_agent_job("debugger_lint", deadline_seconds, lint_code, session_id, request, model_config)
+
+@app.get("/jobs")
+async def list_jobs(session_id: str):
+    """List a session's background jobs, newest first"""
+    from app.core.job_manager import job_manager
+    
+    return {"jobs": job_manager.list_jobs(session_id)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, session_id: Optional[str] = None):
+    """
+    Get a background job's status (and result once finished).
+    
+    Pass session_id to also find jobs that were saved by an earlier server run.
+    """
+    from app.core.job_manager import job_manager
+    
+    job = job_manager.get(job_id, session_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Subscribe to a running job as Server-Sent Events:
+      event: status  data: <job record, with the result once finished>
+      event: done    data: {}
+    """
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import StreamingResponse
+    from app.core.job_manager import job_manager
+    
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        async for job in job_manager.subscribe(job_id):
+            yield _sse("status", jsonable_encoder(job))
+        yield _sse("done", {})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a running job, aborting its model call"""
+    from app.core.job_manager import job_manager
+    
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    session = orchestrator.get_session(job.session_id)
+    if session and not job.finished:
+        session.add_log(f"🛑 Cancelling {job.agent} job {job.job_id}")
+    return job
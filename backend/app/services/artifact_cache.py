@@ -0,0 +1,142 @@
+"""
+Server-side resolution of artifact references.
+
+Agent requests can name saved step outputs ("architecture", "prd", ...) and
+project files ("code/app/main.py", optionally pinned to a content hash)
+instead of uploading their contents. References are resolved from
+ProjectStorage through a per-session cache of parsed artifacts that is
+validated against the file manifest, so a sprint parses each artifact once
+rather than once per task.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.services.project_storage import ProjectStorage, project_storage
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCache:
+    """LRU cache of parsed project artifacts keyed by (session, path) and content hash."""
+
+    def __init__(self, storage: ProjectStorage, max_bytes: int):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (session_id, rel_path) -> (sha256, size, value)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, session_id: str, rel_path: str, parse: bool) -> Optional[Any]:
+        entry = self.storage.get_file_entry(session_id, rel_path)
+        if entry is None:
+            return None
+
+        key = (session_id, rel_path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == entry["sha256"]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        with open(self.storage.base_dir / session_id / rel_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        value = json.loads(text) if parse else text
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][1]
+            self._entries[key] = (entry["sha256"], entry["size"], value)
+            self._entries.move_to_end(key)
+            self._total_bytes += entry["size"]
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= size
+        return value
+
+    def get_step(self, session_id: str, step_name: str) -> Optional[Any]:
+        """
+        Get a saved step output (parsed JSON, or markdown text).
+
+        The returned object is shared with other callers and must be treated
+        as read-only.
+        """
+        value = self._load(session_id, f"{step_name}.json", parse=True)
+        if value is None:
+            value = self._load(session_id, f"{step_name}.md", parse=False)
+        return value
+
+    def get_file(self, session_id: str, rel_path: str, sha256: Optional[str] = None) -> str:
+        """
+        Get the text of a project file by its project-relative path.
+
+        Args:
+            session_id: Session identifier
+            rel_path: Path as listed in the project summary (e.g. "code/app/main.py")
+            sha256: Expected content hash; the current content must match it
+
+        Raises:
+            KeyError: If the file doesn't exist
+            ValueError: If the file changed since the given hash was taken
+        """
+        entry = self.storage.get_file_entry(session_id, rel_path)
+        if entry is None:
+            raise KeyError(rel_path)
+        if sha256 and entry["sha256"] != sha256:
+            raise ValueError(f"File '{rel_path}' has changed (current hash {entry['sha256']})")
+        value = self._load(session_id, rel_path, parse=False)
+        if value is None:
+            raise KeyError(rel_path)
+        return value
+
+    def resolve_steps(self, session_id: str, step_names: Iterable[str], required: bool = True) -> Dict[str, Any]:
+        """
+        Resolve step references into a context dict.
+
+        Raises:
+            KeyError: If required and a step hasn't been saved
+        """
+        context = {}
+        for step_name in step_names:
+            value = self.get_step(session_id, step_name)
+            if value is None and required:
+                raise KeyError(step_name)
+            context[step_name] = value
+        return context
+
+    def resolve_files(self, session_id: str, refs: List[Dict[str, Optional[str]]]) -> Dict[str, str]:
+        """
+        Resolve file references ({"path": ..., "sha256": ...}) into a path -> content dict.
+
+        Raises:
+            KeyError: If a referenced file doesn't exist
+            ValueError: If a pinned file has changed
+        """
+        return {
+            ref["path"]: self.get_file(session_id, ref["path"], ref.get("sha256"))
+            for ref in refs
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global instance
+artifact_cache = ArtifactCache(project_storage, max_bytes=settings.ARTIFACT_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,247 @@
+"""
+Streaming ZIP export of projects.
+
+Archives are produced on the fly by a worker thread and streamed to the client
+in chunks, so no temporary ZIP is written and the event loop never blocks on
+compression. Finished archives can optionally be kept in a small disk cache
+keyed by the project's content hash, so unchanged projects download instantly.
+"""
+import io
+import logging
+import os
+import queue
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.services.project_storage import (
+    JOBS_FILE,
+    MANIFEST_FILE,
+    SPRINT_JOURNAL_FILE,
+    ProjectStorage,
+    project_storage
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Bump when the archive contents change so older cached archives aren't served
+ARCHIVE_VERSION = 3
+# Bookkeeping files left out of exports
+EXPORT_EXCLUDED_FILES = {MANIFEST_FILE, JOBS_FILE, SPRINT_JOURNAL_FILE}
+
+
+class _ExportCancelled(Exception):
+    """Raised inside the worker thread when the client goes away."""
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Non-seekable file object that hands out fixed-size chunks as the ZIP is written."""
+
+    def __init__(self, emit: Callable[[bytes], None]):
+        self._emit = emit
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._emit(bytes(self._buffer[:CHUNK_SIZE]))
+            del self._buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def finish(self):
+        """Emit whatever is left in the buffer once the archive is complete."""
+        if self._buffer:
+            self._emit(bytes(self._buffer))
+            self._buffer.clear()
+
+
+class ProjectExporter:
+    """Builds project ZIP archives as a stream, with an optional archive cache."""
+
+    def __init__(
+        self,
+        storage: ProjectStorage,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = 0
+    ):
+        self.storage = storage
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_max_bytes = cache_max_bytes
+        self._cache_lock = threading.Lock()
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cache_path(self, session_id: str, content_hash: str) -> Path:
+        return self.cache_dir / f"{session_id}-{content_hash[:16]}-v{ARCHIVE_VERSION}.zip"
+
+    def get_cached(self, session_id: str) -> Optional[Path]:
+        """Return a cached archive matching the project's current contents, if any."""
+        if not self.cache_dir:
+            return None
+        # Pending metadata/status updates are part of the archive
+        self.storage.flush()
+        content_hash = self.storage.content_hash(session_id)
+        if content_hash is None:
+            return None
+
+        path = self._cache_path(session_id, content_hash)
+        with self._cache_lock:
+            if not path.exists():
+                self.misses += 1
+                return None
+            os.utime(path)  # LRU order for eviction
+            self.hits += 1
+        return path
+
+    def stream(self, session_id: str) -> Optional[Iterator[bytes]]:
+        """
+        Start streaming a project's ZIP archive.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Iterator of archive chunks, or None if the project doesn't exist
+        """
+        if not self.storage.project_exists(session_id):
+            return None
+        self.storage.flush()
+
+        cache_path = None
+        if self.cache_dir:
+            content_hash = self.storage.content_hash(session_id)
+            cache_path = self._cache_path(session_id, content_hash)
+        return self._generate(self.storage.base_dir / session_id, session_id, cache_path)
+
+    @staticmethod
+    def _is_bookkeeping(project_dir: Path, file_path: Path) -> bool:
+        # The manifest, jobs and journal aren't project content and aren't
+        # covered by content_hash, so a cached archive would serve stale
+        # copies; metadata.json is hashed and stays in the archive
+        return file_path.relative_to(project_dir).as_posix() in EXPORT_EXCLUDED_FILES
+
+    def _generate(self, project_dir: Path, session_id: str, cache_path: Optional[Path]) -> Iterator[bytes]:
+        # Bounded so a slow client applies backpressure to the worker
+        chunks: "queue.Queue[Any]" = queue.Queue(maxsize=16)
+        cancelled = threading.Event()
+        done = object()
+
+        def put(item):
+            while True:
+                if cancelled.is_set():
+                    raise _ExportCancelled()
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            part_path = cache_path.with_name(f".{cache_path.name}.{threading.get_ident()}.part") if cache_path else None
+            part_file = open(part_path, 'wb') if part_path else None
+
+            def emit(chunk: bytes):
+                if part_file:
+                    part_file.write(chunk)
+                put(chunk)
+
+            try:
+                writer = _ChunkWriter(emit)
+                with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    for file_path in sorted(project_dir.rglob('*')):
+                        if file_path.is_file() and not file_path.name.endswith('.tmp') and not self._is_bookkeeping(project_dir, file_path):
+                            zipf.write(file_path, file_path.relative_to(project_dir))
+                writer.finish()
+                if part_file:
+                    part_file.close()
+                    os.replace(part_path, cache_path)
+                    self._evict(session_id, keep=cache_path)
+                put(done)
+            except _ExportCancelled:
+                logger.info(f"Export of {session_id} cancelled by client")
+            except Exception as e:
+                logger.error(f"Export of {session_id} failed: {e}", exc_info=True)
+                try:
+                    put(e)
+                except _ExportCancelled:
+                    pass
+            finally:
+                if part_file and not part_file.closed:
+                    part_file.close()
+                if part_path and part_path.exists():
+                    part_path.unlink()
+
+        threading.Thread(target=produce, name=f"export-{session_id}", daemon=True).start()
+
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+
+    def _evict(self, session_id: str, keep: Path):
+        """Drop stale archives of this project, then oldest archives over the size limit."""
+        with self._cache_lock:
+            archives = []
+            for path in self.cache_dir.glob("*.zip"):
+                if path == keep:
+                    continue
+                if path.name.startswith(f"{session_id}-"):
+                    path.unlink(missing_ok=True)
+                    self.evictions += 1
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                archives.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in archives) + keep.stat().st_size
+            for _, size, path in sorted(archives):
+                if total <= self.cache_max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.cache_dir:
+            return {"enabled": False}
+        with self._cache_lock:
+            sizes = []
+            for path in self.cache_dir.glob("*.zip"):
+                try:
+                    sizes.append(path.stat().st_size)
+                except OSError:
+                    continue
+            return {
+                "enabled": True,
+                "archives": len(sizes),
+                "size_bytes": sum(sizes),
+                "max_bytes": self.cache_max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+# Global instance
+project_exporter = ProjectExporter(
+    project_storage,
+    cache_dir=settings.EXPORT_CACHE_DIR if settings.EXPORT_CACHE_ENABLED else None,
+    cache_max_bytes=settings.EXPORT_CACHE_MAX_MB * 1024 * 1024
+)
@@ -0,0 +1,166 @@
+"""
+SQLite index of project metadata for fast, paginated project listing.
+
+The per-project metadata.json files stay the source of truth; this index is
+kept in sync by ProjectStorage and can always be rebuilt from disk.
+"""
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    session_id TEXT PRIMARY KEY,
+    project_name TEXT NOT NULL,
+    created_at TEXT,
+    last_modified TEXT NOT NULL DEFAULT '',
+    steps_completed TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_projects_last_modified
+    ON projects (last_modified DESC, session_id DESC);
+"""
+
+
+def encode_cursor(last_modified: str, session_id: str) -> str:
+    raw = json.dumps([last_modified, session_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        last_modified, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(last_modified), str(session_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class ProjectIndex:
+    """Embedded (WAL-mode) SQLite index of project metadata."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def _row_values(session_id: str, metadata: Dict[str, Any]) -> tuple:
+        return (
+            session_id,
+            metadata.get("project_name", "Untitled Project"),
+            metadata.get("created_at"),
+            metadata.get("last_updated") or "",
+            json.dumps(metadata.get("steps_completed", []))
+        )
+
+    def upsert(self, session_id: str, metadata: Dict[str, Any]):
+        """Insert or update a project's row from its metadata document."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO projects (session_id, project_name, created_at, last_modified, steps_completed)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    project_name = excluded.project_name,
+                    created_at = excluded.created_at,
+                    last_modified = excluded.last_modified,
+                    steps_completed = excluded.steps_completed
+                """,
+                self._row_values(session_id, metadata)
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM projects WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def rebuild(self, projects: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Replace the whole index with (session_id, metadata) pairs read from disk."""
+        rows = [self._row_values(session_id, metadata) for session_id, metadata in projects]
+        with self._lock:
+            self._conn.execute("DELETE FROM projects")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        logger.info(f"[ProjectIndex] Rebuilt index with {len(rows)} projects")
+        return len(rows)
+
+    @staticmethod
+    def _to_project(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "session_id": row["session_id"],
+            "project_name": row["project_name"],
+            "created_at": row["created_at"],
+            "last_modified": row["last_modified"] or None,
+            "steps_completed": json.loads(row["steps_completed"])
+        }
+
+    def query(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List projects, most recently modified first.
+
+        Uses keyset pagination on (last_modified, session_id), so each page
+        costs the same no matter how deep into the list it is.
+
+        Args:
+            limit: Page size (None for all remaining projects)
+            cursor: Opaque cursor returned with the previous page
+            q: Case-insensitive substring filter on the project name
+
+        Returns:
+            (projects, next_cursor) - next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        clauses, params = [], []
+        if cursor:
+            last_modified, session_id = decode_cursor(cursor)
+            clauses.append("(last_modified < ? OR (last_modified = ? AND session_id < ?))")
+            params += [last_modified, last_modified, session_id]
+        if q:
+            escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("project_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+        sql = "SELECT * FROM projects"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_modified DESC, session_id DESC"
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last["last_modified"], last["session_id"])
+
+        return [self._to_project(row) for row in rows], next_cursor
@@ -0,0 +1,170 @@
+"""
+One-shot project snapshots.
+
+Restoring a project in the UI used to take one request per saved step, one
+for the task statuses and one per code file. A snapshot returns all of it in
+a single JSON document, limited to the requested fields. Its ETag comes from
+the file manifest and task statuses, so checking whether a client's copy is
+still current never reads any files. Encoded (and gzipped) bodies are kept
+in a small LRU keyed by that ETag, so repeated restores of an unchanged
+project skip rebuilding and recompressing it.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.artifact_cache import ArtifactCache, artifact_cache
+from app.services.project_storage import ProjectStorage, project_storage
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = {"project", "steps", "task_statuses", "files", "code"}
+# Code file contents can be large, so they are only sent when asked for
+DEFAULT_SNAPSHOT_FIELDS = {"project", "steps", "task_statuses", "files"}
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+class ProjectSnapshotter:
+    """Builds project snapshots with ETags and caches their encoded bodies."""
+
+    def __init__(self, storage: ProjectStorage, artifacts: ArtifactCache, max_entries: int = 64):
+        self.storage = storage
+        self.artifacts = artifacts
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (session_id, fields, steps) -> (etag, body, gzipped body or None)
+        self._entries: "OrderedDict[tuple, Tuple[str, bytes, Optional[bytes]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(session_id: str, fields: Set[str], steps: Optional[Set[str]]) -> tuple:
+        return session_id, tuple(sorted(fields)), tuple(sorted(steps)) if steps is not None else None
+
+    def etag(self, session_id: str, fields: Set[str], steps: Optional[Set[str]] = None) -> Optional[str]:
+        """
+        ETag of a snapshot, computed without reading any project files.
+
+        Returns:
+            The ETag (without quotes), or None if the project doesn't exist
+        """
+        content_hash = self.storage.content_hash(session_id)
+        if content_hash is None:
+            return None
+        payload = json.dumps(
+            [content_hash, self.storage.load_task_statuses(session_id), self._key(session_id, fields, steps)],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def _build(self, session_id: str, fields: Set[str], steps: Optional[Set[str]]) -> Optional[Dict[str, Any]]:
+        summary = self.storage.get_project_summary(session_id)
+        if summary is None:
+            return None
+        files = summary.pop("files")
+        summary.pop("total_files")
+
+        snapshot: Dict[str, Any] = {"session_id": session_id}
+        if "project" in fields:
+            snapshot["project"] = summary
+        if "steps" in fields:
+            names: Iterable[str] = summary["steps_completed"] if steps is None else sorted(steps)
+            snapshot["steps"] = {}
+            for step_name in names:
+                value = self.artifacts.get_step(session_id, step_name)
+                if value is not None:
+                    snapshot["steps"][step_name] = value
+        if "task_statuses" in fields:
+            snapshot["task_statuses"] = self.storage.load_task_statuses(session_id)
+        if "files" in fields:
+            snapshot["files"] = files
+        if "code" in fields:
+            snapshot["code"] = {}
+            for file in files:
+                if not file["path"].startswith("code/"):
+                    continue
+                try:
+                    snapshot["code"][file["path"]] = self.artifacts.get_file(session_id, file["path"])
+                except (KeyError, UnicodeDecodeError) as e:
+                    logger.warning(f"Leaving {file['path']} out of the snapshot of {session_id}: {e!r}")
+        return snapshot
+
+    def get(
+        self,
+        session_id: str,
+        fields: Set[str],
+        steps: Optional[Set[str]] = None,
+        compress: bool = False
+    ) -> Optional[Tuple[str, bytes, bool]]:
+        """
+        Get the encoded snapshot of a project.
+
+        Args:
+            session_id: Session identifier
+            fields: Top-level sections to include (see SNAPSHOT_FIELDS)
+            steps: Step names to include; defaults to every completed step
+            compress: Return a gzipped body if it is large enough to be worth it
+
+        Returns:
+            (etag, body, gzipped), or None if the project doesn't exist
+        """
+        etag = self.etag(session_id, fields, steps)
+        if etag is None:
+            return None
+
+        key = self._key(session_id, fields, steps)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == etag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                cached = None
+                self.misses += 1
+
+        if cached is None:
+            snapshot = self._build(session_id, fields, steps)
+            if snapshot is None:
+                return None
+            # Built after the ETag was taken, so the body is never older than
+            # the ETag it is served with
+            body = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"), default=str).encode('utf-8')
+            cached = (etag, body, None)
+
+        etag, body, gzipped = cached
+        if compress and gzipped is None and len(body) >= MIN_COMPRESS_BYTES:
+            gzipped = gzip.compress(body, compresslevel=6)
+
+        with self._lock:
+            self._entries[key] = (etag, body, gzipped)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if compress and gzipped is not None:
+            return etag, gzipped, True
+        return etag, body, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "size_bytes": sum(len(body) + len(gz or b"") for _, body, gz in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Global Project Snapshotter Instance
+project_snapshotter = ProjectSnapshotter(
+    project_storage,
+    artifact_cache,
+    max_entries=settings.SNAPSHOT_CACHE_ENTRIES
+)
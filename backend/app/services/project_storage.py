@@ -1,19 +1,263 @@
 """
 Project storage service for persisting session data
 """
+import atexit
+import copy
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 import shutil
 
+from app.core.config import settings
+from app.services.project_index import ProjectIndex
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = "metadata.json"
+TASK_STATUSES_FILE = "task_statuses.json"
+MANIFEST_FILE = "manifest.json"
+JOBS_FILE = "jobs.json"
+SPRINT_JOURNAL_FILE = "sprint_journal.jsonl"
+# Bookkeeping files that are not part of the project's own file list
+UNLISTED_FILES = {METADATA_FILE, MANIFEST_FILE, JOBS_FILE, SPRINT_JOURNAL_FILE}
+# Finished background jobs kept per project (oldest are dropped first)
+MAX_JOBS_PER_PROJECT = 50
+
 class ProjectStorage:
     """Handles saving and loading project data to/from filesystem"""
     
-    def __init__(self, base_dir: str = "data/projects"):
+    def __init__(
+        self,
+        base_dir: str = "data/projects",
+        flush_interval: float = 0.5,
+        index_path: Optional[str] = None,
+        max_documents: int = 1000
+    ):
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        
+        # In-memory authoritative copies of metadata.json / task_statuses.json.
+        # Updates are O(1) dict writes; a background thread flushes dirty
+        # documents to disk in batches (write-behind). Documents are kept in
+        # LRU order; clean ones beyond max_documents are dropped and reloaded
+        # from disk on next use.
+        self.flush_interval = flush_interval
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._dirty: set = set()
+        self._flushing: set = set()  # written by the running flush, not on disk yet
+        self._lock = threading.RLock()  # single writer for the in-memory documents
+        self._flush_lock = threading.Lock()  # one flush writes to disk at a time
+        self._flush_requested = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+        
+        # Called as listener(session_id, rel_path, kind, entry) after a step
+        # ("step") or code file ("code") is saved
+        self.save_listeners: List[Callable[[str, str, str, Dict[str, Any]], None]] = []
+        
+        # SQLite index used for listing; metadata.json stays the source of truth
+        self.index = ProjectIndex(index_path or self.base_dir.parent / "projects_index.db")
+        if self.index.count() == 0 and any(p.is_dir() for p in self.base_dir.iterdir()):
+            self.rebuild_index()
+    
+    def _load_document(self, session_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Return the in-memory copy of a project JSON document, loading it on first use."""
+        key = (session_id, filename)
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                return self._documents[key]
+            
+            document = self._read_document(session_id, filename)
+            if document is None:
+                return None
+            self._documents[key] = document
+            self._evict()
+            return document
+    
+    def _read_document(self, session_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Read a project JSON document (the in-memory copy if there is one) without caching it."""
+        with self._lock:
+            document = self._documents.get((session_id, filename))
+            if document is not None:
+                return document
+        path = self.base_dir / session_id / filename
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _evict(self):
+        """Drop least recently used documents over max_documents; unsaved ones are kept."""
+        with self._lock:
+            excess = len(self._documents) - self.max_documents
+            if excess <= 0:
+                return
+            for key in list(self._documents):
+                if excess <= 0:
+                    break
+                if key in self._dirty or key in self._flushing:
+                    continue
+                del self._documents[key]
+                excess -= 1
+    
+    def _mark_dirty(self, session_id: str, filename: str, document: Dict[str, Any]):
+        with self._lock:
+            self._documents[(session_id, filename)] = document
+            self._documents.move_to_end((session_id, filename))
+            self._dirty.add((session_id, filename))
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="project-storage-flusher", daemon=True
+                )
+                self._flusher.start()
+        self._flush_requested.set()
+    
+    def _flush_loop(self):
+        while True:
+            self._flush_requested.wait()
+            # Coalesce bursts of updates into one write per document
+            time.sleep(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+    
+    def flush(self):
+        """Write all dirty metadata/status/manifest documents to disk atomically."""
+        with self._flush_lock:
+            # Writing a document updates its manifest entry, so a second pass
+            # persists the manifest changes made by the first
+            for _ in range(2):
+                # Serialize under the writer lock, then do disk I/O without holding
+                # it so request handlers never wait on the filesystem
+                with self._lock:
+                    snapshot = [
+                        (key, json.dumps(self._documents[key], indent=2))
+                        for key in self._dirty
+                    ]
+                    self._flushing.update(self._dirty)
+                    self._dirty.clear()
+                if not snapshot:
+                    self._evict()
+                    return
+                
+                for (session_id, filename), payload in snapshot:
+                    project_dir = self.base_dir / session_id
+                    try:
+                        project_dir.mkdir(parents=True, exist_ok=True)
+                        self._atomic_write_text(project_dir / filename, payload)
+                        if filename not in UNLISTED_FILES:
+                            self._record_file(session_id, project_dir / filename, payload.encode('utf-8'))
+                    except Exception as e:
+                        logger.error(f"Failed to write {filename} for {session_id}: {e}")
+                        # Keep it dirty so the next flush retries
+                        with self._lock:
+                            self._dirty.add((session_id, filename))
+                    finally:
+                        with self._lock:
+                            self._flushing.discard((session_id, filename))
+    
+    @staticmethod
+    def _atomic_write_text(path: Path, payload: str):
+        """Write via a temp file and rename so readers never see a partial file."""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _is_listed(project_dir: Path, file_path: Path) -> bool:
+        return (
+            file_path.is_file()
+            and not file_path.name.endswith('.tmp')
+            and file_path.relative_to(project_dir).as_posix() not in UNLISTED_FILES
+        )
+    
+    def _scan_files(
+        self,
+        session_id: str,
+        previous: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Walk a project directory and build its file manifest.
+        
+        Files whose size and mtime match their entry in previous keep the
+        recorded hash; everything else is re-hashed.
+        """
+        project_dir = self.base_dir / session_id
+        previous = previous or {}
+        manifest = {}
+        for file_path in project_dir.rglob('*'):
+            if not self._is_listed(project_dir, file_path):
+                continue
+            rel_path = file_path.relative_to(project_dir).as_posix()
+            stat = file_path.stat()
+            entry = previous.get(rel_path)
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = {
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "sha256": hashlib.sha256(file_path.read_bytes()).hexdigest()
+                }
+            manifest[rel_path] = entry
+        return manifest
+    
+    def _load_manifest(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return the in-memory file manifest, building it by a full scan if none exists yet."""
+        with self._lock:
+            manifest = self._load_document(session_id, MANIFEST_FILE)
+            if manifest is None:
+                manifest = self._scan_files(session_id)
+                self._mark_dirty(session_id, MANIFEST_FILE, manifest)
+            return manifest
+    
+    def _notify_saved(self, session_id: str, file_path: Path, kind: str):
+        rel_path = file_path.relative_to(self.base_dir / session_id).as_posix()
+        entry = self.get_file_entry(session_id, rel_path) or {}
+        for listener in self.save_listeners:
+            try:
+                listener(session_id, rel_path, kind, entry)
+            except Exception as e:
+                logger.error(f"Save listener failed for {rel_path}: {e}")
+    
+    def _record_file(self, session_id: str, file_path: Path, data: bytes):
+        """Update the manifest entry of a file that was just written."""
+        stat = file_path.stat()
+        rel_path = file_path.relative_to(self.base_dir / session_id).as_posix()
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": hashlib.sha256(data).hexdigest()
+        }
+        with self._lock:
+            manifest = self._load_manifest(session_id)
+            manifest[rel_path] = entry
+            self._mark_dirty(session_id, MANIFEST_FILE, manifest)
+    
+    def get_file_entry(self, session_id: str, rel_path: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry (size, mtime, sha256) of a project file, or None if unknown"""
+        if not self.project_exists(session_id):
+            return None
+        with self._lock:
+            entry = self._load_manifest(session_id).get(rel_path)
+            return dict(entry) if entry is not None else None
+    
+    def project_exists(self, session_id: str) -> bool:
+        """Check whether a project exists without walking (or creating) its directory"""
+        with self._lock:
+            if (session_id, METADATA_FILE) in self._documents:
+                return True
+        return (self.base_dir / session_id / METADATA_FILE).exists()
     
     def get_project_dir(self, session_id: str) -> Path:
         """Get project directory for a session"""
@@ -46,22 +290,26 @@ class ProjectStorage:
         # Determine file extension and format
         if isinstance(data, (dict, list)):
             file_path = project_dir / f"{step_name}.json"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            payload = json.dumps(data, indent=2, ensure_ascii=False)
         else:
             # Save as markdown for text content
             file_path = project_dir / f"{step_name}.md"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(str(data))
+            payload = str(data)
+        
+        encoded = payload.encode('utf-8')
+        with open(file_path, 'wb') as f:
+            f.write(encoded)
+        self._record_file(session_id, file_path, encoded)
         
         # Update metadata
         self._update_metadata(session_id, step_name)
+        self._notify_saved(session_id, file_path, "step")
         
         return str(file_path)
     
     def load_step(self, session_id: str, step_name: str) -> Optional[Any]:
         """Load a workflow step's output"""
-        project_dir = self.get_project_dir(session_id)
+        project_dir = self.base_dir / session_id
         
         # Try JSON first
         json_path = project_dir / f"{step_name}.json"
@@ -87,124 +335,145 @@ class ProjectStorage:
         full_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        encoded = content.encode('utf-8')
+        with open(full_path, 'wb') as f:
+            f.write(encoded)
+        self._record_file(session_id, full_path, encoded)
+        self._notify_saved(session_id, full_path, "code")
         
         return str(full_path)
     
+    def _new_metadata(self, session_id: str) -> Dict[str, Any]:
+        return {
+            "session_id": session_id,
+            "created_at": datetime.now().isoformat(),
+            "steps_completed": [],
+            "last_updated": None
+        }
+    
     def _update_metadata(self, session_id: str, step_name: str):
         """Update project metadata"""
-        project_dir = self.get_project_dir(session_id)
-        metadata_path = project_dir / "metadata.json"
-        
-        # Load existing metadata
-        if metadata_path.exists():
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-        else:
-            metadata = {
-                "session_id": session_id,
-                "created_at": datetime.now().isoformat(),
-                "steps_completed": [],
-                "last_updated": None
-            }
-        
-        # Update metadata
-        if step_name not in metadata["steps_completed"]:
-            metadata["steps_completed"].append(step_name)
-        metadata["last_updated"] = datetime.now().isoformat()
-        
-        # Save metadata
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        with self._lock:
+            metadata = self._load_document(session_id, METADATA_FILE) or self._new_metadata(session_id)
+            
+            # Update metadata
+            if step_name not in metadata["steps_completed"]:
+                metadata["steps_completed"].append(step_name)
+            metadata["last_updated"] = datetime.now().isoformat()
+            
+            self._mark_dirty(session_id, METADATA_FILE, metadata)
+            self.index.upsert(session_id, metadata)
     
     def save_project_name(self, session_id: str, project_name: str):
         """Save project name to metadata"""
-        project_dir = self.get_project_dir(session_id)
-        metadata_path = project_dir / "metadata.json"
-        
-        # Load existing metadata
-        if metadata_path.exists():
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-        else:
-            metadata = {
-                "session_id": session_id,
-                "created_at": datetime.now().isoformat(),
-                "steps_completed": [],
-                "last_updated": None
-            }
-        
-        # Update project name
-        metadata["project_name"] = project_name
-        metadata["last_updated"] = datetime.now().isoformat()
-        
-        # Save metadata
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
-
+        self.get_project_dir(session_id)
+        with self._lock:
+            metadata = self._load_document(session_id, METADATA_FILE) or self._new_metadata(session_id)
+            
+            # Update project name
+            metadata["project_name"] = project_name
+            metadata["last_updated"] = datetime.now().isoformat()
+            
+            self._mark_dirty(session_id, METADATA_FILE, metadata)
+            self.index.upsert(session_id, metadata)
     
+    def load_metadata(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of the project metadata, or None if the project doesn't exist"""
+        with self._lock:
+            metadata = self._load_document(session_id, METADATA_FILE)
+            return copy.deepcopy(metadata) if metadata is not None else None
+
     def save_task_status(self, session_id: str, task_id: str, status: str):
         """Save individual task execution status"""
-        project_dir = self.get_project_dir(session_id)
-        task_status_path = project_dir / "task_statuses.json"
-        
-        # Load existing statuses
-        if task_status_path.exists():
-            with open(task_status_path, 'r') as f:
-                statuses = json.load(f)
-        else:
-            statuses = {}
-        
-        # Update status
-        statuses[task_id] = {
-            "status": status,
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        # Save statuses
-        with open(task_status_path, 'w') as f:
-            json.dump(statuses, f, indent=2)
+        self.save_task_statuses(session_id, {task_id: status})
+    
+    def save_task_statuses(self, session_id: str, task_statuses: Dict[str, str]):
+        """Save several task statuses in one in-memory update (flushed once)"""
+        with self._lock:
+            statuses = self._load_document(session_id, TASK_STATUSES_FILE) or {}
+            updated_at = datetime.now().isoformat()
+            for task_id, status in task_statuses.items():
+                statuses[task_id] = {
+                    "status": status,
+                    "updated_at": updated_at
+                }
+            self._mark_dirty(session_id, TASK_STATUSES_FILE, statuses)
     
     def load_task_statuses(self, session_id: str) -> Dict[str, str]:
         """Load all task statuses for a session"""
-        project_dir = self.get_project_dir(session_id)
-        task_status_path = project_dir / "task_statuses.json"
-        
-        if not task_status_path.exists():
-            return {}
-        
-        with open(task_status_path, 'r') as f:
-            statuses = json.load(f)
-        
-        # Return just the status values
-        return {task_id: data["status"] for task_id, data in statuses.items()}
+        with self._lock:
+            statuses = self._load_document(session_id, TASK_STATUSES_FILE)
+            if not statuses:
+                return {}
+            
+            # Return just the status values
+            return {task_id: data["status"] for task_id, data in statuses.items()}
     
     def get_task_status(self, session_id: str, task_id: str) -> Optional[str]:
         """Get status of a specific task"""
         statuses = self.load_task_statuses(session_id)
         return statuses.get(task_id)
     
-    def get_project_summary(self, session_id: str) -> Dict[str, Any]:
-        """Get project summary"""
-        project_dir = self.get_project_dir(session_id)
-        metadata_path = project_dir / "metadata.json"
+    def save_job(self, session_id: str, job: Dict[str, Any]):
+        """Save a background job record (status and result) in the project's jobs document"""
+        with self._lock:
+            jobs = self._load_document(session_id, JOBS_FILE) or {}
+            jobs[job["job_id"]] = job
+            if len(jobs) > MAX_JOBS_PER_PROJECT:
+                finished = sorted(
+                    (j for j in jobs.values() if j.get("finished_at")),
+                    key=lambda j: j["created_at"]
+                )
+                for old_job in finished[:len(jobs) - MAX_JOBS_PER_PROJECT]:
+                    del jobs[old_job["job_id"]]
+            self._mark_dirty(session_id, JOBS_FILE, jobs)
+    
+    def load_job(self, session_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a saved background job record, or None"""
+        with self._lock:
+            jobs = self._load_document(session_id, JOBS_FILE) or {}
+            job = jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+    
+    def list_jobs(self, session_id: str) -> list[Dict[str, Any]]:
+        """List saved background job records of a project, newest first"""
+        with self._lock:
+            jobs = self._load_document(session_id, JOBS_FILE) or {}
+            return sorted(copy.deepcopy(list(jobs.values())), key=lambda j: j["created_at"], reverse=True)
+    
+    def get_project_summary(self, session_id: str, validate: bool = False) -> Dict[str, Any]:
+        """
+        Get project summary
         
-        if not metadata_path.exists():
-            return None
+        The file list comes from the project's manifest, which is kept up to
+        date as files are saved, so the directory isn't walked on every call.
         
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
+        Args:
+            session_id: Session identifier
+            validate: Re-walk the directory and re-hash files whose size or
+                mtime no longer match the manifest (picks up external edits)
+        """
+        if not self.project_exists(session_id):
+            return None
+        metadata = self.load_metadata(session_id)
+        if metadata is None:
+            return None
         
-        # List all files
-        files = []
-        for file_path in project_dir.rglob('*'):
-            if file_path.is_file() and file_path.name != 'metadata.json':
-                files.append({
-                    "path": str(file_path.relative_to(project_dir)),
-                    "size": file_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-                })
+        with self._lock:
+            manifest = self._load_manifest(session_id)
+            if validate:
+                manifest = self._scan_files(session_id, previous=manifest)
+                self._mark_dirty(session_id, MANIFEST_FILE, manifest)
+            
+            files = [
+                {
+                    "path": path,
+                    "size": entry["size"],
+                    "modified": datetime.fromtimestamp(entry["mtime"]).isoformat(),
+                    "hash": entry["sha256"]
+                }
+                for path, entry in sorted(manifest.items())
+            ]
         
         # Return flattened structure for easier access
         return {
@@ -218,44 +487,67 @@ class ProjectStorage:
             "total_files": len(files)
         }
     
-    def export_project(self, session_id: str) -> Optional[Path]:
-        """Export project as ZIP file"""
-        import zipfile
+    def content_hash(self, session_id: str) -> Optional[str]:
+        """
+        Hash identifying the current contents of a project.
         
-        project_dir = self.get_project_dir(session_id)
-        if not project_dir.exists():
+        Derived from the file manifest and metadata, so it changes whenever a
+        file is saved or the project is renamed, without reading any files.
+        """
+        if not self.project_exists(session_id):
             return None
-        
-        # Create ZIP file
-        zip_path = self.base_dir / f"{session_id}.zip"
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in project_dir.rglob('*'):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(project_dir)
-                    zipf.write(file_path, arcname)
-        
-        return zip_path
+        with self._lock:
+            manifest = self._load_manifest(session_id)
+            metadata = self._load_document(session_id, METADATA_FILE)
+            payload = json.dumps(
+                [sorted((path, entry["sha256"]) for path, entry in manifest.items()), metadata],
+                sort_keys=True
+            )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
-    def list_projects(self) -> list[Dict[str, Any]]:
-        """List all projects"""
-        projects = []
-        
-        for project_dir in self.base_dir.iterdir():
-            if project_dir.is_dir():
-                metadata_path = project_dir / "metadata.json"
-                if metadata_path.exists():
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                    projects.append({
-                        "session_id": project_dir.name,
-                        "project_name": metadata.get("project_name", "Untitled Project"),
-                        "created_at": metadata.get("created_at"),
-                        "last_modified": metadata.get("last_updated"),
-                        "steps_completed": metadata.get("steps_completed", [])
-                    })
+    def list_projects(self, q: Optional[str] = None) -> list[Dict[str, Any]]:
+        """List all projects, most recently modified first"""
+        projects, _ = self.index.query(q=q)
+        return projects
+    
+    def query_projects(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of projects from the index
         
-        return sorted(projects, key=lambda x: x.get("last_modified", ""), reverse=True)
+        Args:
+            limit: Page size
+            cursor: next_cursor from the previous page
+            q: Case-insensitive filter on the project name
+            
+        Returns:
+            Dict with the page of projects and the cursor for the next page
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        projects, next_cursor = self.index.query(limit=limit, cursor=cursor, q=q)
+        return {"projects": projects, "next_cursor": next_cursor}
+    
+    def rebuild_index(self) -> int:
+        """Rebuild the project index from the metadata.json files on disk"""
+        def scan():
+            for project_dir in self.base_dir.iterdir():
+                if project_dir.is_dir():
+                    try:
+                        # Read without caching: indexing touches every project
+                        metadata = self._read_document(project_dir.name, METADATA_FILE)
+                    except (OSError, json.JSONDecodeError) as e:
+                        logger.error(f"Skipping {project_dir.name} while indexing: {e}")
+                        continue
+                    if metadata is not None:
+                        yield project_dir.name, metadata
+        
+        return self.index.rebuild(scan())
 
 # Global instance
-project_storage = ProjectStorage()
+project_storage = ProjectStorage(max_documents=settings.PROJECT_DOCUMENT_CACHE_ENTRIES)
@@ -0,0 +1,168 @@
+"""
+Content-addressed on-disk cache for LLM responses.
+
+Deterministic agent steps (ideas, user stories, architecture) are keyed by a
+hash of (agent instruction, prompt, provider, model, temperature), so re-running
+a step with identical inputs - e.g. reopening an old project - returns in
+milliseconds instead of paying full model latency and cost again.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Disk-backed response cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, base_dir: str, ttl_seconds: int, max_bytes: int):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (size in bytes, last access time); mirrors what is on disk
+        self._index: Dict[str, tuple] = {}
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(instruction: str, prompt: str, provider: str, model_name: str, temperature: float) -> str:
+        payload = json.dumps(
+            [instruction, prompt, provider, model_name, float(temperature)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.base_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        for path in self.base_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            self._index[path.stem] = (stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+
+    def _remove(self, key: str):
+        size, _ = self._index.pop(key, (0, 0))
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss/expiry."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                self._remove(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            # Touch the file so LRU order survives restarts
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            self._index[key] = (self._index[key][0], now)
+            self.hits += 1
+            return entry["response"]
+
+    def set(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store a response, evicting least-recently-used entries over the size limit."""
+        entry = {
+            "created_at": time.time(),
+            "response": response,
+            "metadata": metadata or {}
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            if key in self._index:
+                self._total_bytes -= self._index[key][0]
+            self._index[key] = (len(data), time.time())
+            self._total_bytes += len(data)
+
+            if self._total_bytes > self.max_bytes:
+                for old_key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+                    if self._total_bytes <= self.max_bytes:
+                        break
+                    if old_key == key:
+                        continue
+                    self._remove(old_key)
+                    self.evictions += 1
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() off the event loop (it reads and touches files)."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None):
+        """set() off the event loop (it writes and may evict files)."""
+        await asyncio.to_thread(self.set, key, response, metadata)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global instance
+response_cache = ResponseCache(
+    base_dir=settings.RESPONSE_CACHE_DIR,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+)
@@ -0,0 +1,232 @@
+"""
+Durable sprint execution journal.
+
+Each project gets an append-only sprint_journal.jsonl recording sprint runs
+and task progress (started, generated, file written, completed, failed,
+skipped). Appends are queued and a writer thread commits them in batches with
+one fsync per batch, so recording progress never blocks a request on the disk.
+
+On startup the journals are replayed: task outcomes that hadn't reached the
+write-behind task_statuses.json yet are restored, and a sprint that was still
+running is reported as interrupted so it can resume without regenerating any
+completed task.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.project_storage import (
+    SPRINT_JOURNAL_FILE,
+    TASK_STATUSES_FILE,
+    ProjectStorage,
+    project_storage
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SprintJournal:
+    """Append-only, group-committed journal of sprint progress per project."""
+
+    def __init__(self, storage: ProjectStorage, commit_interval: float = 0.05):
+        self.storage = storage
+        self.commit_interval = commit_interval
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._appended = 0
+        self._committed = 0
+        self._writer: Optional[threading.Thread] = None
+        self.batches = 0
+        self.records = 0
+        atexit.register(self.flush, 5.0)
+
+    def _path(self, session_id: str):
+        return self.storage.base_dir / session_id / SPRINT_JOURNAL_FILE
+
+    def append(self, session_id: str, event: str, **fields):
+        """Queue a journal record; it is durable once the next batch is committed."""
+        record = {"ts": datetime.now().isoformat(), "event": event, **fields}
+        with self._cond:
+            self._appended += 1
+            seq = self._appended
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="sprint-journal-writer", daemon=True)
+                self._writer.start()
+        self._queue.put((seq, session_id, record))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every record appended so far is on disk."""
+        with self._cond:
+            target = self._appended
+            return self._cond.wait_for(lambda: self._committed >= target, timeout=timeout)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Group the appends of a short window into one write + fsync per project
+            time.sleep(self.commit_interval)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_session: Dict[str, List[str]] = {}
+            for _, session_id, record in batch:
+                by_session.setdefault(session_id, []).append(json.dumps(record, ensure_ascii=False, default=str))
+            for session_id, lines in by_session.items():
+                path = self._path(session_id)
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write("\n".join(lines) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception as e:
+                    logger.error(f"Failed to write sprint journal for {session_id}: {e}")
+
+            with self._cond:
+                self._committed = max(self._committed, max(seq for seq, _, _ in batch))
+                self.batches += 1
+                self.records += len(batch)
+                self._cond.notify_all()
+
+    def read(self, session_id: str) -> List[Dict[str, Any]]:
+        """Read a project's journal records; a torn final line from a crash is ignored."""
+        path = self._path(session_id)
+        if not path.exists():
+            return []
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable sprint journal line for {session_id}")
+        return records
+
+    def _files_intact(self, session_id: str, files: List[Dict[str, str]]) -> bool:
+        project_dir = self.storage.base_dir / session_id
+        for file in files:
+            path = project_dir / "code" / file["path"]
+            if not path.is_file() or hashlib.sha256(path.read_bytes()).hexdigest() != file["sha256"]:
+                return False
+        return True
+
+    def replay(self, session_id: str) -> Dict[str, Any]:
+        """
+        Rebuild sprint state from the journal.
+
+        A task counts as complete if it was journaled complete, or if its
+        generated files passed validation and were all written intact before
+        the process stopped. Files that failed validation need an explicit
+        task_completed or task_failed.
+
+        Returns:
+            {"run": last run record (with "status") or None,
+             "tasks": task_id -> {"status", "error", "error_type"}}
+        """
+        run: Optional[Dict[str, Any]] = None
+        tasks: Dict[str, Dict[str, Any]] = {}
+        generated: Dict[str, List[Dict[str, str]]] = {}
+        written: Dict[str, set] = {}
+
+        for record in self.read(session_id):
+            event = record.get("event")
+            task_id = record.get("task_id")
+            if event == "run_started":
+                run = {**record, "status": "running"}
+            elif event == "run_finished" and run is not None:
+                run = {**run, "status": record.get("status"), "finished_at": record.get("ts")}
+            elif event == "task_started":
+                tasks[task_id] = {"status": "loading"}
+                generated.pop(task_id, None)
+                written.pop(task_id, None)
+            elif event == "task_generated":
+                # Only validated output can be completed from its files alone
+                if record.get("valid") is True:
+                    generated[task_id] = record.get("files", [])
+                else:
+                    generated.pop(task_id, None)
+                written[task_id] = set()
+            elif event == "file_written":
+                written.setdefault(task_id, set()).add(record.get("path"))
+            elif event == "task_completed":
+                tasks[task_id] = {"status": "complete"}
+            elif event == "task_failed":
+                tasks[task_id] = {"status": "error", "error": record.get("error"), "error_type": record.get("error_type")}
+            elif event == "task_skipped":
+                tasks[task_id] = {"status": "skipped", "error": record.get("error")}
+
+        for task_id, state in tasks.items():
+            files = generated.get(task_id)
+            if state["status"] != "loading" or files is None:
+                continue
+            if {f["path"] for f in files} <= written.get(task_id, set()) and self._files_intact(session_id, files):
+                state["status"] = "complete"
+
+        return {"run": run, "tasks": tasks}
+
+    def _last_record(self, session_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(session_id)
+        with open(path, 'rb') as f:
+            f.seek(max(0, path.stat().st_size - 4096))
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
+        for line in reversed(lines):
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+    def recover(self) -> Iterator[tuple]:
+        """
+        Replay journals that may hold progress the project doesn't reflect yet.
+
+        Task outcomes are restored into task_statuses.json when the journal is
+        newer than it. Journals ending in a finished run whose outcomes were
+        already saved are skipped without being read in full.
+
+        Yields:
+            (session_id, replayed state) for each replayed project
+        """
+        for journal_path in self.storage.base_dir.glob(f"*/{SPRINT_JOURNAL_FILE}"):
+            session_id = journal_path.parent.name
+            statuses_path = journal_path.with_name(TASK_STATUSES_FILE)
+            statuses_stale = not statuses_path.exists() or statuses_path.stat().st_mtime < journal_path.stat().st_mtime
+            try:
+                if not statuses_stale and (self._last_record(session_id) or {}).get("event") == "run_finished":
+                    continue
+                state = self.replay(session_id)
+            except Exception as e:
+                logger.error(f"Failed to replay sprint journal for {session_id}: {e}")
+                continue
+
+            outcomes = {
+                task_id: task["status"]
+                for task_id, task in state["tasks"].items()
+                if task["status"] in ("complete", "error", "skipped")
+            }
+            if statuses_stale and outcomes:
+                self.storage.save_task_statuses(session_id, outcomes)
+            yield session_id, state
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "records": self.records,
+                "batches": self.batches,
+                "pending": self._appended - self._committed,
+            }
+
+
+# Global Sprint Journal Instance
+sprint_journal = SprintJournal(project_storage, commit_interval=settings.SPRINT_JOURNAL_COMMIT_INTERVAL)
@@ -0,0 +1,163 @@
+"""
+Local static-analysis pass ahead of model linting.
+
+Files are syntax-checked in-process (see app.utils.static_checks) before any
+model sees them. Larger batches are spread over a process pool so parsing
+never blocks the event loop, and results are cached per content hash, so an
+unchanged file is only ever checked once. Files the local pass clears are not
+sent to the model; only unsupported files and files with problems are.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils import static_checks
+
+logger = logging.getLogger(__name__)
+
+# Batches smaller than this are checked in the calling thread; a worker
+# round trip costs more than parsing a few files
+POOL_MIN_FILES = 8
+
+
+class StaticAnalyzer:
+    """Runs the local checks over a process pool with a per-file-hash result cache."""
+
+    def __init__(self, workers: int = 2, max_entries: int = 5000):
+        self.workers = workers
+        self.max_entries = max_entries
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # (sha256, language, checks version) -> check_file result
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.cleared = 0
+        self.flagged = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned rather than forked: the server process runs threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+            return self._pool
+
+    @staticmethod
+    def _key(path: str, content: str) -> tuple:
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return digest, static_checks.language_of(path), static_checks.CHECKS_VERSION
+
+    async def _check(self, files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        if self.workers <= 0 or len(files) < POOL_MIN_FILES:
+            return await asyncio.to_thread(static_checks.check_files, files)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        size = -(-len(files) // self.workers)
+        batches = [files[i:i + size] for i in range(0, len(files), size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, static_checks.check_files, batch) for batch in batches)
+        )
+        return [result for batch in results for result in batch]
+
+    async def analyze(self, code_files: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Check files locally.
+
+        Args:
+            code_files: Path -> content
+
+        Returns:
+            Path -> {"language", "issues", "cleared"}: cleared files need no
+            model review; issues carry line, column, severity and message
+        """
+        texts = {
+            path: content if isinstance(content, str) else json.dumps(content)
+            for path, content in code_files.items()
+        }
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, str]] = []
+        with self._lock:
+            for path, content in texts.items():
+                cached = self._cache.get(self._key(path, content))
+                if cached is None:
+                    pending.append((path, content))
+                    self.misses += 1
+                else:
+                    self._cache.move_to_end(self._key(path, content))
+                    results[path] = cached
+                    self.hits += 1
+
+        if pending:
+            try:
+                checked = await self._check(pending)
+            except Exception as e:
+                # A broken pool must not break linting: the model reviews these files
+                logger.error(f"Local static analysis failed: {e}", exc_info=True)
+                checked = [{"language": static_checks.language_of(p), "issues": [], "uncertain": True, "imports": []} for p, _ in pending]
+            with self._lock:
+                for (path, content), result in zip(pending, checked):
+                    results[path] = result
+                    self._cache[self._key(path, content)] = result
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        # Relative imports are checked against the other files of the batch
+        paths = set(texts)
+        report = {}
+        for path in texts:
+            result = results[path]
+            issues = [dict(issue) for issue in result["issues"]]
+            for specifier, line in result["imports"]:
+                if not static_checks.resolve_import(path, specifier, paths):
+                    issues.append({
+                        "line": line,
+                        "column": None,
+                        "severity": "warning",
+                        "category": "import",
+                        "message": f"Import '{specifier}' does not resolve to any of the analyzed files"
+                    })
+            # Unresolved imports are reported but don't hold a file back: the
+            # model can't resolve them any better from a partial file set
+            cleared = not result["issues"] and not result["uncertain"]
+            report[path] = {"language": result["language"], "issues": issues, "cleared": cleared}
+
+        with self._lock:
+            cleared_count = sum(1 for r in report.values() if r["cleared"])
+            self.cleared += cleared_count
+            self.flagged += len(report) - cleared_count
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "workers": self.workers,
+                "pool_started": self._pool is not None,
+                "cache_entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "files_cleared": self.cleared,
+                "files_flagged": self.flagged
+            }
+
+
+# Global Static Analyzer Instance
+static_analyzer = StaticAnalyzer(
+    workers=settings.STATIC_ANALYSIS_WORKERS,
+    max_entries=settings.STATIC_ANALYSIS_CACHE_ENTRIES
+)
@@ -1,32 +1,83 @@
+import asyncio
 import json
 import re
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
-async def collect_response(async_gen):
+# Optional per-request queue that receives response text as it streams in.
+# Set with stream_to(); collect_response() forwards chunks to it.
+_stream_sink: ContextVar[Optional[asyncio.Queue]] = ContextVar("stream_sink", default=None)
+
+def get_stream_sink() -> Optional[asyncio.Queue]:
+    """Return the active stream sink for the current request, if any."""
+    return _stream_sink.get()
+
+@contextmanager
+def stream_to(sink: asyncio.Queue):
+    """Forward response text collected inside this block to sink."""
+    token = _stream_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _stream_sink.reset(token)
+
+def _event_text(event) -> str:
+    """Extract the text carried by an ADK event (empty string if none)."""
+    text = ""
+    if hasattr(event, 'content') and event.content:
+        # event.content might be a Content object or string
+        if hasattr(event.content, 'parts'):
+            for part in event.content.parts or []:
+                if hasattr(part, 'text') and part.text:
+                    text += part.text
+        elif isinstance(event.content, str):
+            text += event.content
+    elif hasattr(event, 'text') and event.text:
+        text += event.text
+    return text
+
+async def collect_response(async_gen, meta: Optional[dict] = None):
     """
     Consumes an async generator from ADK Runner.run_async() and returns the full string response.
     Handles errors gracefully to prevent crashes.
+    
+    In SSE streaming mode ADK emits partial events with text deltas followed by
+    a final event repeating the aggregated text; deltas are forwarded to the
+    active stream sink and the aggregate is used for the returned string.
+    
+    If meta is given, the finish reason of the last event that reported one
+    is stored under meta["finish_reason"].
     """
     full_response = ""
+    partial_text = ""
     event_count = 0
+    sink = get_stream_sink()
     
     try:
         async for event in async_gen:
             event_count += 1
-            # Check for ModelGenerateContentEvent or similar that contains text
-            # We look for 'content' or 'text' in the event or its payload
-            if hasattr(event, 'content') and event.content:
-                 # event.content might be a Content object or string
-                 if hasattr(event.content, 'parts'):
-                     for part in event.content.parts:
-                         if hasattr(part, 'text') and part.text:
-                             full_response += part.text
-                 elif isinstance(event.content, str):
-                     full_response += event.content
-            elif hasattr(event, 'text') and event.text:
-                full_response += event.text
+            text = _event_text(event)
+            if meta is not None and getattr(event, 'finish_reason', None):
+                meta["finish_reason"] = event.finish_reason
+            
+            if getattr(event, 'partial', False):
+                if text:
+                    partial_text += text
+                    if sink is not None:
+                        sink.put_nowait(text)
+                continue
+            
+            if text:
+                # Non-partial text is either a normal (non-streamed) response or
+                # the aggregate of the deltas we already forwarded
+                if sink is not None and not partial_text:
+                    sink.put_nowait(text)
+                full_response += text
+            partial_text = ""
                 
     except Exception as e:
         error_str = str(e)
@@ -42,6 +93,8 @@ async def collect_response(async_gen):
             raise
         
         # For other errors, log and return what we have so far
+        full_response += partial_text
+        partial_text = ""
         logger.warning(f"Partial response collected before error: {len(full_response)} chars")
         if not full_response:
             # If we got nothing, return error info
@@ -51,6 +104,9 @@ async def collect_response(async_gen):
                 "event_count": event_count
             })
     
+    # Keep deltas whose aggregate event never arrived
+    full_response += partial_text
+    
     # Check if we got an empty response
     if not full_response.strip():
         logger.warning(f"Empty response after processing {event_count} events")
@@ -62,6 +118,73 @@ async def collect_response(async_gen):
             
     return full_response
 
+# Finish reasons meaning the model stopped at its output limit (google-genai / OpenAI style)
+_MAX_TOKEN_REASONS = {"MAX_TOKENS", "LENGTH"}
+_LEADING_FENCE = re.compile(r'^\s*```[\w-]*[ \t]*\n')
+_TRAILING_FENCE = re.compile(r'\n?```\s*$')
+# Shortest repeated text treated as overlap when stitching a continuation
+_MIN_OVERLAP = 12
+_MAX_OVERLAP = 2000
+
+def _strip_leading_fence(text: str) -> str:
+    return _LEADING_FENCE.sub("", text, count=1)
+
+def is_truncated(response: str, finish_reason=None) -> bool:
+    """
+    Whether a response was cut off before it was finished.
+    
+    True when the model reports it hit its output limit, or when the
+    response is a JSON document (optionally in a code fence) whose root
+    value is never closed.
+    """
+    if finish_reason is not None:
+        reason = str(getattr(finish_reason, 'name', finish_reason)).upper()
+        if reason in _MAX_TOKEN_REASONS:
+            return True
+    
+    body = _strip_leading_fence(response or "").lstrip()
+    if not body or body[0] not in "{[":
+        # Prose and markdown outputs are only continued on a max-token finish
+        return False
+    assembler = StreamingJSONAssembler()
+    assembler.feed(body)
+    return not assembler.balanced
+
+def continuation_prompt(response: str, tail_chars: int = 400) -> str:
+    """Follow-up message asking the model to finish a truncated response."""
+    return (
+        "Your previous response was cut off because it reached the output length limit. "
+        "Continue it exactly from where it stopped. Do not repeat anything already written, "
+        "do not start over, and do not add a code fence or any commentary. "
+        f"The response so far ends with:\n\n{response[-tail_chars:]}"
+    )
+
+def stitch_continuation(response: str, continuation: str) -> str:
+    """
+    Append a continuation to a truncated response.
+    
+    Code fences the model re-opens are dropped, text it repeats from the end
+    of the response is removed, and a continuation that restarted the whole
+    document replaces the response instead.
+    """
+    fenced = response.lstrip().startswith("```")
+    piece = _strip_leading_fence(continuation)
+    if not fenced:
+        # A closing fence only belongs to a response that opened one
+        piece = _TRAILING_FENCE.sub("", piece)
+    
+    body = _strip_leading_fence(response).lstrip()
+    head = body[:80]
+    if len(head) >= _MIN_OVERLAP and piece.lstrip().startswith(head):
+        logger.info("Continuation restarted the response; using it in full")
+        return continuation if fenced else piece
+    
+    for size in range(min(len(response), len(piece), _MAX_OVERLAP), _MIN_OVERLAP - 1, -1):
+        if response.endswith(piece[:size]):
+            piece = piece[size:]
+            break
+    return response + piece
+
 def extract_json_from_markdown(text: str) -> str:
     """
     Extract JSON from markdown code blocks.
@@ -154,3 +277,93 @@ def parse_json_response(response: str) -> dict:
             "error": f"Unexpected error: {str(e)}",
             "raw_output": response[:1000]
         }
+
+class StreamingJSONAssembler:
+    """
+    Incrementally tracks the structure of a JSON document as it streams in.
+    
+    Each chunk is scanned once (no re-parsing of the growing buffer), which is
+    enough to report which top-level keys are finished and whether the root
+    value is closed. Leading markdown fences or prose before the first
+    '{' / '[' are ignored for structure tracking.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.depth = 0
+        self.started = False
+        self.complete = False
+        self.completed_keys: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._root_is_object = False
+        self._expect_key = False
+        self._string_buffer: Optional[List[str]] = None
+        self._current_key: Optional[str] = None
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Add a chunk of response text.
+        
+        Returns:
+            Top-level keys that were completed by this chunk
+        """
+        self.text += chunk
+        newly_completed = []
+        
+        for char in chunk:
+            if self.complete:
+                break
+            
+            if not self.started:
+                if char in "{[":
+                    self.started = True
+                    self._root_is_object = char == "{"
+                    self._expect_key = self._root_is_object
+                    self.depth = 1
+                continue
+            
+            if self._in_string:
+                if self._string_buffer is not None:
+                    self._string_buffer.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_buffer is not None:
+                        self._current_key = "".join(self._string_buffer[:-1])
+                        self._string_buffer = None
+                        self._expect_key = False
+                continue
+            
+            if char == '"':
+                self._in_string = True
+                if self.depth == 1 and self._root_is_object and self._expect_key:
+                    self._string_buffer = []
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    if self._current_key is not None:
+                        newly_completed.append(self._current_key)
+            elif char == "," and self.depth == 1 and self._root_is_object:
+                if self._current_key is not None:
+                    newly_completed.append(self._current_key)
+                    self._current_key = None
+                self._expect_key = True
+        
+        self.completed_keys.extend(newly_completed)
+        return newly_completed
+    
+    @property
+    def balanced(self) -> bool:
+        """True when the root value has been closed (or nothing has started)."""
+        return self.complete or not self.started
+    
+    def result(self):
+        """Parse the assembled text with the same rules as parse_json_response."""
+        return parse_json_response(self.text)
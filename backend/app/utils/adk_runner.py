@@ -2,12 +2,11 @@
 Helper function to create ADK runner with validation
 """
 from google.adk import Agent, Runner
-from google.adk.apps import App
-from google.adk.models import Gemini
-from app.core.services import session_service
+from app.core.services import build_app, session_service
 from app.core.model_config import ModelConfig
+from app.core.model_factory import ModelFactory
+from app.core.runner_pool import runner_pool
 from app.utils.security import validate_api_key
-import os
 
 
 def create_adk_runner(
@@ -26,6 +25,9 @@ def create_adk_runner(
     4. Wraps it in an App
     5. Returns a Runner with session management
     
+    Runners are shared through the process-wide runner pool, so repeated
+    calls with the same agent and model configuration reuse one instance.
+    
     Args:
         agent_name: Name of the agent
         agent_description: Description of the agent
@@ -43,27 +45,38 @@ def create_adk_runner(
     if not is_valid:
         raise ValueError(error_msg)
     
-    # Set API key in environment for Gemini
-    os.environ["GOOGLE_API_KEY"] = model_config.api_key
-    
-    # Create ADK model with user's selected model
-    model = Gemini(
-        model=model_config.model_name,
-        temperature=model_config.temperature
-    )
+    def build_runner() -> Runner:
+        # Create ADK model with the user's key and selected model
+        model = ModelFactory.create_model(
+            provider=model_config.provider,
+            model_name=model_config.model_name,
+            api_key=model_config.api_key
+        )
+        
+        # Create ADK Agent
+        agent = Agent(
+            name=agent_name,
+            model=model,
+            description=agent_description,
+            instruction=agent_instruction,
+            generate_content_config=ModelFactory.create_generate_config(
+                model_config.temperature,
+                model_config.max_tokens
+            )
+        )
+        
+        # Create ADK App
+        app = build_app(agent)
+        
+        # Create ADK Runner with session service
+        return Runner(app=app, session_service=session_service)
     
-    # Create ADK Agent
-    agent = Agent(
-        name=agent_name,
-        model=model,
-        description=agent_description,
-        instruction=agent_instruction
+    key = runner_pool.make_key(
+        agent_name,
+        model_config.provider,
+        model_config.model_name,
+        model_config.temperature,
+        model_config.api_key,
+        model_config.max_tokens
     )
-    
-    # Create ADK App
-    app = App(name="spark_to_ship", root_agent=agent)
-    
-    # Create ADK Runner with session service
-    runner = Runner(app=app, session_service=session_service)
-    
-    return runner
+    return runner_pool.get_or_create(key, build_runner)
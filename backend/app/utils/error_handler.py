@@ -3,6 +3,7 @@ Error handling utilities for graceful recovery from API errors.
 """
 import asyncio
 import logging
+import re
 from typing import Any, Callable, Optional
 from functools import wraps
 
@@ -33,6 +34,18 @@ def extract_retry_delay(error_details: dict) -> Optional[int]:
         logger.warning(f"Failed to extract retry delay: {e}")
     return None
 
+def is_rate_limit_error(error_str: str) -> bool:
+    """Whether an error message is a provider rate limit (429 RESOURCE_EXHAUSTED)"""
+    return "429 RESOURCE_EXHAUSTED" in error_str or "quota exceeded" in error_str.lower()
+
+def get_retry_after(error_str: str, default: int = 60) -> int:
+    """Extract the suggested retry delay (seconds) from a rate limit error message"""
+    # Extract delay like "Please retry in 19.384878961s"
+    match = re.search(r'retry in ([\d.]+)s', error_str)
+    if match:
+        return int(float(match.group(1))) + 1  # Add 1s buffer
+    return default
+
 async def handle_adk_errors(func: Callable, *args, **kwargs) -> dict:
     """
     Wrapper for ADK agent calls that handles common errors gracefully.
@@ -63,30 +76,18 @@ async def handle_adk_errors(func: Callable, *args, **kwargs) -> dict:
             })
             
         # Check for rate limiting (429 RESOURCE_EXHAUSTED)
-        elif "429 RESOURCE_EXHAUSTED" in error_str or "quota exceeded" in error_str.lower():
-            retry_after = None
-            
-            # Try to extract retry delay from error message
-            if "Please retry in" in error_str:
-                try:
-                    # Extract delay like "Please retry in 19.384878961s"
-                    import re
-                    match = re.search(r'retry in ([\d.]+)s', error_str)
-                    if match:
-                        retry_after = int(float(match.group(1))) + 1  # Add 1s buffer
-                except:
-                    pass
-            
-            if retry_after is None:
-                retry_after = 60  # Default to 60 seconds
+        elif is_rate_limit_error(error_str):
+            retry_after = get_retry_after(error_str)
             
             logger.warning(f"Rate limit exceeded. Retry after {retry_after}s")
             error_dict.update({
                 "error": f"API rate limit exceeded. Please wait {retry_after} seconds before retrying.",
                 "error_type": "rate_limit",
                 "retry_after": retry_after,
-                "recoverable": True,
-                "suggestion": f"The system will automatically retry in {retry_after} seconds. You can also manually retry later."
+                # The retry scheduler already gave up on this call, so pause
+                # instead of failing the task and everything that depends on it
+                "recoverable": False,
+                "suggestion": f"Wait {retry_after} seconds, then resume the sprint."
             })
             
         # Check for timeout
@@ -110,62 +111,3 @@ async def handle_adk_errors(func: Callable, *args, **kwargs) -> dict:
             })
         
         return error_dict
-
-async def retry_with_backoff(
-    func: Callable,
-    max_retries: int = 3,
-    initial_delay: int = 1,
-    max_delay: int = 60,
-    *args,
-    **kwargs
-) -> Any:
-    """
-    Retry a function with exponential backoff.
-    
-    Args:
-        func: Async function to retry
-        max_retries: Maximum number of retry attempts
-        initial_delay: Initial delay in seconds
-        max_delay: Maximum delay in seconds
-    """
-    delay = initial_delay
-    last_error = None
-    
-    for attempt in range(max_retries + 1):
-        try:
-            result = await handle_adk_errors(func, *args, **kwargs)
-            
-            # If successful, return immediately
-            if result.get("success"):
-                return result
-            
-            # If not recoverable, don't retry
-            if not result.get("recoverable"):
-                return result
-            
-            # If rate limited, use the suggested retry_after
-            if result.get("error_type") == "rate_limit" and result.get("retry_after"):
-                delay = result["retry_after"]
-            
-            last_error = result
-            
-            # Don't sleep on the last attempt
-            if attempt < max_retries:
-                logger.info(f"Attempt {attempt + 1}/{max_retries} failed. Retrying in {delay}s...")
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, max_delay)  # Exponential backoff
-                
-        except Exception as e:
-            logger.error(f"Retry attempt {attempt + 1} failed: {e}")
-            last_error = {
-                "success": False,
-                "error": str(e),
-                "error_type": "unknown",
-                "recoverable": False
-            }
-            
-            if attempt < max_retries:
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, max_delay)
-    
-    return last_error or {"success": False, "error": "Max retries exceeded", "recoverable": False}
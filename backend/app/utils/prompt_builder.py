@@ -0,0 +1,387 @@
+"""
+Token-budgeted prompt assembly.
+
+Agents describe a prompt as a list of sections, each with progressively
+cheaper renderings (pretty JSON -> compact JSON -> reduced data -> truncated).
+PromptBuilder estimates tokens locally and steps the least important sections
+down until the prompt fits the budget, so oversized requests are shrunk
+before the call instead of failing with 400 INVALID_ARGUMENT.
+"""
+import json
+import logging
+import math
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token by model family (English text / code)
+CHARS_PER_TOKEN = {
+    "gemini": 4.0,
+    "claude": 3.5,
+    "gpt": 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Input context window by model name prefix (longest prefix wins)
+MODEL_INPUT_LIMITS = {
+    "gemini-1.5-pro": 2_097_152,
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-2.0": 1_048_576,
+    "gemini-2.5": 1_048_576,
+    "gemini-exp": 1_048_576,
+    "claude": 200_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+}
+DEFAULT_INPUT_LIMIT = 128_000
+# Kept free for the response when the model config doesn't set max_tokens
+DEFAULT_OUTPUT_RESERVE = 8192
+# Optional sections are dropped rather than truncated below this size
+MIN_TRUNCATED_TOKENS = 256
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+_DIAGRAM_PREFIXES = ("graph ", "graph\n", "flowchart", "sequenceDiagram", "classDiagram", "erDiagram", "stateDiagram", "gantt", "C4")
+
+
+def _chars_per_token(model_name: str) -> float:
+    model_name = (model_name or "").lower()
+    for family, ratio in CHARS_PER_TOKEN.items():
+        if family in model_name:
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str, model_name: str = "") -> int:
+    """
+    Estimate the token count of text for a model without calling the API.
+
+    ASCII is counted by the model family's average characters per token;
+    non-ASCII characters (which tokenizers rarely merge) count one token each.
+    """
+    if not text:
+        return 0
+    non_ascii = len(_NON_ASCII.findall(text))
+    return math.ceil((len(text) - non_ascii) / _chars_per_token(model_name)) + non_ascii
+
+
+def input_token_limit(model_name: str) -> int:
+    """Input context window of a model, by longest matching name prefix."""
+    model_name = (model_name or "").lower()
+    matches = [prefix for prefix in MODEL_INPUT_LIMITS if model_name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_INPUT_LIMIT
+    return MODEL_INPUT_LIMITS[max(matches, key=len)]
+
+
+def pretty_json(data: Any) -> str:
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def strip_diagrams(data: Any) -> Any:
+    """Drop diagram fields (Mermaid source, *_diagram keys) from nested data."""
+    if isinstance(data, dict):
+        return {
+            key: strip_diagrams(value)
+            for key, value in data.items()
+            if "diagram" not in key.lower()
+            and not (isinstance(value, str) and value.lstrip().startswith(_DIAGRAM_PREFIXES))
+        }
+    if isinstance(data, list):
+        return [strip_diagrams(item) for item in data]
+    return data
+
+
+def focus_user_stories(story_id: Optional[str]) -> Callable[[Any], Any]:
+    """
+    Reducer that keeps the given story in full and only id/title of the others.
+
+    Works on a context dict with a "user_stories" entry (a list, or a dict
+    wrapping one under "user_stories"/"stories").
+    """
+    def summarize(stories: List[Any]) -> List[Any]:
+        reduced = []
+        for story in stories:
+            if not isinstance(story, dict):
+                reduced.append(story)
+                continue
+            sid = story.get("id") or story.get("story_id")
+            if story_id and sid == story_id:
+                reduced.append(story)
+            else:
+                reduced.append({"id": sid, "title": story.get("title")})
+        return reduced
+
+    def reducer(context: Any) -> Any:
+        if not isinstance(context, dict) or "user_stories" not in context:
+            return context
+        stories = context["user_stories"]
+        if isinstance(stories, list):
+            stories = summarize(stories)
+        elif isinstance(stories, dict):
+            stories = {
+                key: summarize(value) if key in ("user_stories", "stories") and isinstance(value, list) else value
+                for key, value in stories.items()
+            }
+        return {**context, "user_stories": stories}
+
+    return reducer
+
+
+def render_code_files(files: Dict[str, Any], max_lines: Optional[int] = None) -> str:
+    """
+    Render files as fenced blocks, which avoids JSON string escaping.
+
+    With max_lines, longer files keep their first and last lines only.
+    """
+    blocks = []
+    for path, content in files.items():
+        if not isinstance(content, str):
+            content = pretty_json(content)
+        if max_lines is not None:
+            lines = content.splitlines()
+            if len(lines) > max_lines:
+                head = max_lines * 3 // 4
+                tail = max_lines - head
+                content = "\n".join(
+                    lines[:head]
+                    + [f"... [{len(lines) - max_lines} lines omitted] ..."]
+                    + lines[-tail:]
+                )
+        blocks.append(f"--- {path} ---\n```\n{content}\n```")
+    return "\n\n".join(blocks)
+
+
+class PromptStats:
+    """Process-wide counters for prompt budgeting (exposed on /health)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.reduced = 0
+        self.over_budget = 0
+        self.tokens_saved = 0
+
+    def record(self, report: Dict[str, Any]):
+        with self._lock:
+            self.prompts += 1
+            if report["tokens_saved"] > 0:
+                self.reduced += 1
+            if report["over_budget"]:
+                self.over_budget += 1
+            self.tokens_saved += report["tokens_saved"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "reduced": self.reduced,
+                "over_budget": self.over_budget,
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+prompt_stats = PromptStats()
+
+
+class _Section:
+    def __init__(self, name: str, renderings: List[Callable[[], str]], priority: int, required: bool, truncatable: bool):
+        self.name = name
+        self.renderings = renderings
+        self.priority = priority
+        self.required = required
+        self.truncatable = truncatable
+        self.level = 0
+        self.text = ""
+        self.tokens = 0
+        # Per rendering level: paths the rendering leaves out (editable code files)
+        self.omitted: Optional[List[List[str]]] = None
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from sections and fit it into a token budget.
+
+    Sections with a lower priority are reduced first. Each section is stepped
+    through its renderings in order, then truncatable sections are cut to the
+    budget that remains; optional sections that still don't fit are dropped.
+    """
+
+    def __init__(self, budget: int, model_name: str = "", name: str = "prompt"):
+        self.budget = budget
+        self.model_name = model_name
+        self.name = name
+        self.sections: List[_Section] = []
+        self.report: Dict[str, Any] = {}
+        # Editable code files left out of the built prompt (see add_code_files)
+        self.omitted_files: List[str] = []
+
+    def add_text(
+        self,
+        text: str,
+        name: str = "text",
+        priority: int = 100,
+        required: bool = True,
+        truncatable: bool = False
+    ) -> "PromptBuilder":
+        self.sections.append(_Section(name, [lambda: text], priority, required, truncatable))
+        return self
+
+    def add_json(
+        self,
+        label: str,
+        data: Any,
+        name: Optional[str] = None,
+        priority: int = 50,
+        required: bool = False,
+        reducers: Optional[List[Callable[[Any], Any]]] = None
+    ) -> "PromptBuilder":
+        """
+        Add a JSON section: pretty, then compact, then compact after applying
+        each reducer cumulatively (e.g. strip_diagrams, focus_user_stories).
+        """
+        stages = [data]
+        for reducer in reducers or []:
+            stages.append(reducer(stages[-1]))
+
+        renderings = [lambda: f"{label}\n{pretty_json(data)}"]
+        renderings += [lambda d=stage: f"{label}\n{compact_json(d)}" for stage in stages]
+        self.sections.append(_Section(name or label, renderings, priority, required, truncatable=True))
+        return self
+
+    def add_code_files(
+        self,
+        label: str,
+        files: Dict[str, Any],
+        name: str = "code_files",
+        priority: int = 60,
+        required: bool = True,
+        editable: bool = False
+    ) -> "PromptBuilder":
+        """
+        Add code files: pretty JSON, fenced blocks, then fenced blocks with long files trimmed.
+
+        With editable=True (the model returns whole-file replacements that are
+        written back), files are never trimmed or cut: whole files are left
+        out instead, largest first, and listed in self.omitted_files after
+        build() so fixes for them can be refused.
+        """
+        if not editable:
+            renderings = [
+                lambda: f"{label}\n{pretty_json(files)}",
+                lambda: f"{label}\n{render_code_files(files)}",
+                lambda: f"{label}\n{render_code_files(files, max_lines=400)}",
+                lambda: f"{label}\n{render_code_files(files, max_lines=120)}",
+            ]
+            self.sections.append(_Section(name, renderings, priority, required, truncatable=True))
+            return self
+
+        def size(path: str) -> int:
+            content = files[path]
+            return len(content if isinstance(content, str) else pretty_json(content))
+
+        # The last file is always kept: a code section without code is useless
+        by_size = sorted(files, key=size, reverse=True)
+        omitted_sets = [by_size[:count] for count in range(max(len(files), 1))]
+
+        def render(omitted: List[str]) -> str:
+            kept = {path: content for path, content in files.items() if path not in omitted}
+            text = f"{label}\n{render_code_files(kept)}"
+            if omitted:
+                text += (
+                    "\n\nLeft out to fit the prompt (do not return fixes for these): "
+                    + ", ".join(sorted(omitted))
+                )
+            return text
+
+        renderings = [lambda: f"{label}\n{pretty_json(files)}"]
+        renderings += [lambda omitted=omitted: render(omitted) for omitted in omitted_sets]
+        section = _Section(name, renderings, priority, required, truncatable=False)
+        # One entry per rendering, plus everything when an optional section is dropped
+        section.omitted = [[]] + omitted_sets + [list(files)]
+        self.sections.append(section)
+        return self
+
+    def _render(self, section: _Section):
+        if section.level >= len(section.renderings):
+            section.text = ""
+        else:
+            section.text = section.renderings[section.level]()
+        section.tokens = estimate_tokens(section.text, self.model_name)
+
+    def _truncate(self, section: _Section, max_tokens: int):
+        marker = "\n... [truncated to fit the prompt budget]"
+        keep_chars = max(0, int((max_tokens - estimate_tokens(marker, self.model_name)) * _chars_per_token(self.model_name)))
+        # Non-ASCII text takes more tokens per char; shrink until the estimate fits
+        while keep_chars > 0:
+            text = section.text[:keep_chars] + marker
+            if estimate_tokens(text, self.model_name) <= max_tokens:
+                break
+            keep_chars = keep_chars * 9 // 10
+        section.text = section.text[:keep_chars] + marker if keep_chars > 0 else ""
+        section.tokens = estimate_tokens(section.text, self.model_name)
+
+    def build(self) -> str:
+        """Render the prompt within budget; details are left in self.report."""
+        for section in self.sections:
+            self._render(section)
+        original = sum(s.tokens for s in self.sections)
+        total = original
+        reductions = []
+
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            if total <= self.budget:
+                break
+            while total > self.budget and section.level < len(section.renderings) - 1:
+                section.level += 1
+                before = section.tokens
+                self._render(section)
+                total += section.tokens - before
+            
+            reduction = f"level{section.level}" if section.level > 0 else None
+            if total > self.budget and section.truncatable:
+                allowed = section.tokens - (total - self.budget)
+                # A sliver of an optional section isn't worth sending
+                if section.required or allowed >= MIN_TRUNCATED_TOKENS:
+                    before = section.tokens
+                    self._truncate(section, max(0, allowed))
+                    total += section.tokens - before
+                    reduction = "truncated"
+            if total > self.budget and not section.required:
+                section.level = len(section.renderings)
+                before = section.tokens
+                self._render(section)
+                total += section.tokens - before
+                reduction = "dropped"
+            if reduction:
+                reductions.append(f"{section.name}:{reduction}")
+
+        self.omitted_files = sorted(
+            path
+            for s in self.sections if s.omitted is not None
+            for path in s.omitted[s.level]
+        )
+        self.report = {
+            "budget": self.budget,
+            "original_tokens": original,
+            "estimated_tokens": total,
+            "tokens_saved": original - total,
+            "over_budget": total > self.budget,
+            "reductions": reductions,
+            "omitted_files": self.omitted_files,
+        }
+        prompt_stats.record(self.report)
+        if reductions:
+            logger.info(
+                f"[{self.name}] Prompt reduced {original} -> {total} tokens "
+                f"(budget {self.budget}): {', '.join(reductions)}"
+            )
+        if total > self.budget:
+            logger.warning(f"[{self.name}] Prompt still over budget: {total} > {self.budget} tokens")
+
+        return "\n\n".join(s.text for s in self.sections if s.text)
@@ -0,0 +1,323 @@
+"""
+Fast local syntax checks for generated code.
+
+These run without a model: Python is compiled, JSON and YAML are parsed, and
+JavaScript/TypeScript get a bracket-balance and import-statement check. A
+file passes when its check finds nothing and didn't have to guess; anything
+unsupported or uncertain is left for the model to review.
+
+The module only depends on the standard library (PyYAML is optional) so it
+is cheap to import in worker processes.
+"""
+import json
+import posixpath
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:  # YAML files are then left to the model
+    yaml = None
+
+# Bump when the checks change so cached results are recomputed
+CHECKS_VERSION = 1
+
+LANGUAGES = {
+    ".py": "python",
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+}
+# Extensions tried when resolving a relative JS/TS import
+IMPORT_EXTENSIONS = ["", ".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".json", "/index.ts", "/index.tsx", "/index.js", "/index.jsx"]
+# JSON files that conventionally allow comments and trailing commas
+_JSONC_NAME = re.compile(r"^(tsconfig.*|jsconfig.*|\.eslintrc|devcontainer|settings|launch|extensions)\.json$")
+
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+# After these characters a "/" starts a regex literal rather than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{;+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+_IMPORT_START = re.compile(r"(?m)^[ \t]*import\b(?!\s*[(.])")
+_IMPORT_VALID = re.compile(r"[ \t]*import\s+(?:type\s+)?(?:[\w$*{}\s,]+?\s+from\s+)?(['\"])[^'\"\n]+\1")
+_JSX_TAG = re.compile(r"</[A-Za-z]|/>")
+_IMPORT_SPECIFIERS = re.compile(
+    r"(?:\bfrom\s+|\bimport\s*\(?\s*|\brequire\s*\(\s*)(['\"])(\.{1,2}/[^'\"\n]*)\1"
+)
+
+
+def language_of(path: str) -> Optional[str]:
+    return LANGUAGES.get(posixpath.splitext(path)[1].lower())
+
+
+def _issue(line: Optional[int], column: Optional[int], message: str, severity: str = "error", category: str = "syntax") -> Dict[str, Any]:
+    return {"line": line, "column": column, "severity": severity, "category": category, "message": message}
+
+
+def check_python(path: str, content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    try:
+        compile(content, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return [_issue(e.lineno, e.offset, f"{type(e).__name__}: {e.msg}")], False
+    except ValueError as e:
+        return [_issue(None, None, str(e))], False
+    return [], False
+
+
+def _strip_json_comments(content: str) -> str:
+    # Drop comments outside strings, then trailing commas
+    content = re.sub(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*[\s\S]*?\*/', lambda m: m.group(1) or "", content)
+    return re.sub(r",(\s*[}\]])", r"\1", content)
+
+
+def check_json(path: str, content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    try:
+        json.loads(content)
+        return [], False
+    except json.JSONDecodeError as e:
+        error = e
+    if _JSONC_NAME.match(posixpath.basename(path)):
+        try:
+            json.loads(_strip_json_comments(content))
+            return [], False
+        except json.JSONDecodeError:
+            pass
+    return [_issue(error.lineno, error.colno, f"Invalid JSON: {error.msg}")], False
+
+
+def check_yaml(path: str, content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    if yaml is None:
+        return [], True
+    try:
+        # Parse events only: custom tags (!Ref, ...) are valid syntax
+        for _ in yaml.parse(content, Loader=yaml.SafeLoader):
+            pass
+    except yaml.YAMLError as e:
+        mark = getattr(e, "problem_mark", None)
+        problem = getattr(e, "problem", None) or str(e)
+        return [_issue(mark.line + 1 if mark else None, mark.column + 1 if mark else None, f"Invalid YAML: {problem}")], False
+    return [], False
+
+
+def _scan_brackets(content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Check (), [] and {} balance, skipping strings, template literals, comments
+    and regex literals.
+
+    Returns:
+        (issues, uncertain) - uncertain when the scanner had to recover from
+        something it couldn't tokenize (e.g. an apostrophe in JSX text)
+    """
+    stack: List[Tuple[str, int, int]] = []
+    issues: List[Dict[str, Any]] = []
+    uncertain = False
+    # Brace depths at which a template literal's ${ ... } expression returns to the template
+    template_depths: List[int] = []
+    i, n = 0, len(content)
+    line, line_start = 1, 0
+    prev = ""  # last significant character in code
+    word = ""  # last identifier/keyword in code
+
+    def skip_string(start: int, quote: str) -> Tuple[int, bool]:
+        j = start + 1
+        while j < n:
+            c = content[j]
+            if c == "\\":
+                j += 2
+                continue
+            if c == quote:
+                return j + 1, True
+            if c == "\n":
+                return j, False
+            j += 1
+        return j, False
+
+    def skip_template(start: int) -> int:
+        # Returns the index after the closing backtick, or at "${"
+        nonlocal line, line_start
+        j = start
+        while j < n:
+            c = content[j]
+            if c == "\\":
+                j += 2
+                continue
+            if c == "\n":
+                line += 1
+                line_start = j + 1
+            if c == "`":
+                return j + 1
+            if c == "$" and j + 1 < n and content[j + 1] == "{":
+                return j
+            j += 1
+        return j
+
+    while i < n:
+        c = content[i]
+        if c == "\n":
+            line += 1
+            line_start = i + 1
+            i += 1
+            continue
+        if c.isspace():
+            i += 1
+            continue
+        if c == "/" and content.startswith("//", i):
+            end = content.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if c == "/" and content.startswith("/*", i):
+            end = content.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            line += content.count("\n", i, end)
+            if "\n" in content[i:end]:
+                line_start = content.rfind("\n", i, end) + 1
+            i = end
+            continue
+        if c in "'\"":
+            i, closed = skip_string(i, c)
+            if not closed:
+                uncertain = True
+            prev, word = "a", ""
+            continue
+        if c == "`":
+            i = skip_template(i + 1)
+            if i < n and content.startswith("${", i):
+                template_depths.append(len(stack))
+                stack.append(("{", line, i - line_start + 1))
+                i += 2
+                prev, word = "{", ""
+            else:
+                prev, word = "a", ""
+            continue
+        if c == "/" and prev == "<":
+            # JSX closing tag
+            prev, word = c, ""
+            i += 1
+            continue
+        if c == "/" and (prev == "" or prev in _REGEX_PRECEDERS or word in _REGEX_KEYWORDS):
+            # Regex literal: skip to the closing slash (not inside a [...] class)
+            j, in_class = i + 1, False
+            while j < n and content[j] != "\n":
+                if content[j] == "\\":
+                    j += 2
+                    continue
+                if content[j] == "[":
+                    in_class = True
+                elif content[j] == "]":
+                    in_class = False
+                elif content[j] == "/" and not in_class:
+                    break
+                j += 1
+            if j >= n or content[j] == "\n":
+                uncertain = True
+                i = j
+            else:
+                i = j + 1
+            prev, word = "a", ""
+            continue
+        if c in "([{":
+            stack.append((c, line, i - line_start + 1))
+        elif c in ")]}":
+            if not stack:
+                issues.append(_issue(line, i - line_start + 1, f"Unmatched '{c}'"))
+            else:
+                opener, open_line, open_col = stack.pop()
+                if opener != _CLOSERS[c]:
+                    issues.append(_issue(line, i - line_start + 1, f"'{c}' does not match '{opener}' opened at line {open_line}"))
+                    break
+                if c == "}" and template_depths and template_depths[-1] == len(stack):
+                    # End of a ${ ... } expression: continue the template literal
+                    template_depths.pop()
+                    i = skip_template(i + 1)
+                    if i < n and content.startswith("${", i):
+                        template_depths.append(len(stack))
+                        stack.append(("{", line, i - line_start + 1))
+                        i += 2
+                        prev, word = "{", ""
+                    else:
+                        prev, word = "a", ""
+                    continue
+        if c.isalnum() or c in "_$":
+            j = i
+            while j < n and (content[j].isalnum() or content[j] in "_$"):
+                j += 1
+            word = content[i:j]
+            prev = "a"
+            i = j
+            continue
+        prev, word = c, ""
+        i += 1
+
+    if not issues:
+        for opener, open_line, open_col in stack[-3:]:
+            issues.append(_issue(open_line, open_col, f"'{opener}' is never closed"))
+    return issues, uncertain
+
+
+def check_javascript(path: str, content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    issues, uncertain = _scan_brackets(content)
+    for match in _IMPORT_START.finditer(content):
+        if not _IMPORT_VALID.match(content, match.start()):
+            line = content.count("\n", 0, match.start()) + 1
+            issues.append(_issue(line, 1, "Malformed import statement"))
+    # JSX text can hold quotes, backticks and brackets that aren't code, so
+    # problems found in JSX files (or after the scanner had to guess) may be
+    # the scanner's own mistake: leave those files to the model
+    jsx = path.endswith((".jsx", ".tsx")) or _JSX_TAG.search(content) is not None
+    if issues and (uncertain or jsx):
+        return [], True
+    return sorted(issues, key=lambda issue: issue["line"] or 0), uncertain
+
+
+CHECKERS = {
+    "python": check_python,
+    "json": check_json,
+    "yaml": check_yaml,
+    "javascript": check_javascript,
+    "typescript": check_javascript,
+}
+
+
+def relative_imports(content: str) -> List[Tuple[str, int]]:
+    """Relative module specifiers (./x, ../y) imported or required by a JS/TS file, with lines."""
+    return [
+        (match.group(2), content.count("\n", 0, match.start()) + 1)
+        for match in _IMPORT_SPECIFIERS.finditer(content)
+    ]
+
+
+def check_file(path: str, content: str) -> Dict[str, Any]:
+    """
+    Run the local check for one file.
+
+    Returns:
+        {"language": str or None, "issues": [...], "uncertain": bool,
+         "imports": [(specifier, line), ...]} - uncertain (or an unsupported
+        language) means the file still needs a model review
+    """
+    language = language_of(path)
+    checker = CHECKERS.get(language)
+    if checker is None:
+        return {"language": language, "issues": [], "uncertain": True, "imports": []}
+    try:
+        issues, uncertain = checker(path, content)
+    except RecursionError:
+        issues, uncertain = [], True
+    imports = relative_imports(content) if language in ("javascript", "typescript") else []
+    return {"language": language, "issues": issues, "uncertain": uncertain, "imports": imports}
+
+
+def check_files(files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """check_file over a batch (one round trip to a worker process)."""
+    return [check_file(path, content) for path, content in files]
+
+
+def resolve_import(importer: str, specifier: str, paths: set) -> bool:
+    """Whether a relative import of importer resolves to one of paths."""
+    base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+    return any(base + ext in paths for ext in IMPORT_EXTENSIONS)
@@ -0,0 +1,13 @@
+"""
+Shared test setup.
+
+Services create their data directories (data/projects, data/cache, ...)
+relative to the working directory when they are imported, so the tests run
+from a scratch directory instead of writing into the checkout.
+"""
+import os
+import tempfile
+
+
+def pytest_sessionstart(session):
+    os.chdir(tempfile.mkdtemp(prefix="sparktoship-tests-"))
@@ -0,0 +1,66 @@
+from app.agents.engineering.qa_agent import merge_reviews, shard_files
+from app.utils.prompt_builder import estimate_tokens
+
+
+def code(tokens):
+    # estimate_tokens counts about 3.5 ASCII characters per token by default
+    return "x" * int(tokens * 3.5)
+
+
+def test_shards_respect_the_token_budget_in_path_order():
+    files = {f"src/f{i}.py": code(400) for i in range(5)}
+    shards = shard_files(files, shard_tokens=1000)
+
+    assert [list(shard) for shard in shards] == [
+        ["src/f0.py", "src/f1.py"],
+        ["src/f2.py", "src/f3.py"],
+        ["src/f4.py"],
+    ]
+    for shard in shards:
+        assert sum(estimate_tokens(content) for content in shard.values()) <= 1000
+
+
+def test_oversized_file_gets_its_own_shard():
+    shards = shard_files({"a.py": code(100), "b.py": code(5000), "c.py": code(100)}, shard_tokens=1000)
+    assert [list(shard) for shard in shards] == [["a.py"], ["b.py"], ["c.py"]]
+
+
+def test_every_file_lands_in_exactly_one_shard():
+    files = {f"f{i}.json": {"n": i} for i in range(20)}
+    shards = shard_files(files, shard_tokens=50)
+    paths = [path for shard in shards for path in shard]
+    assert sorted(paths) == sorted(files)
+    assert shard_files({}, shard_tokens=50) == []
+
+
+def test_merge_dedupes_and_orders_by_severity_then_location():
+    findings = {
+        "b.py": [
+            {"file": "b.py", "line": 3, "severity": "low", "issue": "Unused import"},
+            {"file": "b.py", "line": 3, "severity": "low", "issue": "unused   IMPORT"},
+        ],
+        "a.py": [
+            {"file": "a.py", "line": 9, "severity": "critical", "issue": "SQL injection"},
+            {"file": "a.py", "line": 2, "severity": "high", "issue": "Unchecked error"},
+        ],
+    }
+    general = [{"file": None, "severity": "medium", "issue": "No tests"}]
+    report = merge_reviews(findings, general, [], files_reviewed=2, cached_files=1, shards=2)
+
+    assert [(f["file"], f["severity"]) for f in report["findings"]] == [
+        ("a.py", "critical"), ("a.py", "high"), (None, "medium"), ("b.py", "low"),
+    ]
+    assert report["summary"] == {
+        "files_reviewed": 2,
+        "total_findings": 4,
+        "by_severity": {"critical": 1, "high": 1, "medium": 1, "low": 1},
+        "shards": 2,
+        "cached_files": 1,
+    }
+
+
+def test_merge_reports_failed_shards_and_tolerates_odd_findings():
+    failed = [{"files": ["c.py"], "error": "timeout"}]
+    report = merge_reviews({"a.py": [{"file": "a.py", "line": "7", "severity": "Weird", "issue": "x"}]}, [], failed, files_reviewed=1)
+    assert report["failed_shards"] == failed
+    assert report["summary"]["by_severity"] == {"weird": 1}
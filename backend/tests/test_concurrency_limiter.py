@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.core.concurrency_limiter import AdaptiveLimiter, ConcurrencyLimiter
+
+
+def limiter(**kwargs):
+    params = {"initial": 4, "min_window": 1, "max_window": 8, "backoff": 0.5, "latency_tolerance": 3.0}
+    params.update(kwargs)
+    return AdaptiveLimiter(("google", "gemini"), **params)
+
+
+def test_window_grows_additively_only_when_saturated():
+    lim = limiter(initial=2)
+    lim.in_flight = 0
+    lim.on_success(1.0)
+    assert lim.window == 2  # not the bottleneck: no growth
+
+    lim.in_flight = 2
+    lim.on_success(1.0)
+    assert lim.window == pytest.approx(2.5)
+    lim.on_success(1.0)
+    assert lim.window == pytest.approx(2.9)
+
+
+def test_window_is_capped_at_max():
+    lim = limiter(initial=8, max_window=8)
+    lim.in_flight = 8
+    lim.on_success(1.0)
+    assert lim.window == 8
+
+
+def test_overload_halves_the_window_once_per_round_trip():
+    lim = limiter(initial=8)
+    lim.on_overload()
+    assert lim.window == 4
+    # Calls that were already in flight report the same overload
+    lim.on_overload()
+    assert lim.window == 4
+    assert lim.decreases == 1
+
+
+def test_overload_never_shrinks_below_min():
+    lim = limiter(initial=1.5, min_window=1)
+    lim.on_overload()
+    assert lim.window == 1
+
+
+def test_latency_spike_shrinks_the_window():
+    lim = limiter(initial=8)
+    lim.on_success(1.0)  # baseline
+    lim.on_success(10.0)
+    assert lim.window == 4
+
+
+def test_calls_beyond_the_window_queue_in_fifo_order():
+    async def main():
+        lim = limiter(initial=1)
+        order = []
+
+        async def call(name):
+            await lim.acquire()
+            order.append(name)
+            await asyncio.sleep(0)
+            lim.release()
+
+        await lim.acquire()  # hold the only slot
+        tasks = [asyncio.create_task(call(n)) for n in "abc"]
+        await asyncio.sleep(0)
+        assert lim.stats()["queued"] == 3
+        lim.release()
+        await asyncio.gather(*tasks)
+        return order, lim
+
+    order, lim = asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    assert lim.in_flight == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        lim = limiter(initial=1)
+        await lim.acquire()
+        waiter = asyncio.create_task(lim.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        lim.release()
+        return lim
+
+    lim = asyncio.run(main())
+    assert lim.in_flight == 0
+    assert not lim._waiters
+
+
+def test_slot_feeds_rate_limits_back_and_releases_on_error():
+    registry = ConcurrencyLimiter({"initial": 4, "min_window": 1, "max_window": 8, "backoff": 0.5, "latency_tolerance": 3.0})
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            async with registry.slot("google", "gemini"):
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        with pytest.raises(ValueError):
+            async with registry.slot("google", "gemini"):
+                raise ValueError("unrelated")
+
+    asyncio.run(main())
+    lim = registry.get("google", "gemini")
+    assert lim.window == 2
+    assert lim.decreases == 1
+    assert lim.in_flight == 0
+
+
+def test_overrides_apply_per_model_then_provider_model():
+    registry = ConcurrencyLimiter(
+        {"initial": 4, "max_window": 8},
+        {"gemini": {"initial": 2}, "google/gemini": {"max_window": 3}}
+    )
+    lim = registry.get("google", "gemini")
+    assert (lim.window, lim.max_window) == (2, 3)
+    assert registry.get("openai", "gpt").window == 4
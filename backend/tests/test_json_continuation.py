@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from app.utils.adk_helper import (
+    StreamingJSONAssembler,
+    continuation_prompt,
+    is_truncated,
+    parse_json_response,
+    stitch_continuation,
+)
+
+DOCUMENT = json.dumps({
+    "sprint_plan": [
+        {"task_id": f"TASK-00{i}", "title": f"Task {i} with a \"quoted\" {{brace}}", "story_id": "S1"}
+        for i in range(1, 6)
+    ],
+    "notes": "done"
+}, indent=2)
+
+
+def test_assembler_reports_top_level_keys_as_they_complete():
+    assembler = StreamingJSONAssembler()
+    completed = []
+    for i in range(0, len(DOCUMENT), 7):
+        completed += assembler.feed(DOCUMENT[i:i + 7])
+    assert completed == ["sprint_plan", "notes"]
+    assert assembler.balanced
+    assert assembler.result() == json.loads(DOCUMENT)
+
+
+def test_assembler_ignores_braces_in_strings_and_leading_fences():
+    assembler = StreamingJSONAssembler()
+    assembler.feed('```json\n{"a": "} ] \\" {"')
+    assert not assembler.balanced
+    assembler.feed(', "b": [1, {"c": 2}]}\n```')
+    assert assembler.balanced
+    assert assembler.completed_keys == ["a", "b"]
+
+
+def test_truncation_detection():
+    assert not is_truncated(DOCUMENT)
+    assert is_truncated(DOCUMENT[:len(DOCUMENT) // 2])
+    assert is_truncated("```json\n" + DOCUMENT[:100])
+    # Prose and markdown are only continued on a max-token finish
+    assert not is_truncated("# Walkthrough\n\nSee {the} [code")
+    assert is_truncated("# Walkthrough", "MAX_TOKENS")
+    assert is_truncated(DOCUMENT, "length")
+    assert not is_truncated(DOCUMENT, "STOP")
+    assert not is_truncated("")
+
+
+@pytest.mark.parametrize("cut", [10, len(DOCUMENT) // 2, len(DOCUMENT) - 3])
+def test_plain_continuation_stitches_back_into_the_document(cut):
+    stitched = stitch_continuation(DOCUMENT[:cut], DOCUMENT[cut:])
+    assert stitched == DOCUMENT
+
+
+def test_repeated_tail_and_reopened_fence_are_dropped():
+    cut = len(DOCUMENT) * 9 // 10
+    response = "```json\n" + DOCUMENT[:cut]
+    continuation = "```json\n" + DOCUMENT[cut - 40:] + "\n```"
+    stitched = stitch_continuation(response, continuation)
+    assert parse_json_response(stitched) == json.loads(DOCUMENT)
+
+
+def test_closing_fence_is_dropped_when_the_response_had_none():
+    cut = len(DOCUMENT) // 2
+    stitched = stitch_continuation(DOCUMENT[:cut], "```\n" + DOCUMENT[cut:] + "\n```")
+    assert json.loads(stitched) == json.loads(DOCUMENT)
+
+
+def test_restarted_document_replaces_the_partial_one():
+    stitched = stitch_continuation(DOCUMENT[:200], DOCUMENT)
+    assert stitched == DOCUMENT
+
+
+def test_short_coincidental_overlap_is_kept():
+    # "1, " repeats by chance but is shorter than the minimum overlap
+    assert stitch_continuation('{"a": [1, ', '1, 2]}') == '{"a": [1, 1, 2]}'
+
+
+def test_multiple_continuations():
+    pieces = [DOCUMENT[:150], DOCUMENT[150:400], DOCUMENT[400:]]
+    response = pieces[0]
+    for piece in pieces[1:]:
+        assert is_truncated(response)
+        response = stitch_continuation(response, piece)
+    assert not is_truncated(response)
+    assert json.loads(response) == json.loads(DOCUMENT)
+
+
+def test_continuation_prompt_quotes_the_tail():
+    prompt = continuation_prompt(DOCUMENT, tail_chars=50)
+    assert prompt.endswith(DOCUMENT[-50:])
+    assert DOCUMENT[:50] not in prompt
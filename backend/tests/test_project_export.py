@@ -0,0 +1,24 @@
+import io
+import zipfile
+
+from app.services.project_export import ProjectExporter
+from app.services.project_storage import ProjectStorage
+from app.services.sprint_journal import SprintJournal
+
+
+def test_export_keeps_project_files_and_metadata_but_not_bookkeeping(tmp_path):
+    storage = ProjectStorage(base_dir=str(tmp_path / "projects"), index_path=str(tmp_path / "index.db"))
+    storage.save_project_name("s", "Demo")
+    storage.save_step("s", "prd", {"a": 1})
+    storage.save_code_file("s", "src/x.py", "x = 1\n")
+    storage.save_job("s", {"job_id": "j1", "created_at": "2026-01-01T00:00:00"})
+    journal = SprintJournal(storage, commit_interval=0)
+    journal.append("s", "run_started")
+    journal.flush(timeout=5)
+
+    exporter = ProjectExporter(storage, cache_dir=str(tmp_path / "exports"), cache_max_bytes=10 ** 7)
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(exporter.stream("s"))))
+
+    assert sorted(archive.namelist()) == ["code/src/x.py", "metadata.json", "prd.json"]
+    assert b'"project_name": "Demo"' in archive.read("metadata.json")
+    assert exporter.get_cached("s") is not None
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+import app.main as main
+from app.core.model_config import ModelConfig
+from app.core.orchestrator import orchestrator
+from app.services.project_storage import project_storage
+from app.services.sprint_journal import sprint_journal
+
+MODEL_CONFIG = ModelConfig(provider="google", model_name="gemini-2.0-flash", api_key="test-key")
+
+
+class Debugger:
+    """Stands in for debugger_agent.debug_code; replies are returned in order."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def __call__(self, error_message, code_files, context, session_id, model_config):
+        self.calls.append(sorted(code_files))
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return {"fixes": [{"path": path, "content": content} for path, content in reply.items()]}
+
+
+@pytest.fixture
+def session():
+    yield orchestrator.create_session()
+    # Write-behind files must land in the scratch directory; pytest restores
+    # the original working directory before atexit flushes would run
+    project_storage.flush()
+    sprint_journal.flush(timeout=5)
+
+
+def repair(session, monkeypatch, files, *replies, attempts=2):
+    debugger = Debugger(*replies)
+    monkeypatch.setattr(main.debugger_agent, "debug_code", debugger)
+    monkeypatch.setattr(main.settings, "SAVE_REPAIR_MAX_ATTEMPTS", attempts)
+    file_list = [{"path": path, "content": content} for path, content in files.items()]
+    repaired, validation = asyncio.run(main.repair_generated_files(
+        session, session.session_id, {"task_id": "TASK-001"}, file_list, MODEL_CONFIG
+    ))
+    return {f["path"]: f["content"] for f in repaired}, validation, debugger
+
+
+def test_clean_files_skip_the_debugger(session, monkeypatch):
+    files, validation, debugger = repair(session, monkeypatch, {"a.py": "x = 1\n", "b.json": "{}"})
+    assert debugger.calls == []
+    assert validation == {"repaired": [], "broken": {}, "attempts": 0}
+    assert files == {"a.py": "x = 1\n", "b.json": "{}"}
+
+
+def test_only_broken_files_are_sent_and_repaired(session, monkeypatch):
+    files, validation, debugger = repair(
+        session, monkeypatch,
+        {"a.py": "x = 1\n", "b.py": "def f(:\n"},
+        # A "fix" for a file that wasn't broken is ignored
+        {"b.py": "def f():\n    pass\n", "a.py": "overwritten"},
+    )
+    assert debugger.calls == [["b.py"]]
+    assert validation["repaired"] == ["b.py"]
+    assert validation["broken"] == {}
+    assert validation["attempts"] == 1
+    assert files == {"a.py": "x = 1\n", "b.py": "def f():\n    pass\n"}
+
+
+def test_repair_that_still_fails_to_parse_keeps_the_original(session, monkeypatch):
+    files, validation, debugger = repair(
+        session, monkeypatch,
+        {"c.py": "def g(:\n"},
+        {"c.py": "def g(::\n"},
+        {"c.py": "still ("},
+    )
+    assert len(debugger.calls) == 2
+    assert validation["attempts"] == 2
+    assert list(validation["broken"]) == ["c.py"]
+    assert validation["repaired"] == []
+    assert files == {"c.py": "def g(:\n"}
+
+
+def test_debugger_failure_stops_repairing(session, monkeypatch):
+    files, validation, _ = repair(session, monkeypatch, {"c.py": "def g(:\n"}, RuntimeError("model down"))
+    assert validation["attempts"] == 1
+    assert list(validation["broken"]) == ["c.py"]
+    assert files == {"c.py": "def g(:\n"}
+
+
+def test_repair_disabled_reports_only(session, monkeypatch):
+    _, validation, debugger = repair(session, monkeypatch, {"c.py": "def g(:\n"}, attempts=0)
+    assert debugger.calls == []
+    assert list(validation["broken"]) == ["c.py"]
+
+
+class DevAgent:
+    name = "backend_dev"
+
+    def __init__(self, files):
+        self.files = files
+
+    async def write_code(self, task, context, session_id, model_config):
+        return {"files": [{"path": path, "content": content} for path, content in self.files.items()]}
+
+
+def test_task_with_unrepairable_files_fails_with_syntax_error(session, monkeypatch):
+    monkeypatch.setattr(main.debugger_agent, "debug_code", Debugger({"d.py": "still ("}))
+    monkeypatch.setattr(main.settings, "SAVE_REPAIR_MAX_ATTEMPTS", 1)
+    sid = session.session_id
+
+    result = asyncio.run(main.execute_dev_task(
+        DevAgent({"d.py": "def g(:\n", "ok.py": "y = 2\n"}), "Backend", session, sid,
+        {"task_id": "TASK-002", "title": "t"}, {}, MODEL_CONFIG
+    ))
+
+    assert result["error_type"] == "syntax_error"
+    assert result["recoverable"] is True
+    assert "d.py" in result["error"]
+    # Broken files are still saved for inspection, but the task isn't complete
+    assert (project_storage.get_project_dir(sid) / "code" / "d.py").read_text() == "def g(:\n"
+    assert project_storage.get_task_status(sid, "TASK-002") is None
+    sprint_journal.flush(timeout=5)
+    events = [r["event"] for r in sprint_journal.read(sid) if r.get("task_id") == "TASK-002"]
+    assert events[-1] == "task_failed"
+    assert "task_completed" not in events
+    generated = [r for r in sprint_journal.read(sid) if r.get("event") == "task_generated" and r.get("task_id") == "TASK-002"]
+    assert generated[-1]["valid"] is False
+
+
+def test_task_with_repaired_files_completes(session, monkeypatch):
+    monkeypatch.setattr(main.debugger_agent, "debug_code", Debugger({"e.py": "z = 3\n"}))
+    sid = session.session_id
+
+    result = asyncio.run(main.execute_dev_task(
+        DevAgent({"e.py": "z = (3\n"}), "Backend", session, sid,
+        {"task_id": "TASK-003", "title": "t"}, {}, MODEL_CONFIG
+    ))
+
+    assert result["validation"]["repaired"] == ["e.py"]
+    assert (project_storage.get_project_dir(sid) / "code" / "e.py").read_text() == "z = 3\n"
+    assert project_storage.get_task_status(sid, "TASK-003") == "complete"
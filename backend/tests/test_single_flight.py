@@ -0,0 +1,215 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import IdempotencyKeyConflict, SingleFlight
+
+
+def test_fingerprint_ignores_whitespace_and_key_order():
+    a = SingleFlight.fingerprint("s", "agent", {"b": " x ", "a": [" y"]})
+    b = SingleFlight.fingerprint("s", "agent", {"a": ["y"], "b": "x"})
+    assert a == b
+    assert a != SingleFlight.fingerprint("s", "other_agent", {"a": ["y"], "b": "x"})
+    assert a != SingleFlight.fingerprint("s2", "agent", {"a": ["y"], "b": "x"})
+
+
+def test_concurrent_duplicates_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"ok": calls}
+
+    async def main():
+        return await asyncio.gather(*(flights.run("fp", func) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert results == [{"ok": 1}] * 3
+    assert flights.stats()["coalesced"] == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_sequential_calls_without_key_run_again():
+    flights = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        return {}
+
+    async def main():
+        await flights.run("fp", func)
+        await flights.run("fp", func)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_exceptions_are_shared_by_all_waiters():
+    flights = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(flights.run("fp", func), flights.run("fp", func), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_idempotency_key_replays_successful_results():
+    flights = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    async def main():
+        first = await flights.run("fp", func, idempotency_key="k")
+        second = await flights.run("fp", func, idempotency_key="k")
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == {"value": 1}
+    assert len(calls) == 1
+    assert flights.stats()["replayed"] == 1
+
+
+def test_error_results_are_not_stored_for_replay():
+    flights = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        return {"error": "rate limited"}
+
+    async def main():
+        await flights.run("fp", func, idempotency_key="k")
+        await flights.run("fp", func, idempotency_key="k")
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_reusing_a_key_for_a_different_request_conflicts():
+    flights = SingleFlight()
+
+    async def func():
+        return {}
+
+    async def main():
+        await flights.run("fp1", func, idempotency_key="k")
+        with pytest.raises(IdempotencyKeyConflict):
+            await flights.run("fp2", func, idempotency_key="k")
+
+    asyncio.run(main())
+
+
+def test_expired_and_evicted_results_run_again():
+    flights = SingleFlight(idempotency_ttl_seconds=-1, max_results=1)
+    calls = []
+
+    async def func():
+        calls.append(1)
+        return {}
+
+    async def main():
+        await flights.run("fp", func, idempotency_key="k")
+        await flights.run("fp", func, idempotency_key="k")
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+    flights = SingleFlight(max_results=1)
+
+    async def evict():
+        await flights.run("fp1", func, idempotency_key="k1")
+        await flights.run("fp2", func, idempotency_key="k2")
+
+    asyncio.run(evict())
+    assert flights.stats()["stored_results"] == 1
+
+
+def test_shared_call_is_cancelled_only_when_every_caller_left():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def func():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        first = asyncio.create_task(flights.run("fp", func))
+        second = asyncio.create_task(flights.run("fp", func))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled  # the second caller still waits
+        second.cancel()
+        await asyncio.sleep(0.01)
+        for task in (first, second):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert cancelled == [1]
+
+
+def test_endpoint_calls_with_different_cache_setting_or_key_are_not_coalesced():
+    from app.core.model_config import ModelConfig
+    from app.main import coalesced
+
+    calls = []
+
+    @coalesced("test_agent")
+    async def handler(session_id: str, model_config: ModelConfig):
+        calls.append(model_config)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    def config(**overrides):
+        return ModelConfig(**{"api_key": "key-a", **overrides})
+
+    async def main():
+        await asyncio.gather(
+            handler("s", config()),
+            handler("s", config()),
+            handler("s", config(use_cache=False)),
+            handler("s", config(api_key="key-b")),
+        )
+
+    asyncio.run(main())
+    assert len(calls) == 3
+
+
+def test_streamed_endpoint_calls_are_not_coalesced():
+    from app.main import coalesced
+    from app.utils.adk_helper import stream_to
+
+    calls = []
+
+    @coalesced("test_agent")
+    async def handler(session_id: str, text: str):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def streamed():
+        with stream_to(asyncio.Queue()):
+            return await handler("s", "same")
+
+    async def main():
+        await asyncio.gather(handler("s", "same"), streamed(), streamed())
+
+    asyncio.run(main())
+    assert len(calls) == 3
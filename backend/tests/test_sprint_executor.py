@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+
+from app.core.sprint_executor import SprintExecutor, build_task_graph
+
+
+def task(task_id, story_id=None, assignee="Backend"):
+    return {"task_id": task_id, "title": task_id, "story_id": story_id, "assignee": assignee}
+
+
+def run_sprint(tasks, run_task, max_workers=4, completed=None):
+    """Run a sprint to completion; returns (run, [(task_id, status, error)])."""
+    executor = SprintExecutor()
+    statuses = []
+
+    async def main():
+        def on_status(task_id, status):
+            statuses.append((task_id, status, executor.runs["s"].errors.get(task_id)))
+
+        executor.start("s", tasks, run_task, max_workers, completed=completed, on_status=on_status)
+        return await executor.wait("s")
+
+    return asyncio.run(main()), statuses
+
+
+def test_graph_chains_story_tasks_in_plan_order():
+    graph = build_task_graph([task("T1", "S1"), task("T2", "S1"), task("T3", "S1")])
+    assert graph == {"T1": [], "T2": ["T1"], "T3": ["T1", "T2"]}
+
+
+def test_graph_frontend_waits_for_all_backend_tasks_of_its_story():
+    graph = build_task_graph([
+        task("T1", "S1"),
+        task("T2", "S1", "Frontend"),
+        task("T3", "S1"),
+    ])
+    assert graph["T2"] == ["T1", "T3"]
+    # Backend work doesn't wait for earlier frontend tasks (that would be a cycle)
+    assert graph["T3"] == ["T1"]
+
+
+def test_graph_keeps_stories_and_storyless_tasks_independent():
+    graph = build_task_graph([task("T1", "S1"), task("T2", "S2"), task("T3")])
+    assert graph == {"T1": [], "T2": [], "T3": []}
+
+
+@pytest.mark.parametrize("tasks", [
+    [task("T1"), task("T1")],
+    [{"title": "no id"}],
+])
+def test_graph_rejects_invalid_plans(tasks):
+    with pytest.raises(ValueError):
+        build_task_graph(tasks)
+
+
+def test_tasks_run_after_their_dependencies():
+    finished = []
+
+    async def run_task(t):
+        await asyncio.sleep(0.01)
+        finished.append(t["task_id"])
+        return {"files": []}
+
+    tasks = [task("T1", "S1"), task("T2", "S1", "Frontend"), task("T3", "S2"), task("T4", "S1")]
+    run, _ = run_sprint(tasks, run_task)
+
+    assert run.status == "completed"
+    assert set(run.task_statuses.values()) == {"complete"}
+    assert finished.index("T2") > max(finished.index("T1"), finished.index("T4"))
+    assert finished.index("T4") > finished.index("T1")
+
+
+def test_concurrency_is_bounded_by_max_workers():
+    running = 0
+    peak = 0
+
+    async def run_task(t):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    run, _ = run_sprint([task(f"T{i}") for i in range(8)], run_task, max_workers=3)
+    assert run.status == "completed"
+    assert peak == 3
+
+
+def test_failure_skips_only_descendants_and_reports_the_error():
+    async def run_task(t):
+        if t["task_id"] == "T1":
+            return {"error": "boom", "error_type": "unknown", "recoverable": True}
+        return {}
+
+    tasks = [task("T1", "S1"), task("T2", "S1"), task("T3", "S1", "Frontend"), task("T4", "S2")]
+    run, statuses = run_sprint(tasks, run_task)
+
+    assert run.task_statuses == {"T1": "error", "T2": "skipped", "T3": "skipped", "T4": "complete"}
+    assert run.errors["T1"] == "boom"
+    # Status listeners (journal, events) see the error with the status change
+    assert ("T1", "error", "boom") in statuses
+    assert ("T2", "skipped", "Required task(s) failed: T1") in statuses
+
+
+def test_unrecoverable_error_pauses_and_leaves_pending_tasks():
+    calls = []
+
+    async def run_task(t):
+        calls.append(t["task_id"])
+        return {"error": "out of tokens", "error_type": "token_exhausted", "recoverable": False}
+
+    run, _ = run_sprint([task("T1"), task("T2")], run_task, max_workers=1)
+
+    assert run.status == "paused"
+    assert calls == ["T1"]
+    assert run.task_statuses["T2"] == "pending"
+
+
+def test_rate_limit_the_scheduler_gave_up_on_pauses_the_sprint():
+    calls = []
+    rate_limited = True
+
+    async def run_task(t):
+        calls.append(t["task_id"])
+        if rate_limited:
+            return {"error": "429", "error_type": "rate_limit", "retry_after": 60, "recoverable": False}
+        return {}
+
+    tasks = [task("T1", "S1"), task("T2", "S1")]
+    run, _ = run_sprint(tasks, run_task)
+    # Not retried by the executor, and the sprint can be resumed later
+    assert calls == ["T1"]
+    assert run.status == "paused"
+
+    rate_limited = False
+    run, _ = run_sprint(tasks, run_task)
+    assert calls == ["T1", "T1", "T2"]
+    assert run.status == "completed"
+
+
+def test_exceptions_fail_the_task_without_stopping_the_sprint():
+    async def run_task(t):
+        if t["task_id"] == "T1":
+            raise RuntimeError("crashed")
+        return {}
+
+    run, _ = run_sprint([task("T1"), task("T2")], run_task)
+    assert run.task_statuses == {"T1": "error", "T2": "complete"}
+    assert run.errors["T1"] == "crashed"
+
+
+def test_resume_skips_completed_tasks_and_unblocks_their_dependents():
+    calls = []
+
+    async def run_task(t):
+        calls.append(t["task_id"])
+        return {}
+
+    tasks = [task("T1", "S1"), task("T2", "S1")]
+    run, _ = run_sprint(tasks, run_task, completed={"T1"})
+
+    assert calls == ["T2"]
+    assert run.task_statuses == {"T1": "complete", "T2": "complete"}
+
+
+def test_only_one_run_per_session():
+    async def main():
+        executor = SprintExecutor()
+        gate = asyncio.Event()
+
+        async def run_task(t):
+            await gate.wait()
+            return {}
+
+        executor.start("s", [task("T1")], run_task, 1)
+        with pytest.raises(ValueError):
+            executor.start("s", [task("T1")], run_task, 1)
+        gate.set()
+        await executor.wait("s")
+
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+import hashlib
+import json
+
+import pytest
+
+from app.services.project_storage import SPRINT_JOURNAL_FILE, ProjectStorage
+from app.services.sprint_journal import SprintJournal
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return ProjectStorage(base_dir=str(tmp_path / "projects"), index_path=str(tmp_path / "index.db"))
+
+
+@pytest.fixture
+def journal(storage):
+    return SprintJournal(storage, commit_interval=0)
+
+
+def write_code(storage, session_id, path, content):
+    storage.save_code_file(session_id, path, content)
+    return {"path": path, "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest()}
+
+
+def test_appends_are_durable_after_flush(journal):
+    journal.append("s", "run_started", max_workers=2)
+    journal.append("s", "task_started", task_id="T1")
+    assert journal.flush(timeout=5)
+    assert [r["event"] for r in journal.read("s")] == ["run_started", "task_started"]
+    assert journal.stats()["pending"] == 0
+
+
+def test_replay_restores_task_outcomes_with_errors(journal):
+    journal.append("s", "run_started")
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_completed", task_id="T1")
+    journal.append("s", "task_started", task_id="T2")
+    journal.append("s", "task_failed", task_id="T2", error="boom", error_type="unknown")
+    journal.append("s", "task_skipped", task_id="T3", error="Required task(s) failed: T2")
+    journal.append("s", "run_finished", status="completed")
+    journal.flush(timeout=5)
+
+    state = journal.replay("s")
+    assert state["run"]["status"] == "completed"
+    assert state["tasks"] == {
+        "T1": {"status": "complete"},
+        "T2": {"status": "error", "error": "boom", "error_type": "unknown"},
+        "T3": {"status": "skipped", "error": "Required task(s) failed: T2"},
+    }
+
+
+def test_interrupted_run_stays_running(journal):
+    journal.append("s", "run_started")
+    journal.append("s", "task_started", task_id="T1")
+    journal.flush(timeout=5)
+
+    state = journal.replay("s")
+    assert state["run"]["status"] == "running"
+    assert state["tasks"]["T1"]["status"] == "loading"
+
+
+def test_task_with_all_files_written_intact_counts_as_complete(journal, storage):
+    files = [write_code(storage, "s", "a.py", "x = 1\n"), write_code(storage, "s", "b.py", "y = 2\n")]
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_generated", task_id="T1", files=files, valid=True)
+    for file in files:
+        journal.append("s", "file_written", task_id="T1", path=file["path"])
+    journal.flush(timeout=5)
+
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "complete"
+
+
+def test_task_with_missing_or_changed_files_is_not_complete(journal, storage):
+    files = [write_code(storage, "s", "a.py", "x = 1\n"), write_code(storage, "s", "b.py", "y = 2\n")]
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_generated", task_id="T1", files=files, valid=True)
+    journal.append("s", "file_written", task_id="T1", path="a.py")
+    journal.flush(timeout=5)
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "loading"
+
+    journal.append("s", "file_written", task_id="T1", path="b.py")
+    journal.flush(timeout=5)
+    storage.save_code_file("s", "b.py", "torn")
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "loading"
+
+
+def test_files_that_failed_validation_need_an_explicit_outcome(journal, storage):
+    files = [write_code(storage, "s", "a.py", "def f(:\n")]
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_generated", task_id="T1", files=files, valid=False)
+    journal.append("s", "file_written", task_id="T1", path="a.py")
+    journal.flush(timeout=5)
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "loading"
+
+    journal.append("s", "task_failed", task_id="T1", error="Syntax errors remain in a.py", error_type="syntax_error")
+    journal.flush(timeout=5)
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "error"
+
+
+def test_generated_record_without_validation_outcome_is_not_trusted(journal, storage):
+    files = [write_code(storage, "s", "a.py", "x = 1\n")]
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_generated", task_id="T1", files=files)
+    journal.append("s", "file_written", task_id="T1", path="a.py")
+    journal.flush(timeout=5)
+
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "loading"
+
+
+def test_restarted_task_forgets_files_of_the_previous_attempt(journal, storage):
+    files = [write_code(storage, "s", "a.py", "x = 1\n")]
+    journal.append("s", "task_started", task_id="T1")
+    journal.append("s", "task_generated", task_id="T1", files=files, valid=True)
+    journal.append("s", "file_written", task_id="T1", path="a.py")
+    journal.append("s", "task_started", task_id="T1")
+    journal.flush(timeout=5)
+
+    assert journal.replay("s")["tasks"]["T1"]["status"] == "loading"
+
+
+def test_torn_final_line_is_ignored(journal, storage):
+    journal.append("s", "task_completed", task_id="T1")
+    journal.flush(timeout=5)
+    with open(storage.base_dir / "s" / SPRINT_JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write('{"event": "task_comp')
+
+    assert journal.replay("s")["tasks"] == {"T1": {"status": "complete"}}
+
+
+def test_recover_restores_outcomes_into_stale_task_statuses(journal, storage):
+    storage.save_step("s", "sprint_plan", {"sprint_plan": []})
+    journal.append("s", "run_started")
+    journal.append("s", "task_completed", task_id="T1")
+    journal.append("s", "task_failed", task_id="T2", error="boom")
+    journal.flush(timeout=5)
+
+    recovered = dict(journal.recover())
+    assert recovered["s"]["run"]["status"] == "running"
+    assert storage.load_task_statuses("s") == {"T1": "complete", "T2": "error"}
+
+
+def test_recover_skips_finished_runs_that_are_already_saved(journal, storage):
+    journal.append("s", "task_completed", task_id="T1")
+    journal.append("s", "run_finished", status="completed")
+    journal.flush(timeout=5)
+    storage.save_task_statuses("s", {"T1": "complete"})
+    storage.flush()
+
+    assert dict(journal.recover()) == {}
@@ -0,0 +1,78 @@
+import pytest
+
+from app.agents.engineering.engineering_manager import MANDATORY_TASKS, _is_mandatory_task, merge_sprint_plans
+from app.core.sprint_executor import build_task_graph
+
+S1 = {"id": "S1", "title": "Sign up"}
+S2 = {"id": "S2", "title": "Dashboard"}
+S3 = {"id": "S3", "title": "Reports"}
+
+
+def task(title, story_id, assignee="Backend", task_id="TASK-001"):
+    return {"task_id": task_id, "title": title, "description": "", "assignee": assignee, "story_id": story_id, "effort": "Low"}
+
+
+def merge(*clusters):
+    return merge_sprint_plans(list(clusters), [S1, S2, S3])["sprint_plan"]
+
+
+def test_ids_are_unique_and_tasks_keep_story_order():
+    plan = merge(
+        ([S1], [task("Sign up API", "S1"), task("Sign up form", "S1", "Frontend", "TASK-002")]),
+        ([S2, S3], [task("Dashboard API", "S2"), task("Reports API", "S3", task_id="TASK-002")]),
+    )
+    titles = [t["title"] for t in plan]
+    assert titles[:4] == ["Sign up API", "Sign up form", "Dashboard API", "Reports API"]
+    assert [t["task_id"] for t in plan] == [f"TASK-{n:03d}" for n in range(1, len(plan) + 1)]
+    # The merged plan is a valid executor DAG
+    build_task_graph(plan)
+
+
+def test_mandatory_tasks_are_appended_once_without_a_story():
+    plan = merge(
+        ([S1], [task("Sign up API", "S1"), task("Project Documentation", "S1")]),
+        ([S2], [task("Create README.md and HOW_TO_RUN.md", "S2"), task("UI Visualizations", "S2")]),
+    )
+    mandatory = [t for t in plan if t["story_id"] is None]
+    assert [t["title"] for t in mandatory] == [t["title"] for t in MANDATORY_TASKS]
+    assert [t["title"] for t in plan if t["story_id"] is not None] == ["Sign up API"]
+
+
+def test_tasks_that_only_mention_docs_are_kept():
+    plan = merge(([S1], [task("Implement auth API and document endpoints in README.md", "S1")]))
+    assert plan[0]["title"] == "Implement auth API and document endpoints in README.md"
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Project Documentation", True),
+    ("UI visualization", True),
+    ("Write README.md, IMPLEMENTATION_GUIDE.md", True),
+    ("Create UI_SCREENSHOTS.html", True),
+    ("Implement auth API and document endpoints in README.md", False),
+    ("Build the documentation search page", False),
+])
+def test_is_mandatory_task(title, expected):
+    assert _is_mandatory_task({"title": title}) is expected
+
+
+def test_stray_story_ids_are_pinned_to_the_cluster():
+    plan = merge(([S2, S3], [
+        task("Reports API", "Reports"),       # story title instead of id
+        task("Dashboard chart", "S9"),        # unknown story
+        task("Dashboard API", "S2"),
+    ]))
+    assert [t["story_id"] for t in plan[:3]] == ["S3", "S2", "S2"]
+
+
+def test_duplicate_tasks_within_a_story_are_dropped():
+    plan = merge(
+        ([S1], [task("Sign up API", "S1"), task("  sign up   api", "S1")]),
+        ([S2], [task("Sign up API", "S2")]),
+    )
+    assert [(t["title"], t["story_id"]) for t in plan if t["story_id"]] == [("Sign up API", "S1"), ("Sign up API", "S2")]
+
+
+def test_stories_without_ids_get_positional_ids_and_bad_tasks_are_skipped():
+    stories = [{"title": "A"}, {"title": "B"}]
+    plan = merge_sprint_plans([(stories[1:], ["not a task", task("B work", None)])], stories)["sprint_plan"]
+    assert plan[0]["story_id"] == "STORY-002"
@@ -0,0 +1,104 @@
+import pytest
+
+from app.utils import static_checks
+from app.utils.static_checks import check_file, relative_imports, resolve_import
+
+
+def errors(path, content):
+    result = check_file(path, content)
+    return [issue["message"] for issue in result["issues"]], result["uncertain"]
+
+
+def test_python_syntax_errors_are_reported_with_position():
+    result = check_file("app.py", "def f(:\n    pass\n")
+    assert result["language"] == "python"
+    assert result["issues"][0]["line"] == 1
+    assert not result["uncertain"]
+    assert errors("app.py", "def f():\n    return 1\n") == ([], False)
+
+
+def test_json_and_jsonc():
+    assert errors("data.json", '{"a": 1}') == ([], False)
+    messages, _ = errors("data.json", '{"a": 1,}')
+    assert messages and messages[0].startswith("Invalid JSON")
+    # Config files that conventionally allow comments and trailing commas
+    assert errors("tsconfig.json", '{\n  // comment\n  "a": "http://x",\n}') == ([], False)
+
+
+def test_yaml_accepts_custom_tags():
+    if static_checks.yaml is None:
+        pytest.skip("PyYAML not installed")
+    assert errors("template.yaml", "Value: !Ref Bucket\n") == ([], False)
+    messages, _ = errors("bad.yml", "a: [1, 2\n")
+    assert messages and messages[0].startswith("Invalid YAML")
+
+
+@pytest.mark.parametrize("content", [
+    "const a = [1, 2, 3];\nfunction f() { return a.map(x => (x * 2)); }\n",
+    "const s = `value ${obj[key]} and ${fn({a: 1})}`;\n",
+    "const re = /[)}\\]]+/g; const d = a / b / c;\n",
+    "// unbalanced ) in a comment\n/* and { here */\nconst x = '(';\n",
+    "import React from 'react';\nimport { a, b } from \"./x\";\nimport './styles.css';\n",
+])
+def test_valid_javascript_passes(content):
+    assert errors("app.js", content) == ([], False)
+
+
+@pytest.mark.parametrize("content, message", [
+    ("function f() {\n  return 1;\n", "'{' is never closed"),
+    ("const a = [1, 2);\n", "')' does not match '['"),
+    ("const a = 1;\n}\n", "Unmatched '}'"),
+    ("import from './x';\n", "Malformed import statement"),
+])
+def test_broken_javascript_is_reported(content, message):
+    messages, uncertain = errors("app.ts", content)
+    assert message in messages[0]
+    assert not uncertain
+
+
+def test_problems_in_jsx_are_left_to_the_model():
+    # Apostrophes and brackets in JSX text aren't code; the scanner can't tell
+    messages, uncertain = errors("App.tsx", "export const A = () => <p>Don't (panic</p>;\n")
+    assert messages == []
+    assert uncertain
+
+
+def test_unsupported_files_are_uncertain():
+    result = check_file("main.go", "package main")
+    assert result["language"] is None
+    assert result["uncertain"]
+
+
+def test_relative_imports_and_resolution():
+    content = "import a from './a';\nconst b = require('../lib/b');\nimport('./lazy');\nimport x from 'react';\n"
+    assert relative_imports(content) == [("./a", 1), ("../lib/b", 2), ("./lazy", 3)]
+
+    paths = {"src/a.ts", "lib/b/index.js", "src/lazy.tsx"}
+    assert resolve_import("src/main.ts", "./a", paths)
+    assert resolve_import("src/main.ts", "../lib/b", paths)
+    assert resolve_import("src/main.ts", "./lazy", paths)
+    assert not resolve_import("src/main.ts", "./missing", paths)
+
+
+def test_check_files_keeps_order():
+    results = static_checks.check_files([("a.py", "x = 1"), ("b.json", "{")])
+    assert [bool(r["issues"]) for r in results] == [False, True]
+
+
+def test_analyzer_caches_by_content_and_flags_unresolved_imports():
+    import asyncio
+
+    from app.services.static_analysis import StaticAnalyzer
+
+    analyzer = StaticAnalyzer(workers=0)
+    files = {"src/a.js": "import b from './b';\nimport c from './c';\n", "src/b.js": "export default 1;\n", "bad.py": "def f(:\n"}
+
+    report = asyncio.run(analyzer.analyze(files))
+    assert report["src/b.js"]["cleared"]
+    # Unresolved imports are warnings and don't hold the file back
+    assert report["src/a.js"]["cleared"]
+    assert [(i["severity"], i["category"]) for i in report["src/a.js"]["issues"]] == [("warning", "import")]
+    assert not report["bad.py"]["cleared"]
+
+    asyncio.run(analyzer.analyze(files))
+    assert analyzer.stats()["hits"] == 3
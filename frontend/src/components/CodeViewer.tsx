@@ -154,11 +154,9 @@ const CodeViewer: React.FC<CodeViewerProps> = ({ sessionId, files, onRefresh })
 
         setLinting(true);
         try {
-            const codeFiles: Record<string, string> = {};
-            codeFiles[selectedFile] = fileContent;
-
+            // The server reads the file itself; only send the reference
             const res = await axios.post(`${API_BASE_URL}/agent/debugger/lint?session_id=${sessionId}`, {
-                code_files: codeFiles
+                code_refs: [{ path: selectedFile }]
             });
 
             setLintResults(res.data.issues || []);
@@ -174,13 +172,9 @@ const CodeViewer: React.FC<CodeViewerProps> = ({ sessionId, files, onRefresh })
 
         setDebugging(true);
         try {
-            const codeFiles: Record<string, string> = {};
-            codeFiles[selectedFile] = fileContent;
-
             const res = await axios.post(`${API_BASE_URL}/agent/debugger/debug?session_id=${sessionId}`, {
                 error_message: errorMessage,
-                code_files: codeFiles,
-                context: {}
+                code_refs: [{ path: selectedFile }]
             });
 
             setDebugResult(res.data);
@@ -111,11 +111,18 @@ export const ProjectProvider: React.FC<ProjectProviderProps> = ({ children }) =>
             let loadedFrontendCode: any | null = null;
             let loadedQaReview: any | null = null;
 
+            // One round trip for every saved step
+            const snapshotRes = await fetch(`${API_BASE_URL}/projects/${sessionId}/snapshot?fields=steps&steps=${steps.join(',')}`);
+            if (!snapshotRes.ok) {
+                throw new Error(`Failed to load project snapshot: ${snapshotRes.status}`);
+            }
+            const snapshot = await snapshotRes.json();
+            const savedSteps: Record<string, any> = snapshot.steps || {};
+
             for (const step of steps) {
                 try {
-                    const res = await fetch(`${API_BASE_URL}/projects/${sessionId}/${step}`);
-                    if (res.ok) {
-                        const data = await res.json();
+                    if (step in savedSteps) {
+                        const data = { data: savedSteps[step] };
 
                         switch (step) {
                             case 'keywords':
@@ -178,7 +185,7 @@ export const ProjectProvider: React.FC<ProjectProviderProps> = ({ children }) =>
                                 break;
                         }
                     }
-                    // Silently skip if step doesn't exist (404)
+                    // Silently skip steps that haven't been saved
                 } catch (e) {
                     // Silently skip errors for individual steps
                     console.warn(`Failed to load step ${step}:`, e);
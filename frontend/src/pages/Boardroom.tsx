@@ -39,10 +39,11 @@ const Boardroom: React.FC = () => {
 
     const onConnect = useCallback((params: Edge | Connection) => setEdges((eds) => addEdge(params, eds)), [setEdges]);
 
-    // Fetch task statuses periodically
+    // Fetch task statuses once, then apply changes pushed on the session event stream
     useEffect(() => {
+        if (!sessionId) return;
+
         const fetchStatuses = async () => {
-            if (!sessionId) return;
             try {
                 const res = await axios.get(`${API_BASE_URL}/projects/${sessionId}/task_statuses`);
                 if (res.data && res.data.task_statuses) {
@@ -54,8 +55,16 @@ const Boardroom: React.FC = () => {
         };
 
         fetchStatuses();
-        const interval = setInterval(fetchStatuses, 5000); // Poll every 5s
-        return () => clearInterval(interval);
+
+        // EventSource reconnects on its own and resumes with Last-Event-ID
+        const source = new EventSource(`${API_BASE_URL}/session/${sessionId}/events/stream?types=task_status`);
+        source.addEventListener('task_status', (e) => {
+            const event = JSON.parse((e as MessageEvent).data);
+            setTaskStatuses(prev => ({ ...prev, [event.data.task_id]: event.data.status }));
+        });
+        // Events were missed (server restart or a long disconnect): reload everything
+        source.addEventListener('truncated', fetchStatuses);
+        return () => source.close();
     }, [sessionId]);
 
     // Update nodes if architecture is available (Simple mapping)
@@ -359,7 +359,21 @@ const MissionControl: React.FC = () => {
         finally { setLoading(false); }
     };
 
+    // The step-5 effect can fire again (or race a button click) while a sprint
+    // is still running; only one run at a time per page
+    const sprintRunningRef = useRef(false);
+
     const runSprint = async (resumeFromCurrent = false) => {
+        if (sprintRunningRef.current) return;
+        sprintRunningRef.current = true;
+        try {
+            await executeSprint(resumeFromCurrent);
+        } finally {
+            sprintRunningRef.current = false;
+        }
+    };
+
+    const executeSprint = async (resumeFromCurrent: boolean) => {
         const tasks = Array.isArray(sprintPlan) ? sprintPlan : (sprintPlan?.sprint_plan || []);
         if (!tasks.length) return;
 
@@ -401,15 +415,11 @@ const MissionControl: React.FC = () => {
                     ? '/agent/frontend_dev/run'
                     : '/agent/backend_dev/run';
 
-                const context = {
-                    architecture,
-                    user_stories: userStories,
-                    prd
-                };
-
+                // Architecture, stories and PRD are already saved on the server,
+                // so reference them by step name instead of re-uploading them
                 const response = await axios.post(`${API_BASE_URL}${endpoint}?session_id=${sessionId}`, {
                     task,
-                    context
+                    context_refs: ['architecture', 'user_stories', 'prd']
                 });
 
                 // Check if response contains an error
@@ -591,15 +601,9 @@ const MissionControl: React.FC = () => {
                 ? '/agent/frontend_dev/run'
                 : '/agent/backend_dev/run';
 
-            const context = {
-                architecture,
-                user_stories: userStories,
-                prd
-            };
-
             const response = await axios.post(`${API_BASE_URL}${endpoint}?session_id=${sessionId}`, {
                 task,
-                context
+                context_refs: ['architecture', 'user_stories', 'prd']
             });
 
             // Check if response contains an error